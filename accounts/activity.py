@@ -0,0 +1,119 @@
+import atexit
+import logging
+import threading
+import time
+
+from django.conf import settings
+from django.db import DatabaseError
+from django.db.models import Case, DateTimeField, Value, When
+from django.utils import timezone
+
+from hospital_system.periodic import PeriodicRunner
+from .models import User
+
+
+FLUSH_CHUNK_SIZE = 500
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+# WRITE-COALESCING ACTIVITY TRACKER
+# ==========================================================
+class ActivityTracker:
+    """
+    Buffers "user was active at T" in process memory and writes the
+    latest timestamp per user in one CASE UPDATE per flush.
+
+    Flushes happen when a touch finds the interval elapsed, from a
+    background timer (so idle processes still flush), and at exit.
+    An interval of 0 writes through immediately.
+    """
+
+    def __init__(self, flush_interval=None):
+        if flush_interval is None:
+            flush_interval = settings.ACTIVITY_FLUSH_INTERVAL
+
+        self.flush_interval = flush_interval
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._last_flush = time.monotonic()
+        self._runner = None
+
+        if flush_interval:
+            self._runner = PeriodicRunner(
+                flush_interval, self.flush, name="activity-flush"
+            )
+
+    def touch(self, user_id, when=None):
+        when = when or timezone.now()
+
+        if not self.flush_interval:
+            User.objects.filter(pk=user_id).update(
+                last_activity=when, is_online=True
+            )
+            return
+
+        with self._lock:
+            self._pending[user_id] = when
+            due = time.monotonic() - self._last_flush >= self.flush_interval
+
+        self._runner.start()
+
+        if due:
+            self.flush()
+
+    def discard(self, user_id):
+        """Forget a buffered heartbeat (e.g. the user just logged out)."""
+        with self._lock:
+            self._pending.pop(user_id, None)
+
+    def flush(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+            self._last_flush = time.monotonic()
+
+        items = list(pending.items())
+
+        for start in range(0, len(items), FLUSH_CHUNK_SIZE):
+            chunk = items[start:start + FLUSH_CHUNK_SIZE]
+
+            User.objects.filter(pk__in=[user_id for user_id, _ in chunk]).update(
+                last_activity=Case(
+                    *[When(pk=user_id, then=Value(when)) for user_id, when in chunk],
+                    output_field=DateTimeField(),
+                ),
+                is_online=True,
+            )
+
+        return len(items)
+
+    def shutdown(self):
+        if self._runner:
+            self._runner.stop()
+
+        # Runs from atexit, where the database may already be gone: the
+        # last heartbeats are lost, but the exit stays clean
+        try:
+            self.flush()
+        except DatabaseError:
+            logger.exception("Could not flush buffered activity at exit")
+
+
+# ==========================================================
+# PROCESS-WIDE TRACKER
+# ==========================================================
+_tracker = None
+_tracker_lock = threading.Lock()
+
+
+def get_activity_tracker():
+    global _tracker
+
+    if _tracker is None:
+        with _tracker_lock:
+            if _tracker is None:
+                _tracker = ActivityTracker()
+                atexit.register(_tracker.shutdown)
+
+    return _tracker
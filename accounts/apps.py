@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class AccountsConfig(AppConfig):
     name = "accounts"
+
+    def ready(self):
+        # Registers the user-cache and search-term receivers
+        from . import auth_cache, search  # noqa: F401
@@ -0,0 +1,168 @@
+import time
+
+from django.conf import settings
+from django.contrib.auth import (
+    BACKEND_SESSION_KEY,
+    HASH_SESSION_KEY,
+    SESSION_KEY,
+    get_user as load_session_user,
+    get_user_model,
+)
+from django.contrib.auth.middleware import AuthenticationMiddleware
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils.crypto import constant_time_compare
+from django.utils.functional import SimpleLazyObject
+
+from hospital_system.caching import is_shared_cache
+
+
+MODEL_BACKEND = "django.contrib.auth.backends.ModelBackend"
+GENERATION_KEY = "auth-user:generation"
+
+
+# ==========================================================
+# VERSIONED USER CACHE
+# ==========================================================
+# Each user has a version counter next to their cached entry. An entry is
+# only used while it was stored under the current (generation, version),
+# so an invalidation that races with a reload can never be overwritten
+# by the stale copy.
+def _cache():
+    return caches[settings.AUTH_USER_CACHE]
+
+
+def _entry_key(user_id):
+    return f"auth-user:{user_id}"
+
+
+def _version_key(user_id):
+    return f"auth-user:{user_id}:version"
+
+
+def _fresh_version():
+    # Never reuses a value an evicted counter once had
+    return time.time_ns()
+
+
+def _ensure(cache, key, found):
+    value = found.get(key)
+
+    if value is None:
+        value = _fresh_version()
+        if not cache.add(key, value, None):
+            value = cache.get(key, value)
+
+    return value
+
+
+def load_user(user_id):
+    """User (with its Doctor profile pre-joined) from the cache or one query."""
+
+    cache = _cache()
+    entry_key = _entry_key(user_id)
+    version_key = _version_key(user_id)
+
+    # One round trip for entry + both version parts
+    found = cache.get_many([entry_key, version_key, GENERATION_KEY])
+    stamp = (_ensure(cache, GENERATION_KEY, found), _ensure(cache, version_key, found))
+
+    entry = found.get(entry_key)
+    if entry and entry[0] == stamp:
+        return entry[1]
+
+    user = get_user_model().objects.select_related("doctor").filter(pk=user_id).first()
+
+    if user is not None:
+        cache.set(entry_key, (stamp, user), settings.AUTH_USER_CACHE_TIMEOUT)
+
+    return user
+
+
+def _bump(key):
+    cache = _cache()
+
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, _fresh_version(), None)
+
+
+def invalidate_user(user_id):
+    """Drop the cached copy of one user once the current transaction commits."""
+    transaction.on_commit(lambda: _bump(_version_key(user_id)))
+
+
+def invalidate_all_users():
+    transaction.on_commit(lambda: _bump(GENERATION_KEY))
+
+
+@receiver(post_save, sender=settings.AUTH_USER_MODEL)
+@receiver(post_delete, sender=settings.AUTH_USER_MODEL)
+def _user_changed(sender, instance, **kwargs):
+    invalidate_user(instance.pk)
+
+
+@receiver(post_save, sender="doctors.Doctor")
+@receiver(post_delete, sender="doctors.Doctor")
+def _doctor_changed(sender, instance, **kwargs):
+    invalidate_user(instance.user_id)
+
+
+# ==========================================================
+# REQUEST.USER / REQUEST.DOCTOR
+# ==========================================================
+def get_user(request):
+    """
+    Cached equivalent of django.contrib.auth.get_user().
+
+    Anything unusual (another backend, inactive user, a session hash
+    that does not match) is handed to Django's own implementation so
+    fallback secrets and session flushing behave exactly as before.
+    """
+
+    try:
+        user_id = get_user_model()._meta.pk.to_python(request.session[SESSION_KEY])
+        backend_path = request.session[BACKEND_SESSION_KEY]
+    except KeyError:
+        return AnonymousUser()
+
+    if backend_path != MODEL_BACKEND or backend_path not in settings.AUTHENTICATION_BACKENDS:
+        return load_session_user(request)
+
+    user = load_user(user_id)
+    session_hash = request.session.get(HASH_SESSION_KEY)
+
+    if (
+        user is None
+        or not user.is_active
+        or not session_hash
+        or not constant_time_compare(session_hash, user.get_session_auth_hash())
+    ):
+        return load_session_user(request)
+
+    return user
+
+
+class CachedAuthenticationMiddleware(AuthenticationMiddleware):
+    """
+    AuthenticationMiddleware that resolves request.user through the user
+    cache and adds a lazy request.doctor (the user's Doctor profile,
+    raising Doctor.DoesNotExist for other users).
+
+    The cache is only used when AUTH_USER_CACHE is shared by every
+    process: with a per-process backend (LocMemCache) a deactivation or
+    password reset would only be seen by the worker that made it, so
+    request.user is then loaded exactly like AuthenticationMiddleware.
+    """
+
+    def process_request(self, request):
+        super().process_request(request)
+
+        if is_shared_cache(settings.AUTH_USER_CACHE):
+            request.user = SimpleLazyObject(lambda: get_user(request))
+
+        request.doctor = SimpleLazyObject(lambda: request.user.doctor)
@@ -0,0 +1,140 @@
+import uuid
+from datetime import time as dt_time, timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import Appointment, TimeSlot
+from doctors.models import Doctor
+
+
+class Command(BaseCommand):
+    help = (
+        "Count DB queries per request for the patient and doctor dashboards "
+        "under each SESSION_PROFILE. Creates throwaway users and removes "
+        "them after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument(
+            "--profile",
+            choices=list(settings.SESSION_PROFILES),
+            action="append",
+            help="Profile(s) to benchmark (default: all).",
+        )
+
+    def handle(self, *args, **options):
+
+        requests = options["requests"]
+        profiles = options["profile"] or list(settings.SESSION_PROFILES)
+
+        if requests < 1:
+            raise CommandError("--requests must be at least 1.")
+
+        tag = uuid.uuid4().hex[:8]
+        patient, doctor_user = self._create_fixtures(tag)
+
+        scenarios = [
+            ("patient dashboard", patient, self._get("/patient/dashboard/")),
+            ("doctor dashboard", doctor_user, self._get("/doctor/dashboard/")),
+            # Flash message written by one request, consumed by the next
+            ("cancel + flash", patient, self._flash_round_trip),
+        ]
+
+        try:
+            for profile in profiles:
+                for label, user, scenario in scenarios:
+                    self._run(profile, label, user, scenario, requests)
+        finally:
+            User.objects.filter(username__startswith=f"bench-{tag}-").delete()
+
+    # =========================================
+    # FIXTURES
+    # =========================================
+    def _create_fixtures(self, tag):
+
+        patient = User.objects.create_user(
+            username=f"bench-{tag}-patient",
+            email=f"bench-{tag}-patient@example.com",
+            phone=f"p{tag}",
+            age=40,
+        )
+
+        doctor_user = User.objects.create_user(
+            username=f"bench-{tag}-doctor",
+            email=f"bench-{tag}-doctor@example.com",
+            phone=f"d{tag}",
+            role="DOCTOR",
+        )
+
+        doctor = Doctor.objects.create(
+            user=doctor_user,
+            specialization="Benchmark",
+            available_from=dt_time(9, 0),
+            available_to=dt_time(17, 0),
+        )
+
+        slot = TimeSlot.objects.create(
+            doctor=doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=dt_time(10, 0),
+            is_booked=True,
+        )
+
+        Appointment.objects.create(
+            patient=patient, doctor=doctor, slot=slot, status="BOOKED"
+        )
+
+        return patient, doctor_user
+
+    # =========================================
+    # SCENARIOS (ONE "VISIT" EACH)
+    # =========================================
+    @staticmethod
+    def _get(url):
+
+        def visit(client):
+            return client.get(url).status_code
+
+        return visit
+
+    @staticmethod
+    def _flash_round_trip(client):
+        # Unknown id → "Appointment not found." then redirect to dashboard
+        client.post("/api/appointments/cancel/0/")
+        return client.get("/patient/dashboard/").status_code
+
+    # =========================================
+    # ONE PROFILE × SCENARIO
+    # =========================================
+    def _run(self, profile, label, user, scenario, requests):
+
+        engine, storage = settings.SESSION_PROFILES[profile]
+
+        with override_settings(SESSION_ENGINE=engine, MESSAGE_STORAGE=storage):
+            # Middleware reads the engine at init → fresh client per profile
+            client = Client(HTTP_HOST="localhost")
+            client.force_login(user)
+
+            status = scenario(client)   # warm-up (cache fill, lazy setup)
+
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(requests):
+                    scenario(client)
+
+        session_queries = sum(
+            1 for query in queries.captured_queries
+            if "django_session" in query["sql"]
+        )
+
+        self.stdout.write(
+            f"[{profile}] {label}: status={status} "
+            f"queries/visit={len(queries) / requests:.1f} "
+            f"(session table {session_queries / requests:.1f})"
+        )
@@ -0,0 +1,221 @@
+import csv
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import django
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+
+from accounts.models import User
+from accounts.search import rebuild_terms
+
+
+REQUIRED_COLUMNS = {"username", "email", "phone"}
+
+
+def _init_worker():
+    # Spawned workers need the app registry before hashing
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = (
+        "Bulk-import patients from a CSV with columns "
+        "username,email,phone[,age,password,patient_type]. "
+        "Rows clashing with existing users (or earlier rows) are skipped."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("csv_path")
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            default=1000,
+            help="Rows checked, hashed and inserted per round trip.",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=None,
+            help="Processes for password hashing (0 = hash in-process, "
+                 "default: one per CPU).",
+        )
+
+    def handle(self, *args, **options):
+
+        chunk_size = options["chunk_size"]
+        if chunk_size < 1:
+            raise CommandError("--chunk-size must be at least 1.")
+
+        workers = options["workers"]
+        pool = None
+        if workers != 0:
+            pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+
+        self.seen = {"username": set(), "email": set(), "phone": set()}
+        self.created = 0
+        self.skipped = 0
+        started = time.perf_counter()
+
+        try:
+            with open(options["csv_path"], newline="", encoding="utf-8") as handle:
+                reader = csv.DictReader(handle)
+
+                missing = REQUIRED_COLUMNS - set(reader.fieldnames or ())
+                if missing:
+                    raise CommandError(f"Missing column(s): {', '.join(sorted(missing))}")
+
+                chunk = []
+                for line_no, row in enumerate(reader, start=2):
+                    chunk.append((line_no, row))
+
+                    if len(chunk) >= chunk_size:
+                        self._import_chunk(chunk, pool)
+                        chunk = []
+
+                if chunk:
+                    self._import_chunk(chunk, pool)
+        finally:
+            if pool:
+                pool.shutdown()
+
+        elapsed = time.perf_counter() - started
+        rate = self.created / elapsed if elapsed else 0
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Imported {self.created} patient(s), skipped {self.skipped} "
+            f"in {elapsed:.1f}s ({rate:.0f} rows/sec)."
+        ))
+
+    # =========================================
+    # ONE CHUNK: VALIDATE → DEDUPE → HASH → INSERT
+    # =========================================
+    def _import_chunk(self, chunk, pool):
+
+        users = []
+        passwords = []
+
+        for line_no, row in chunk:
+            user = self._build_user(line_no, row)
+
+            if user:
+                users.append(user)
+                passwords.append(row.get("password") or None)
+
+        users, passwords = self._drop_existing(users, passwords)
+
+        if not users:
+            return
+
+        # Hashing dominates → spread over processes
+        if pool:
+            hashes = pool.map(make_password, passwords, chunksize=max(len(passwords) // 32, 1))
+        else:
+            hashes = map(make_password, passwords)
+
+        for user, hashed in zip(users, hashes):
+            user.password = hashed
+
+        try:
+            with transaction.atomic():
+                User.objects.bulk_create(users, batch_size=len(users))
+
+                # bulk_create skips post_save → maintain search terms here
+                if users[0].pk is None:
+                    ids = dict(User.objects.filter(
+                        username__in=[user.username for user in users]
+                    ).values_list("username", "pk"))
+
+                    for user in users:
+                        user.pk = ids[user.username]
+
+                rebuild_terms(users)
+        except IntegrityError as exc:
+            raise CommandError(
+                f"Insert failed (a matching user was created concurrently?): {exc}"
+            )
+
+        self.created += len(users)
+
+    def _build_user(self, line_no, row):
+
+        username = User.normalize_username((row.get("username") or "").strip())
+        email = User.objects.normalize_email((row.get("email") or "").strip())
+        phone = (row.get("phone") or "").strip()
+
+        if not (username and email and phone):
+            return self._skip(line_no, "username, email and phone are required")
+
+        age = (row.get("age") or "").strip()
+        try:
+            age = int(age) if age else None
+        except ValueError:
+            return self._skip(line_no, f"invalid age {age!r}")
+
+        patient_type = (row.get("patient_type") or "NORMAL").strip().upper()
+        if patient_type not in dict(User.PATIENT_TYPE_CHOICES):
+            return self._skip(line_no, f"invalid patient_type {patient_type!r}")
+
+        for field, value in (("username", username), ("email", email), ("phone", phone)):
+            if value in self.seen[field]:
+                return self._skip(line_no, f"duplicate {field} {value!r} in file")
+
+        self.seen["username"].add(username)
+        self.seen["email"].add(email)
+        self.seen["phone"].add(phone)
+
+        user = User(
+            username=username,
+            email=email,
+            phone=phone,
+            age=age,
+            patient_type=patient_type,
+            role="PATIENT",
+        )
+        user.apply_role_defaults()
+        return user
+
+    def _drop_existing(self, users, passwords):
+
+        # One query per chunk covers all three unique columns
+        existing = User.objects.filter(
+            Q(username__in=[user.username for user in users])
+            | Q(email__in=[user.email for user in users])
+            | Q(phone__in=[user.phone for user in users])
+        ).values_list("username", "email", "phone")
+
+        taken = {"username": set(), "email": set(), "phone": set()}
+        for username, email, phone in existing:
+            taken["username"].add(username)
+            taken["email"].add(email)
+            taken["phone"].add(phone)
+
+        kept_users = []
+        kept_passwords = []
+
+        for user, password in zip(users, passwords):
+            clash = next(
+                (
+                    field
+                    for field in ("username", "email", "phone")
+                    if getattr(user, field) in taken[field]
+                ),
+                None,
+            )
+
+            if clash:
+                self._skip(None, f"{clash} {getattr(user, clash)!r} already registered")
+                continue
+
+            kept_users.append(user)
+            kept_passwords.append(password)
+
+        return kept_users, kept_passwords
+
+    def _skip(self, line_no, reason):
+        self.skipped += 1
+        where = f"line {line_no}: " if line_no else ""
+        self.stderr.write(f"Skipped {where}{reason}")
+        return None
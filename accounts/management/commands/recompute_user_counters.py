@@ -0,0 +1,84 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count
+
+from accounts.auth_cache import invalidate_all_users
+from accounts.models import User
+
+
+class Command(BaseCommand):
+    help = (
+        "Repair drift in User.total_appointments from Appointment rows "
+        "(live appointments + total_cancellations). total_cancellations "
+        "itself cannot be repaired: cancelled appointments are deleted, "
+        "so no rows are left to count it from, and it is trusted as-is."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=50000,
+            help="Users per grouped count (by id range).",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many users have drifted.",
+        )
+
+    def _drifted(self, low, high):
+        """Users in [low, high) whose counter differs, set to the right value."""
+
+        # One LEFT JOIN + GROUP BY per id range, not a subquery per user
+        rows = User.objects.filter(
+            pk__gte=low,
+            pk__lt=high,
+        ).order_by().values(
+            "pk", "total_appointments", "total_cancellations"
+        ).annotate(live=Count("appointment"))
+
+        drifted = []
+
+        for row in rows:
+            expected = row["live"] + row["total_cancellations"]
+
+            if row["total_appointments"] != expected:
+                drifted.append(User(pk=row["pk"], total_appointments=expected))
+
+        return drifted
+
+    def handle(self, *args, **options):
+
+        started = time.perf_counter()
+
+        bounds = User.objects.order_by("pk").values_list("pk", flat=True)
+        first, last = bounds.first(), bounds.last()
+        batch = options["batch_size"]
+        drifted = updated = 0
+
+        if first is not None:
+            for low in range(first, last + 1, batch):
+                with transaction.atomic():
+                    users = self._drifted(low, low + batch)
+                    drifted += len(users)
+
+                    if not options["dry_run"]:
+                        updated += User.objects.bulk_update(
+                            users, ["total_appointments"], batch_size=1000
+                        )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{drifted} user(s) have drifted counters.")
+            return
+
+        # Cached request.user copies still carry the old counters
+        if updated:
+            invalidate_all_users()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Repaired counters of {updated} user(s) "
+            f"in {(time.perf_counter() - started) * 1000:.0f} ms."
+        ))
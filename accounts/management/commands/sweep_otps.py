@@ -0,0 +1,66 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Q
+from django.utils import timezone
+
+from accounts.models import PasswordResetOTP
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete PasswordResetOTP rows that can no longer be used "
+        "(expired, verified or locked). Rows are only written when "
+        "OTP_CACHE is per-process; cached OTPs expire on their own."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=5000,
+            help="Rows deleted per DELETE statement.",
+        )
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Also delete rows that have not expired yet.",
+        )
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="Only report how many rows would be deleted.",
+        )
+
+    def handle(self, *args, **options):
+
+        batch_size = options["batch_size"]
+        if batch_size < 1:
+            raise CommandError("--batch-size must be at least 1.")
+
+        stale = PasswordResetOTP.objects.all()
+
+        if not options["all"]:
+            cutoff = timezone.now() - timedelta(seconds=settings.OTP_TTL_SECONDS)
+            stale = stale.filter(
+                Q(created_at__lt=cutoff) | Q(is_verified=True) | Q(is_locked=True)
+            )
+
+        if options["dry_run"]:
+            self.stdout.write(f"{stale.count()} OTP row(s) would be deleted.")
+            return
+
+        deleted = 0
+
+        # Short DELETEs by primary key → no long table lock
+        while True:
+            ids = list(stale.order_by("pk").values_list("pk", flat=True)[:batch_size])
+
+            if not ids:
+                break
+
+            count, _ = PasswordResetOTP.objects.filter(pk__in=ids).delete()
+            deleted += count
+
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} OTP row(s)."))
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0011_alter_user_patient_type_alter_user_phone_and_more"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_online", True)),
+                fields=["last_activity"],
+                name="user_online_activity_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,69 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:20
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def backfill_search_terms(apps, schema_editor):
+    # Mirrors accounts.search.terms_for (historical models can't use it)
+    User = apps.get_model("accounts", "User")
+    UserSearchTerm = apps.get_model("accounts", "UserSearchTerm")
+
+    batch = []
+
+    for user_id, username, email, phone in User.objects.values_list(
+        "id", "username", "email", "phone"
+    ).iterator(chunk_size=5000):
+        email = (email or "").lower()
+        terms = {
+            (username or "").lower(),
+            email,
+            email.partition("@")[2],
+            re.sub(r"\D", "", phone or ""),
+        }
+        terms.discard("")
+
+        batch.extend(UserSearchTerm(user_id=user_id, term=term) for term in terms)
+
+        if len(batch) >= 5000:
+            UserSearchTerm.objects.bulk_create(batch)
+            batch = []
+
+    UserSearchTerm.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0012_user_online_activity_idx"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserSearchTerm",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("term", models.CharField(db_index=True, max_length=254)),
+                (
+                    "user",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="search_terms",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.RunPython(backfill_search_terms, migrations.RunPython.noop),
+    ]
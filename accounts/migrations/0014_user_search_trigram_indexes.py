@@ -0,0 +1,47 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:24
+
+from django.db import migrations
+
+# (index name, column) — expressions match what Django emits for
+# `field__icontains` on PostgreSQL: UPPER("col"::text) LIKE UPPER('%q%')
+TRIGRAM_INDEXES = [
+    ("accounts_user_username_trgm", "username"),
+    ("accounts_user_email_trgm", "email"),
+    ("accounts_user_phone_trgm", "phone"),
+]
+
+
+def create_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    schema_editor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    for name, column in TRIGRAM_INDEXES:
+        schema_editor.execute(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON accounts_user "
+            f'USING gin ((UPPER("{column}"::text)) gin_trgm_ops)'
+        )
+
+
+def drop_trigram_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    for name, _ in TRIGRAM_INDEXES:
+        schema_editor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {name}")
+
+
+class Migration(migrations.Migration):
+
+    # CONCURRENTLY cannot run inside a transaction; it keeps the user
+    # table writable while the indexes build
+    atomic = False
+
+    dependencies = [
+        ("accounts", "0013_usersearchterm"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_trigram_indexes, drop_trigram_indexes),
+    ]
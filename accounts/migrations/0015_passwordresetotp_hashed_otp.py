@@ -0,0 +1,18 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0014_user_search_trigram_indexes"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="passwordresetotp",
+            name="otp",
+            field=models.CharField(max_length=64),
+        ),
+    ]
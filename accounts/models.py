@@ -1,5 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
+from django.db.models import F
 from django.utils import timezone
 from datetime import timedelta
 import random
@@ -57,12 +58,24 @@ class User(AbstractUser):
     total_cancellations = models.IntegerField(default=0)
 
     last_activity = models.DateTimeField(null=True, blank=True)
+
+    # Signed in (cleared on logout); online = this + a recent last_activity
     is_online = models.BooleanField(default=False)
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # Online counts range-scan only signed-in users
+            models.Index(
+                fields=["last_activity"],
+                condition=models.Q(is_online=True),
+                name="user_online_activity_idx",
+            ),
+        ]
+
     # =====================================================
     # AUTO CLEAN BASED ON ROLE
     # =====================================================
-    def save(self, *args, **kwargs):
+    def apply_role_defaults(self):
 
         # If Doctor or Admin → remove patient-specific fields
         if self.role in ["DOCTOR", "ADMIN"]:
@@ -74,17 +87,55 @@ class User(AbstractUser):
             if self.age >= 60:
                 self.patient_type = "SENIOR"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Remember what queue priorities were computed from
+        instance._loaded_priority_inputs = instance._priority_inputs()
+        return instance
+
+    def _priority_inputs(self):
+        from appointments.priority import get_priority_rules
+
+        return {
+            field: self.__dict__[field]
+            for field in get_priority_rules().fields
+            if field in self.__dict__
+        }
+
+    def save(self, *args, **kwargs):
+        self.apply_role_defaults()
         super().save(*args, **kwargs)
 
+        loaded = getattr(self, "_loaded_priority_inputs", None)
+        current = self._priority_inputs()
+
+        # Age / type changed → reorder every queue this patient waits in
+        if loaded is not None and any(
+            current.get(field) != value for field, value in loaded.items()
+        ):
+            from appointments.priority import rescore_queue
+
+            rescore_queue([self.pk])
+
+        self._loaded_priority_inputs = current
+
     # =====================================================
     # ACTIVITY TRACKING
     # =====================================================
     def update_activity(self):
+        from .activity import get_activity_tracker
+
+        # Buffered → written in bulk every ACTIVITY_FLUSH_INTERVAL seconds
         self.last_activity = timezone.now()
         self.is_online = True
-        self.save(update_fields=["last_activity", "is_online"])
+        get_activity_tracker().touch(self.pk, self.last_activity)
 
     def mark_offline(self):
+        from .activity import get_activity_tracker
+
+        get_activity_tracker().discard(self.pk)
         self.is_online = False
         self.save(update_fields=["is_online"])
 
@@ -106,13 +157,23 @@ class User(AbstractUser):
     # =====================================================
     # ANALYTICS HELPERS
     # =====================================================
+    # Single atomic UPDATE ... SET x = x + 1 → no lost updates, no full
+    # user load. The in-memory value is not refreshed.
     def increment_appointments(self):
-        self.total_appointments += 1
-        self.save(update_fields=["total_appointments"])
+        from .auth_cache import invalidate_user
+
+        User.objects.filter(pk=self.pk).update(
+            total_appointments=F("total_appointments") + 1
+        )
+        invalidate_user(self.pk)
 
     def increment_cancellations(self):
-        self.total_cancellations += 1
-        self.save(update_fields=["total_cancellations"])
+        from .auth_cache import invalidate_user
+
+        User.objects.filter(pk=self.pk).update(
+            total_cancellations=F("total_cancellations") + 1
+        )
+        invalidate_user(self.pk)
 
     def cancellation_rate(self):
         if self.total_appointments == 0:
@@ -125,20 +186,11 @@ class User(AbstractUser):
     # =====================================================
     # PRIORITY SCORE CALCULATOR
     # =====================================================
+    # Rules live in settings.PRIORITY_RULES (appointments.priority)
     def get_priority_score(self):
+        from appointments.priority import get_priority_rules
 
-        score = 0
-
-        if self.age:
-            score += self.age
-
-        if self.patient_type == "EMERGENCY":
-            score += 100
-
-        if self.age and self.age >= 60:
-            score += 50
-
-        return score
+        return get_priority_rules().score(self)
 
     def __str__(self):
         return f"{self.username} ({self.role})"
@@ -151,7 +203,8 @@ class PasswordResetOTP(models.Model):
 
     user = models.ForeignKey(User, on_delete=models.CASCADE)
 
-    otp = models.CharField(max_length=6)
+    # Salted HMAC of the code, never the code itself
+    otp = models.CharField(max_length=64)
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -186,3 +239,25 @@ class PasswordResetOTP(models.Model):
 
     def __str__(self):
         return f"OTP for {self.user.username}"
+
+
+# ====================================================
+# USER SEARCH TERMS (INDEXED PREFIX LOOKUP)
+# ====================================================
+class UserSearchTerm(models.Model):
+    """
+    Normalized search keys per user (username, email, email domain,
+    phone digits), kept in sync by accounts.search. Prefix searches
+    are answered from the index on `term` on any database.
+    """
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="search_terms"
+    )
+
+    term = models.CharField(max_length=254, db_index=True)
+
+    def __str__(self):
+        return f"{self.term} → {self.user_id}"
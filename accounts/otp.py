@@ -0,0 +1,206 @@
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.crypto import constant_time_compare, get_random_string, salted_hmac
+
+from hospital_system.caching import is_shared_cache
+from .models import PasswordResetOTP, User
+
+
+# Outcomes of OTPStore.verify()
+VERIFIED = "verified"
+INVALID = "invalid"
+LOCKED = "locked"
+EXPIRED = "expired"
+
+
+def _digest(user_id, code):
+    return salted_hmac("accounts.otp", f"{user_id}:{code}").hexdigest()
+
+
+# ==========================================================
+# CACHE-BACKED PASSWORD RESET OTPS
+# ==========================================================
+class OTPStore:
+    """
+    One live OTP per user, kept in the cache as a salted HMAC.
+
+    The cache TTL expires codes on its own, so nothing accumulates.
+    Wrong guesses are counted with an atomic incr, and after
+    OTP_MAX_ATTEMPTS the code is locked until a new one is issued.
+    A new code can only be issued once the resend cooldown has passed.
+    """
+
+    key_prefix = "password-otp"
+
+    def __init__(self, alias=None):
+        self.cache = caches[alias or settings.OTP_CACHE]
+        self.ttl = settings.OTP_TTL_SECONDS
+        self.max_attempts = settings.OTP_MAX_ATTEMPTS
+        self.resend_seconds = settings.OTP_RESEND_SECONDS
+
+    def _keys(self, user_id):
+        base = f"{self.key_prefix}:{user_id}"
+        return f"{base}:hash", f"{base}:attempts", f"{base}:resend"
+
+    def issue(self, user_id):
+        """Return a fresh code, or None while the resend cooldown runs."""
+
+        hash_key, attempts_key, resend_key = self._keys(user_id)
+
+        # add() is atomic → concurrent requests cannot both issue
+        if not self.cache.add(resend_key, 1, self.resend_seconds):
+            return None
+
+        code = get_random_string(6, allowed_chars="0123456789")
+
+        self.cache.set_many(
+            {hash_key: _digest(user_id, code), attempts_key: 0},
+            self.ttl,
+        )
+
+        return code
+
+    def verify(self, user_id, code):
+        hash_key, attempts_key, _ = self._keys(user_id)
+        found = self.cache.get_many([hash_key, attempts_key])
+
+        if hash_key not in found:
+            return EXPIRED
+
+        if found.get(attempts_key, 0) >= self.max_attempts:
+            return LOCKED
+
+        if constant_time_compare(found[hash_key], _digest(user_id, code or "")):
+            # Single use
+            self.cache.delete_many([hash_key, attempts_key])
+            return VERIFIED
+
+        try:
+            attempts = self.cache.incr(attempts_key)
+        except ValueError:
+            # Expired between get_many() and incr()
+            return EXPIRED
+
+        return LOCKED if attempts >= self.max_attempts else INVALID
+
+    def clear(self, user_id):
+        self.cache.delete_many(self._keys(user_id))
+
+
+# ==========================================================
+# DATABASE-BACKED PASSWORD RESET OTPS
+# ==========================================================
+class DatabaseOTPStore:
+    """
+    The OTPStore rules on PasswordResetOTP rows, for when OTP_CACHE is
+    per-process: a code issued by one worker must verify on any other.
+
+    The latest row per user is the live code. Its resend_available_at
+    carries the cooldown, so a verified code stays until it has passed.
+    sweep_otps deletes rows that can no longer be used.
+    """
+
+    def __init__(self):
+        self.ttl = settings.OTP_TTL_SECONDS
+        self.max_attempts = settings.OTP_MAX_ATTEMPTS
+        self.resend_seconds = settings.OTP_RESEND_SECONDS
+
+    @staticmethod
+    def _rows(user_id):
+        return PasswordResetOTP.objects.filter(user_id=user_id)
+
+    def _lock_latest(self, user_id):
+        # Locking the user row serializes issue/verify of the same user,
+        # including the very first issue when there is no OTP row yet
+        list(User.objects.select_for_update().filter(pk=user_id).values_list("pk"))
+
+        return self._rows(user_id).order_by("-created_at", "-pk").first()
+
+    def issue(self, user_id):
+        """Return a fresh code, or None while the resend cooldown runs."""
+
+        now = timezone.now()
+
+        with transaction.atomic():
+            latest = self._lock_latest(user_id)
+
+            if latest and latest.resend_available_at and latest.resend_available_at > now:
+                return None
+
+            code = get_random_string(6, allowed_chars="0123456789")
+
+            # One live code per user
+            self._rows(user_id).delete()
+            PasswordResetOTP.objects.create(
+                user_id=user_id,
+                otp=_digest(user_id, code),
+                resend_available_at=now + timedelta(seconds=self.resend_seconds),
+            )
+
+        return code
+
+    def verify(self, user_id, code):
+        with transaction.atomic():
+            otp = self._lock_latest(user_id)
+
+            expired = otp is None or otp.is_verified or (
+                timezone.now() > otp.created_at + timedelta(seconds=self.ttl)
+            )
+            if expired:
+                return EXPIRED
+
+            if otp.is_locked or otp.attempt_count >= self.max_attempts:
+                return LOCKED
+
+            if constant_time_compare(otp.otp, _digest(user_id, code or "")):
+                # Single use
+                otp.is_verified = True
+                otp.save(update_fields=["is_verified"])
+                return VERIFIED
+
+            otp.attempt_count += 1
+            otp.is_locked = otp.attempt_count >= self.max_attempts
+            otp.save(update_fields=["attempt_count", "is_locked"])
+
+        return LOCKED if otp.is_locked else INVALID
+
+    def clear(self, user_id):
+        self._rows(user_id).delete()
+
+
+# ==========================================================
+# PROCESS-WIDE STORE
+# ==========================================================
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_otp_store():
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                # A per-process cache would only know the codes issued by
+                # this worker → keep them in the database instead
+                if is_shared_cache(settings.OTP_CACHE):
+                    _store = OTPStore()
+                else:
+                    _store = DatabaseOTPStore()
+
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+
+    if setting.startswith("OTP_") or setting == "CACHES":
+        _store = None
@@ -0,0 +1,42 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import User
+
+
+# ==========================================================
+# TTL-BASED ONLINE PRESENCE
+# ==========================================================
+# A user is online while signed in (User.is_online, cleared on logout)
+# and their last_activity is younger than PRESENCE_TTL_SECONDS, so
+# abandoned sessions drop off on their own. Both columns live in the
+# database → every worker sees the same state. last_activity lags by up
+# to ACTIVITY_FLUSH_INTERVAL, well inside the TTL.
+def online_cutoff(now=None):
+    return (now or timezone.now()) - timedelta(seconds=settings.PRESENCE_TTL_SECONDS)
+
+
+def online_users(now=None):
+    # Served by the partial index user_online_activity_idx
+    return User.objects.filter(is_online=True, last_activity__gte=online_cutoff(now))
+
+
+def is_online(user, now=None):
+    return bool(
+        user.is_online
+        and user.last_activity
+        and user.last_activity >= online_cutoff(now)
+    )
+
+
+def online_count(now=None):
+    return online_users(now).count()
+
+
+def online_by_role(now=None):
+    return dict(
+        online_users(now).order_by().values_list("role").annotate(count=Count("id"))
+    )
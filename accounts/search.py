@@ -0,0 +1,177 @@
+import re
+
+from django.db import connection
+from django.db.models import Q
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from .models import User, UserSearchTerm
+
+
+SEARCH_FIELDS = ("username", "email", "phone")
+TERMS_PER_USER = 4
+MIN_TRIGRAM_LENGTH = 3
+
+# Highest code point → q <= term < q + TERM_UPPER covers every term
+# starting with q (binary string order, as on SQLite)
+TERM_UPPER = chr(0x10FFFF)
+
+
+# ==========================================================
+# NORMALIZATION
+# ==========================================================
+def _digits(value):
+    return re.sub(r"\D", "", value or "")
+
+
+def normalize_query(word):
+    """Lowercase; phone-like input ("+91 98765-...") → digits only."""
+    word = word.strip().lower()
+
+    if word and not re.search(r"[a-z@]", word) and _digits(word):
+        return _digits(word)
+
+    return word
+
+
+def split_words(search_term):
+    """Whitespace-separated words; a phone number with spaces stays whole."""
+    if not re.search(r"[a-zA-Z@]", search_term) and _digits(search_term):
+        return [_digits(search_term)]
+
+    return search_term.split()
+
+
+def terms_for(user):
+    email = (user.email or "").lower()
+
+    terms = {
+        (user.username or "").lower(),
+        email,
+        email.partition("@")[2],
+        _digits(user.phone),
+    }
+    terms.discard("")
+
+    return terms
+
+
+# ==========================================================
+# TERM MAINTENANCE
+# ==========================================================
+def rebuild_terms(users):
+    """Replace the search terms of `users` (saved instances) in two queries."""
+
+    users = [user for user in users if user.pk is not None]
+
+    if not users:
+        return
+
+    UserSearchTerm.objects.filter(user__in=[user.pk for user in users]).delete()
+    UserSearchTerm.objects.bulk_create(
+        [
+            UserSearchTerm(user_id=user.pk, term=term)
+            for user in users
+            for term in terms_for(user)
+        ],
+        batch_size=1000,
+    )
+
+
+@receiver(post_save, sender=User)
+def _user_saved(sender, instance, created, update_fields=None, raw=False, **kwargs):
+    if raw:
+        return
+
+    # Logins save last_login only → nothing searchable changed
+    if update_fields is not None and not set(update_fields) & set(SEARCH_FIELDS):
+        return
+
+    rebuild_terms([instance])
+
+
+# ==========================================================
+# LOOKUP
+# ==========================================================
+def uses_trigram_index():
+    # Migration 0014 only creates the pg_trgm GIN indexes on PostgreSQL
+    return connection.vendor == "postgresql"
+
+
+def _terms_starting_with(word):
+    word = normalize_query(word)
+
+    # PostgreSQL: LIKE 'q%' on the varchar_pattern_ops index Django adds
+    # for db_index columns. Elsewhere a range scan (LIKE would be case-
+    # insensitive on SQLite and skip the index).
+    if connection.vendor == "postgresql":
+        return UserSearchTerm.objects.filter(term__startswith=word)
+
+    return UserSearchTerm.objects.filter(term__gte=word, term__lt=word + TERM_UPPER)
+
+
+def term_filter(word):
+    """Q on User matching users with a search term starting with `word`."""
+    return Q(pk__in=_terms_starting_with(word).values("user_id"))
+
+
+def substring_filter(word):
+    """icontains on every search field → served by the trigram indexes."""
+
+    query = Q()
+    for field in SEARCH_FIELDS:
+        query |= Q(**{f"{field}__icontains": word})
+
+    return query
+
+
+def filter_users(queryset, search_term):
+    """
+    Narrow `queryset` to users matching every word of `search_term`.
+
+    PostgreSQL matches substrings through trigram GIN indexes (words of
+    3+ characters); elsewhere, and for shorter words, words match the
+    start of a username, email, email domain or phone number.
+    """
+
+    for word in split_words(search_term):
+        if uses_trigram_index() and len(word) >= MIN_TRIGRAM_LENGTH:
+            queryset = queryset.filter(substring_filter(word))
+        else:
+            queryset = queryset.filter(term_filter(word))
+
+    return queryset
+
+
+def search_users(search_term, limit=20):
+    """Up to `limit` matching users ordered by username."""
+
+    words = split_words(search_term)
+
+    if not words:
+        return []
+
+    if len(words) == 1 and not (
+        uses_trigram_index() and len(words[0]) >= MIN_TRIGRAM_LENGTH
+    ):
+        # Single prefix → walk the term index and stop after `limit` users
+        user_ids = []
+
+        matches = _terms_starting_with(words[0]).order_by(
+            "term"
+        ).values_list("user_id", flat=True)
+
+        for user_id in matches[:limit * TERMS_PER_USER]:
+            if user_id not in user_ids:
+                user_ids.append(user_id)
+
+            if len(user_ids) == limit:
+                break
+
+        users = User.objects.in_bulk(user_ids)
+        return sorted(
+            (users[user_id] for user_id in user_ids if user_id in users),
+            key=lambda user: user.username,
+        )
+
+    return list(filter_users(User.objects.all(), " ".join(words)).order_by("username")[:limit])
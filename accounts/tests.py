@@ -1,3 +1,430 @@
-from django.test import TestCase
+import csv
+import os
+import tempfile
+from datetime import time, timedelta
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+from django.contrib.admin.sites import site
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import OperationalError
+from django.test import RequestFactory, TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from appointments.models import Appointment, TimeSlot
+from hospital_system.ratelimit import rejection_counts
+from hospital_system.testing import DoctorPatientTestData
+from .activity import ActivityTracker
+from .auth_cache import CachedAuthenticationMiddleware, invalidate_all_users, load_user
+from .models import PasswordResetOTP, User
+from .otp import (
+    EXPIRED,
+    INVALID,
+    LOCKED,
+    VERIFIED,
+    DatabaseOTPStore,
+    OTPStore,
+    get_otp_store,
+)
+from .presence import is_online, online_by_role, online_count
+
+
+class PresenceTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create_user(
+            username="pat", email="pat@example.com", phone="200", age=30
+        )
+        cls.doctor = User.objects.create_user(
+            username="doc", email="doc@example.com", phone="100", role="DOCTOR"
+        )
+
+    def setUp(self):
+        self.now = timezone.now()
+        User.objects.update(is_online=True, last_activity=self.now)
+
+    def test_recent_signed_in_users_are_online(self):
+        self.assertEqual(online_count(self.now), 2)
+        self.assertEqual(online_by_role(self.now), {"PATIENT": 1, "DOCTOR": 1})
+
+    def test_users_drop_off_after_the_ttl(self):
+        later = self.now + timedelta(seconds=301)
+
+        self.assertEqual(online_count(later), 0)
+        self.assertFalse(is_online(User.objects.get(pk=self.patient.pk), later))
+
+    def test_logout_marks_offline_for_every_worker(self):
+        User.objects.get(pk=self.patient.pk).mark_offline()
+
+        self.assertEqual(online_by_role(self.now), {"DOCTOR": 1})
+        self.assertFalse(is_online(User.objects.get(pk=self.patient.pk), self.now))
+
+
+class ActivityTrackerTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.patient = User.objects.create_user(
+            username="pat", email="pat@example.com", phone="200", age=30
+        )
+        cls.doctor = User.objects.create_user(
+            username="doc", email="doc@example.com", phone="100", role="DOCTOR"
+        )
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.tracker = ActivityTracker(flush_interval=3600)
+        self.addCleanup(self.tracker._runner.stop)
+
+    def _activity(self):
+        return dict(User.objects.values_list("pk", "last_activity"))
+
+    def test_touches_are_buffered_until_flush(self):
+        self.tracker.touch(self.patient.pk, self.now)
+
+        self.assertIsNone(self._activity()[self.patient.pk])
+
+    def test_flush_writes_each_users_latest_touch_in_one_update(self):
+        self.tracker.touch(self.patient.pk, self.now - timedelta(seconds=30))
+        self.tracker.touch(self.patient.pk, self.now)
+        self.tracker.touch(self.doctor.pk, self.now - timedelta(seconds=10))
+
+        with self.assertNumQueries(1):
+            self.assertEqual(self.tracker.flush(), 2)
+
+        self.assertEqual(self._activity(), {
+            self.patient.pk: self.now,
+            self.doctor.pk: self.now - timedelta(seconds=10),
+        })
+        self.assertEqual(User.objects.filter(is_online=True).count(), 2)
+
+        # Nothing left to write
+        with self.assertNumQueries(0):
+            self.assertEqual(self.tracker.flush(), 0)
+
+    def test_flush_is_chunked(self):
+        self.tracker.touch(self.patient.pk, self.now)
+        self.tracker.touch(self.doctor.pk, self.now)
+
+        with mock.patch("accounts.activity.FLUSH_CHUNK_SIZE", 1), self.assertNumQueries(2):
+            self.tracker.flush()
+
+    def test_discarded_touch_is_not_written(self):
+        self.tracker.touch(self.patient.pk, self.now)
+        self.tracker.discard(self.patient.pk)
+
+        self.assertEqual(self.tracker.flush(), 0)
+
+    def test_zero_interval_writes_through(self):
+        ActivityTracker(flush_interval=0).touch(self.patient.pk, self.now)
+
+        self.assertEqual(self._activity()[self.patient.pk], self.now)
+
+    def test_shutdown_logs_database_errors(self):
+        self.tracker.touch(self.patient.pk, self.now)
+
+        with mock.patch.object(
+            self.tracker, "flush", side_effect=OperationalError("gone")
+        ), self.assertLogs("accounts.activity", "ERROR"):
+            self.tracker.shutdown()
+
+
+class RecomputeUserCountersTests(DoctorPatientTestData, TestCase):
+
+    def test_counters_are_rebuilt_from_live_appointments_plus_cancellations(self):
+        slot = TimeSlot.objects.create(
+            doctor=self.doctor, date=timezone.localdate(), start_time=time(9, 0)
+        )
+        Appointment.objects.create(doctor=self.doctor, patient=self.patient, slot=slot)
+
+        User.objects.filter(pk=self.patient.pk).update(
+            total_appointments=7, total_cancellations=2
+        )
+
+        out = StringIO()
+        call_command("recompute_user_counters", "--dry-run", stdout=out)
+        self.assertIn("1 user(s) have drifted", out.getvalue())
+
+        call_command("recompute_user_counters", stdout=StringIO())
+
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.total_appointments, 3)
+        self.assertEqual(self.patient.total_cancellations, 2)
+
+
+class UserAdminSearchTests(TestCase):
+
+    def test_substring_search_without_trigram_indexes(self):
+        user = User.objects.create_user(
+            username="margaret", email="mhamilton@example.com", phone="9876543210"
+        )
+        admin = site._registry[User]
+
+        for term in ("garet", "hamilton", "6543"):
+            with self.subTest(term=term):
+                queryset, _ = admin.get_search_results(
+                    RequestFactory().get("/"), User.objects.all(), term
+                )
+                self.assertEqual(list(queryset), [user])
+
+
+class OTPStoreTests:
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first, cls.second = (
+            User.objects.create_user(
+                username=f"pat{n}", email=f"pat{n}@example.com", phone=f"20{n}", age=30
+            )
+            for n in (1, 2)
+        )
+
+    def setUp(self):
+        caches["default"].clear()
+        self.store = self.make_store()
+
+    def test_code_verifies_once(self):
+        code = self.store.issue(self.first.pk)
+
+        self.assertEqual(self.store.verify(self.first.pk, "x" + code[1:]), INVALID)
+        self.assertEqual(self.store.verify(self.first.pk, code), VERIFIED)
+        self.assertEqual(self.store.verify(self.first.pk, code), EXPIRED)
+
+    @override_settings(OTP_MAX_ATTEMPTS=3)
+    def test_code_locks_after_max_attempts(self):
+        store = self.make_store()
+        code = store.issue(self.first.pk)
+
+        self.assertEqual(
+            [store.verify(self.first.pk, "wrong") for _ in range(3)],
+            [INVALID, INVALID, LOCKED],
+        )
+
+        # Even the right code is refused until a new one is issued
+        self.assertEqual(store.verify(self.first.pk, code), LOCKED)
+
+    def test_resend_waits_for_the_cooldown(self):
+        self.assertIsNotNone(self.store.issue(self.first.pk))
+        self.assertIsNone(self.store.issue(self.first.pk))
+
+        # Other users are unaffected; clearing ends the cooldown
+        self.assertIsNotNone(self.store.issue(self.second.pk))
+        self.store.clear(self.first.pk)
+        self.assertIsNotNone(self.store.issue(self.first.pk))
+
+
+class CacheOTPStoreTests(OTPStoreTests, TestCase):
+
+    def make_store(self):
+        return OTPStore("default")
+
+
+class DatabaseOTPStoreTests(OTPStoreTests, TestCase):
+
+    def make_store(self):
+        return DatabaseOTPStore()
+
+    def test_code_expires_after_the_ttl(self):
+        code = self.store.issue(self.first.pk)
+        PasswordResetOTP.objects.update(
+            created_at=timezone.now() - timedelta(seconds=self.store.ttl + 1)
+        )
+
+        self.assertEqual(self.store.verify(self.first.pk, code), EXPIRED)
+
+    def test_only_the_digest_is_stored(self):
+        code = self.store.issue(self.first.pk)
+        otp = PasswordResetOTP.objects.get(user=self.first)
+
+        self.assertNotIn(code, otp.otp)
+        self.assertEqual(self.store.verify(self.first.pk, code), VERIFIED)
+
+    def test_per_process_cache_selects_the_database_store(self):
+        # The default test cache is LocMemCache
+        self.assertIsInstance(get_otp_store(), DatabaseOTPStore)
+
+        with mock.patch("accounts.otp.is_shared_cache", return_value=True):
+            with override_settings(OTP_CACHE="default"):
+                self.assertIsInstance(get_otp_store(), OTPStore)
+
+
+@override_settings(RATE_LIMITS={
+    "login": {"ip": (100, 60), "user": (2, 60), "user_param": "username"},
+})
+class RateLimitTests(TestCase):
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_requests_beyond_the_bucket_get_429(self):
+        url = reverse("login")
+        statuses = [
+            self.client.post(url, {"username": "Pat", "password": "wrong"}).status_code
+            for _ in range(3)
+        ]
+
+        self.assertEqual(statuses[:2], [200, 200])
+        self.assertEqual(statuses[2], 429)
+
+        # Same identifier in another case shares the bucket; others don't
+        response = self.client.post(url, {"username": "pat", "password": "wrong"})
+        self.assertEqual(response.status_code, 429)
+        self.assertTrue(int(response["Retry-After"]) >= 1)
+
+        self.assertEqual(
+            self.client.post(url, {"username": "other", "password": "x"}).status_code, 200
+        )
+        self.assertEqual(rejection_counts(), {("login", "user"): 2})
+
+
+class AuthCacheTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username="pat", email="pat@example.com", phone="200", age=30
+        )
+
+    def setUp(self):
+        caches["default"].clear()
+
+    def test_cached_user_is_served_without_queries(self):
+        load_user(self.user.pk)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(load_user(self.user.pk).username, "pat")
+
+    def test_save_invalidates_after_commit(self):
+        load_user(self.user.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            user = User.objects.get(pk=self.user.pk)
+            user.first_name = "Patricia"
+            user.save()
+
+            # Not before commit: other requests may not see the row yet
+            self.assertEqual(load_user(self.user.pk).first_name, "")
+
+        self.assertEqual(load_user(self.user.pk).first_name, "Patricia")
+
+    def test_invalidate_all_users(self):
+        load_user(self.user.pk)
+        User.objects.filter(pk=self.user.pk).update(first_name="Bulk")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            invalidate_all_users()
+
+        self.assertEqual(load_user(self.user.pk).first_name, "Bulk")
+
+    def test_middleware_uses_the_cache_only_when_shared(self):
+        request = RequestFactory().get("/")
+        request.session = {}
+        middleware = CachedAuthenticationMiddleware(lambda request: None)
+
+        for shared in (False, True):
+            with self.subTest(shared=shared), mock.patch(
+                "accounts.auth_cache.is_shared_cache", return_value=shared
+            ), mock.patch("accounts.auth_cache.get_user") as cached_get_user:
+                middleware.process_request(request)
+                request.user.is_authenticated
+
+                self.assertEqual(cached_get_user.called, shared)
+
+
+class ImportPatientsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_user(
+            username="taken", email="taken@example.com", phone="900", age=30
+        )
+
+    def _import(self, rows, *args):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        path = os.path.join(directory, "patients.csv")
+
+        with open(path, "w", newline="", encoding="utf-8") as handle:
+            writer = csv.writer(handle)
+            writer.writerow(["username", "email", "phone", "age", "password", "patient_type"])
+            writer.writerows(rows)
+
+        out, err = StringIO(), StringIO()
+        call_command("import_patients", path, *args, stdout=out, stderr=err)
+
+        return out.getvalue(), err.getvalue()
+
+    def test_clashing_and_invalid_rows_are_skipped(self):
+        out, err = self._import([
+            ["ann", "ann@example.com", "101", "34", "", ""],
+            ["ann", "other@example.com", "102", "", "", ""],        # username in file
+            ["bob", "ann@EXAMPLE.com", "103", "", "", ""],          # email in file
+            ["taken", "new@example.com", "104", "", "", ""],        # username in DB
+            ["cid", "taken@example.com", "105", "", "", ""],        # email in DB
+            ["dee", "dee@example.com", "106", "old", "", ""],       # age
+            ["eve", "eve@example.com", "107", "", "", "vip"],       # patient_type
+            ["", "fay@example.com", "108", "", "", ""],             # username missing
+        ], "--workers", "0")
+
+        self.assertIn("Imported 1 patient(s), skipped 7", out)
+        self.assertIn("line 3: duplicate username 'ann' in file", err)
+        self.assertIn("line 4: duplicate email 'ann@example.com' in file", err)
+        self.assertIn("username 'taken' already registered", err)
+        self.assertIn("email 'taken@example.com' already registered", err)
+        self.assertIn("line 7: invalid age 'old'", err)
+        self.assertIn("line 8: invalid patient_type 'VIP'", err)
+        self.assertIn("line 9: username, email and phone are required", err)
+
+        self.assertEqual(
+            sorted(User.objects.values_list("username", flat=True)), ["ann", "taken"]
+        )
+
+    def test_passwords_are_hashed_and_search_terms_created(self):
+        self._import([
+            ["ann", "ann@Example.com", "+1 (555) 0101", "70", "s3cret!", ""],
+            ["bob", "bob@example.com", "555-0102", "", "", "emergency"],
+        ], "--workers", "0")
+
+        ann = User.objects.get(username="ann")
+        self.assertNotEqual(ann.password, "s3cret!")
+        self.assertTrue(ann.check_password("s3cret!"))
+        self.assertEqual(ann.patient_type, "SENIOR")
+
+        # No password in the file → unusable password, not an empty one
+        bob = User.objects.get(username="bob")
+        self.assertFalse(bob.has_usable_password())
+        self.assertEqual(bob.patient_type, "EMERGENCY")
+
+        self.assertEqual(
+            set(ann.search_terms.values_list("term", flat=True)),
+            {"ann", "ann@example.com", "example.com", "15550101"},
+        )
+        self.assertEqual(
+            User.objects.filter(search_terms__term__startswith="5550102").get(), bob
+        )
+
+    def test_worker_processes_hash_across_chunks(self):
+        out, _ = self._import(
+            [[f"p{n}", f"p{n}@example.com", f"30{n}", "", f"pw{n}", ""] for n in range(5)],
+            "--workers", "2", "--chunk-size", "2",
+        )
+
+        self.assertIn("Imported 5 patient(s), skipped 0", out)
+
+        for user in User.objects.filter(username__startswith="p"):
+            self.assertTrue(user.check_password(f"pw{user.username[1:]}"))
+
+    def test_missing_columns_and_bad_chunk_size_are_errors(self):
+        directory = self.enterContext(tempfile.TemporaryDirectory())
+        path = os.path.join(directory, "patients.csv")
+
+        with open(path, "w", encoding="utf-8") as handle:
+            handle.write("username,email\n")
+
+        with self.assertRaisesMessage(CommandError, "Missing column(s): phone"):
+            call_command("import_patients", path, "--workers", "0")
+
+        with self.assertRaisesMessage(CommandError, "--chunk-size must be at least 1"):
+            call_command("import_patients", path, "--chunk-size", "0")
@@ -9,6 +9,7 @@ from .views import (
     verify_otp_view,
     reset_password_view,
     resend_otp_view,   
+    UserSearchView,
 )
 
 urlpatterns = [
@@ -28,4 +29,7 @@ urlpatterns = [
 
     #  NEW ROUTE
     path("resend-otp/", resend_otp_view, name="resend_otp"),
+
+    # Admin user lookup
+    path("api/users/search/", UserSearchView.as_view(), name="user_search"),
 ]
@@ -4,14 +4,22 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
-from django.core.mail import EmailMultiAlternatives
-from django.conf import settings
 from django.db import transaction
-import datetime
+from django.db.models import Q
+from django.conf import settings
 
-from .models import User, PasswordResetOTP
+from .models import User
+from .permissions import IsAdmin
+from .search import search_users
+from .otp import get_otp_store, VERIFIED, LOCKED, EXPIRED
 from appointments.models import Appointment, TimeSlot, AppointmentQueue
-from doctors.models import Doctor
+from appointments.availability import free_dates
+from appointments.reservations import get_reservation_store
+from doctors.listing import doctors_for_dashboard
+from notifications.outbox import enqueue_email
+from rest_framework.permissions import IsAdminUser
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 
 # ==========================================================
@@ -117,28 +125,20 @@ def signup_view(request):
 def patient_dashboard(request):
 
     request.user.update_activity()
-    today = timezone.localdate()
 
     # 🔍 SEARCH FILTER
     search_query = request.GET.get("search")
 
-    available_doctors = Doctor.objects.filter(
-        is_available=True,
-        last_active_date=today
-    )
-
-    if search_query:
-        available_doctors = available_doctors.filter(
-            specialization__icontains=search_query
-        )
+    # Cached, pre-serialized list; search matches the in-memory
+    # specialization catalog → no queries on a cache hit
+    available_doctors = doctors_for_dashboard(search_query)
 
     appointments = Appointment.objects.filter(
         patient=request.user
     ).select_related("doctor", "slot")
 
-    queue_entries = AppointmentQueue.objects.filter(
-        patient=request.user
-    ).select_related("slot", "slot__doctor")
+    # 🪟 Positions via RANK() window → one query for every queue
+    queue_entries = AppointmentQueue.objects.positions_for_patient(request.user)
 
     queue_data = []
 
@@ -148,7 +148,7 @@ def patient_dashboard(request):
             "date": entry.slot.date,
             "time": entry.slot.start_time,
             "priority": entry.priority_score,
-            "position": entry.get_position()
+            "position": entry.position
         })
 
     return render(request, "patient/dashboard.html", {
@@ -170,19 +170,24 @@ def doctor_slots_view(request, doctor_id):
     today = now.date()
     current_time = now.time()
 
-    slots = TimeSlot.objects.filter(
-        doctor_id=doctor_id,
-        date__gte=today,
-        is_booked=False
-    ).order_by("date", "start_time")
+    # 🧮 Bitmap index → only touch days that still have free slots
+    dates = free_dates(doctor_id, now)
+
+    valid_slots = list(
+        TimeSlot.objects.filter(
+            doctor_id=doctor_id,
+            date__in=dates,
+            is_booked=False
+        ).filter(
+            Q(date__gt=today) | Q(start_time__gt=current_time)
+        ).order_by("date", "start_time")
+    )
 
-    valid_slots = []
+    # ⏳ Slots someone else is booking right now (cache only, no slot rows)
+    holders = get_reservation_store().holders(slot.id for slot in valid_slots)
 
-    for slot in slots:
-        if slot.date > today:
-            valid_slots.append(slot)
-        elif slot.date == today and slot.start_time > current_time:
-            valid_slots.append(slot)
+    for slot in valid_slots:
+        slot.is_held = holders.get(slot.id) not in (None, request.user.id)
 
     return render(request, "patient/slots.html", {
         "slots": valid_slots
@@ -231,26 +236,23 @@ def forgot_password_view(request):
             messages.error(request, "No account found.")
             return redirect("forgot_password")
 
-        otp_code = PasswordResetOTP.generate_otp()
+        request.session["reset_user_id"] = user.id
+        request.session["otp_verified"] = False
 
-        PasswordResetOTP.objects.create(
-            user=user,
-            otp=otp_code,
-            resend_available_at=timezone.now() + datetime.timedelta(seconds=60)
-        )
+        # 🔐 Hashed code in the cache, expires on its own
+        otp_code = get_otp_store().issue(user.id)
+
+        if not otp_code:
+            messages.error(request, "An OTP was sent recently. Please wait before requesting another.")
+            return redirect("verify_otp")
 
-        email = EmailMultiAlternatives(
+        enqueue_email(
             "MediCare+ Password Reset OTP",
-            f"Your OTP is {otp_code}. Valid for 5 minutes.",
-            settings.DEFAULT_FROM_EMAIL,
-            [user.email]
+            f"Your OTP is {otp_code}. Valid for {settings.OTP_TTL_SECONDS // 60} minutes.",
+            [user.email],
+            sensitive=True,
         )
 
-        email.send()
-
-        request.session["reset_user_id"] = user.id
-        request.session["otp_verified"] = False
-
         messages.success(request, "OTP sent to your email.")
         return redirect("verify_otp")
 
@@ -271,23 +273,19 @@ def verify_otp_view(request):
 
         entered_otp = request.POST.get("otp")
 
-        otp_entry = PasswordResetOTP.objects.filter(
-            user_id=user_id,
-            otp=entered_otp,
-            is_verified=False,
-            is_locked=False
-        ).order_by("-created_at").first()
-
-        if not otp_entry:
-            messages.error(request, "Invalid OTP.")
-            return redirect("verify_otp")
+        result = get_otp_store().verify(user_id, entered_otp)
 
-        if otp_entry.is_expired():
+        if result == EXPIRED:
             messages.error(request, "OTP expired.")
             return redirect("forgot_password")
 
-        otp_entry.is_verified = True
-        otp_entry.save()
+        if result == LOCKED:
+            messages.error(request, "Too many attempts. Please request a new OTP.")
+            return redirect("verify_otp")
+
+        if result != VERIFIED:
+            messages.error(request, "Invalid OTP.")
+            return redirect("verify_otp")
 
         request.session["otp_verified"] = True
         return redirect("reset_password")
@@ -313,7 +311,7 @@ def reset_password_view(request):
         user.password = make_password(new_password)
         user.save()
 
-        PasswordResetOTP.objects.filter(user=user).delete()
+        get_otp_store().clear(user.id)
         request.session.flush()
 
         messages.success(request, "Password reset successful.")
@@ -341,21 +339,48 @@ def resend_otp_view(request):
 
     user = User.objects.get(id=user_id)
 
-    otp_code = PasswordResetOTP.generate_otp()
+    otp_code = get_otp_store().issue(user.id)
 
-    PasswordResetOTP.objects.create(
-        user=user,
-        otp=otp_code,
-        resend_available_at=timezone.now() + datetime.timedelta(seconds=60)
-    )
+    if not otp_code:
+        messages.error(request, "Please wait before requesting another OTP.")
+        return redirect("verify_otp")
 
-    email = EmailMultiAlternatives(
+    enqueue_email(
         "Resent OTP",
         f"Your new OTP is {otp_code}",
-        settings.DEFAULT_FROM_EMAIL,
-        [user.email]
+        [user.email],
+        sensitive=True,
     )
-    email.send()
 
     messages.success(request, "New OTP sent.")
-    return redirect("verify_otp")
\ No newline at end of file
+    return redirect("verify_otp")
+
+
+# ==========================================================
+# USER SEARCH API (FRONT DESK / ADMIN)
+# ==========================================================
+class UserSearchView(APIView):
+    permission_classes = [IsAdmin | IsAdminUser]
+
+    def get(self, request):
+        query = request.query_params.get("q", "").strip()
+
+        try:
+            limit = min(int(request.query_params.get("limit", 20)), 100)
+        except ValueError:
+            limit = 20
+
+        users = search_users(query, limit=max(limit, 1)) if query else []
+
+        return Response({
+            "results": [
+                {
+                    "id": user.id,
+                    "username": user.username,
+                    "email": user.email,
+                    "phone": user.phone,
+                    "role": user.role,
+                }
+                for user in users
+            ]
+        })
@@ -1,3 +1,41 @@
-from django.shortcuts import render
+from django.contrib.auth.decorators import login_required
+from django.db.models import Count, Q, Sum
+from django.shortcuts import render, redirect
 
-# Create your views here.
+from accounts.models import User
+from accounts.presence import online_count
+from appointments.models import Appointment, AppointmentQueue
+from hospital_system.ratelimit import rejection_counts
+
+
+# ==========================================================
+# ADMIN ANALYTICS DASHBOARD
+# ==========================================================
+@login_required
+def admin_dashboard(request):
+
+    if not request.user.is_admin_user:
+        return redirect("/")
+
+    users = User.objects.aggregate(
+        total=Count("id"),
+        doctors=Count("id", filter=Q(role="DOCTOR")),
+        patients=Count("id", filter=Q(role="PATIENT")),
+        cancelled=Sum("total_cancellations"),
+    )
+
+    queue_entries = AppointmentQueue.objects.select_related(
+        "slot", "slot__doctor", "slot__doctor__user", "patient"
+    ).with_position()
+
+    return render(request, "admin/dashboard.html", {
+        "total_users": users["total"],
+        "total_doctors": users["doctors"],
+        "total_patients": users["patients"],
+        "total_appointments": Appointment.objects.count(),
+        "total_cancelled": users["cancelled"] or 0,
+        # Partial index over signed-in users → no accounts_user scan
+        "online_users": online_count(),
+        "queue_entries": queue_entries,
+        "rate_limit_rejections": sorted(rejection_counts().items()),
+    })
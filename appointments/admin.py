@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import AppointmentQueue
+
+
+@admin.register(AppointmentQueue)
+class AppointmentQueueAdmin(admin.ModelAdmin):
+    list_display = ("slot", "patient", "priority_score", "position", "admin_override")
+    list_select_related = ("slot", "slot__doctor", "slot__doctor__user", "patient")
+
+    def get_queryset(self, request):
+        # Not a window: the changelist's search/filter WHERE would run
+        # first and rank only the matching rows
+        return super().get_queryset(request).with_slot_position()
+
+    @admin.display(ordering="position")
+    def position(self, obj):
+        return obj.position
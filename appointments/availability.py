@@ -0,0 +1,187 @@
+from collections import defaultdict
+from datetime import time
+from functools import partial
+
+from django.db import transaction
+from django.db.models import Exists, F
+
+from .models import DoctorDayAvailability, TimeSlot
+
+
+# One bit per half-hour of the day: bit 0 → 00:00, bit 47 → 23:30.
+# A bit is set while any free slot starts in that half-hour, so shorter
+# slots (15-minute consults) share a bit with their neighbours.
+SLOT_GRANULARITY_MINUTES = 30
+BITS_PER_DAY = 24 * 60 // SLOT_GRANULARITY_MINUTES
+FULL_MASK = (1 << BITS_PER_DAY) - 1
+
+
+# =========================================
+# BIT HELPERS
+# =========================================
+def slot_index(start_time):
+    return (start_time.hour * 60 + start_time.minute) // SLOT_GRANULARITY_MINUTES
+
+
+def slot_bit(start_time):
+    return 1 << slot_index(start_time)
+
+
+def upcoming_mask(now):
+    """
+    Bits for half-hours starting strictly after `now` (same day). The
+    bit of `now`'s own half-hour is left out: whether a slot in it is
+    still ahead is decided by start times (see _free_later_in_half_hour).
+    """
+    return FULL_MASK & ~((1 << (slot_index(now) + 1)) - 1)
+
+
+def _half_hour(start_time):
+    first = slot_index(start_time) * SLOT_GRANULARITY_MINUTES
+    last = first + SLOT_GRANULARITY_MINUTES - 1
+
+    return (time(first // 60, first % 60), time(last // 60, last % 60, 59))
+
+
+# =========================================
+# TRANSACTIONAL MAINTENANCE
+# =========================================
+def mark_booked(slot):
+    """
+    Clear the slot's free bit unless another free slot shares it. Call
+    inside the booking transaction, after the slot row is marked booked;
+    the bit is updated once that transaction commits.
+    """
+    transaction.on_commit(
+        partial(_clear_bit, slot.doctor_id, slot.date, slot.start_time),
+        robust=True,
+    )
+
+
+def _clear_bit(doctor_id, day, start_time):
+    bit = slot_bit(start_time)
+
+    days = DoctorDayAvailability.objects.filter(doctor_id=doctor_id, date=day)
+    sibling_free = TimeSlot.objects.filter(
+        doctor_id=doctor_id,
+        date=day,
+        start_time__range=_half_hour(start_time),
+        is_booked=False,
+    )
+
+    # One conditional UPDATE, no lock held across the booking. It runs
+    # after the booking committed, so when two bookings take the last
+    # free slots of a half-hour, the later one sees both and clears.
+    cleared = days.filter(~Exists(sibling_free)).update(
+        free_mask=F("free_mask").bitand(FULL_MASK & ~bit)
+    )
+
+    # An UPDATE that waited on a concurrent mark_free() evaluated NOT
+    # EXISTS on its old snapshot; a new statement sees the freed slot
+    if cleared and sibling_free.exists():
+        days.update(free_mask=F("free_mask").bitor(bit))
+
+
+def mark_free(slot):
+    """Set the slot's free bit, creating the day row if it is missing."""
+    updated = DoctorDayAvailability.objects.filter(
+        doctor_id=slot.doctor_id,
+        date=slot.date,
+    ).update(free_mask=F("free_mask").bitor(slot_bit(slot.start_time)))
+
+    if not updated:
+        rebuild([slot.doctor_id], slot.date, slot.date)
+
+
+def rebuild(doctor_ids, start_date, end_date):
+    """Recompute masks from TimeSlot rows for the given doctors and dates."""
+
+    masks = defaultdict(int)
+
+    rows = TimeSlot.objects.filter(
+        doctor_id__in=doctor_ids,
+        date__range=(start_date, end_date),
+    ).values_list("doctor_id", "date", "start_time", "is_booked")
+
+    # Days whose slots were all removed must not keep stale free bits
+    for key in DoctorDayAvailability.objects.filter(
+        doctor_id__in=doctor_ids,
+        date__range=(start_date, end_date),
+    ).exclude(free_mask=0).values_list("doctor_id", "date"):
+        masks[key] = 0
+
+    for doctor_id, day, start_time, is_booked in rows:
+        masks[(doctor_id, day)] |= 0 if is_booked else slot_bit(start_time)
+
+    DoctorDayAvailability.objects.bulk_create(
+        [
+            DoctorDayAvailability(doctor_id=doctor_id, date=day, free_mask=mask)
+            for (doctor_id, day), mask in masks.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["doctor", "date"],
+        update_fields=["free_mask"],
+    )
+
+
+# =========================================
+# READS
+# =========================================
+def _free_later_in_half_hour(doctor_ids, now):
+    """Doctors with a free slot still ahead in `now`'s half-hour."""
+
+    return set(
+        TimeSlot.objects.filter(
+            doctor_id__in=doctor_ids,
+            date=now.date(),
+            start_time__gt=now.time(),
+            start_time__lte=_half_hour(now.time())[1],
+            is_booked=False,
+        ).values_list("doctor_id", flat=True).distinct()
+    )
+
+
+def free_dates(doctor_id, now):
+    """Dates from today onward that still have at least one bookable slot."""
+
+    today = now.date()
+    dates = []
+
+    rows = DoctorDayAvailability.objects.filter(
+        doctor_id=doctor_id,
+        date__gte=today,
+    ).exclude(free_mask=0).order_by("date").values_list("date", "free_mask")
+
+    for day, mask in rows:
+        if day > today or mask & upcoming_mask(now):
+            dates.append(day)
+
+        # Only the current half-hour is free → compare start times
+        elif mask & slot_bit(now.time()) and _free_later_in_half_hour([doctor_id], now):
+            dates.append(day)
+
+    return dates
+
+
+def doctors_with_free_slots_today(doctor_ids, now):
+    """Subset of `doctor_ids` with at least one upcoming free slot today."""
+
+    upcoming = upcoming_mask(now)
+    current = slot_bit(now.time())
+
+    free, undecided = set(), []
+
+    for doctor_id, mask in DoctorDayAvailability.objects.filter(
+        doctor_id__in=doctor_ids,
+        date=now.date(),
+    ).values_list("doctor_id", "free_mask"):
+        if mask & upcoming:
+            free.add(doctor_id)
+        elif mask & current:
+            undecided.append(doctor_id)
+
+    if undecided:
+        free |= _free_later_in_half_hour(undecided, now)
+
+    return free
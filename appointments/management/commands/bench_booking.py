@@ -0,0 +1,185 @@
+import statistics
+import threading
+import time
+import uuid
+from datetime import time as dt_time, timedelta
+from functools import partial
+
+from django.core.exceptions import ValidationError
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DatabaseError, connection
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import TimeSlot, AppointmentQueue
+from appointments.services import (
+    BOOKING_MODES,
+    _book_compare_and_set,
+    _book_with_row_lock,
+    book_appointment,
+)
+from doctors.models import Doctor
+
+
+# The bare DB claim of each mode, without the reservation-store hold
+CLAIM_PATHS = {
+    "locking": _book_with_row_lock,
+    "cas": _book_compare_and_set,
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark booking modes by letting many concurrent clients "
+        "race for one slot. Creates throwaway users and removes them after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--clients", type=int, default=50)
+        parser.add_argument("--rounds", type=int, default=5)
+        parser.add_argument(
+            "--mode",
+            choices=BOOKING_MODES,
+            action="append",
+            help="Mode(s) to benchmark (default: all).",
+        )
+        parser.add_argument(
+            "--no-hold",
+            action="store_true",
+            help="Race the bare DB claims, bypassing the reservation store.",
+        )
+
+    def handle(self, *args, **options):
+
+        clients = options["clients"]
+        rounds = options["rounds"]
+        modes = options["mode"] or list(BOOKING_MODES)
+
+        if clients < 2:
+            raise CommandError("--clients must be at least 2.")
+
+        if connection.vendor == "sqlite":
+            self.stdout.write(self.style.WARNING(
+                "SQLite serialises writers; run against PostgreSQL "
+                "for meaningful contention numbers."
+            ))
+
+        tag = uuid.uuid4().hex[:8]
+        doctor, patients = self._create_fixtures(tag, clients)
+
+        try:
+            for mode in modes:
+                if options["no_hold"]:
+                    book = CLAIM_PATHS[mode]
+                else:
+                    book = partial(book_appointment, mode=mode)
+
+                self._run_mode(mode, book, doctor, patients, rounds, options["no_hold"])
+        finally:
+            User.objects.filter(username__startswith=f"bench-{tag}-").delete()
+
+    # =========================================
+    # FIXTURES
+    # =========================================
+    def _create_fixtures(self, tag, clients):
+
+        doctor_user = User.objects.create(
+            username=f"bench-{tag}-doctor",
+            email=f"bench-{tag}-doctor@example.com",
+            phone=f"d{tag}",
+            role="DOCTOR",
+        )
+
+        doctor = Doctor.objects.create(
+            user=doctor_user,
+            specialization="Benchmark",
+            available_from=dt_time(0, 0),
+            available_to=dt_time(23, 30),
+        )
+
+        User.objects.bulk_create([
+            User(
+                username=f"bench-{tag}-p{i}",
+                email=f"bench-{tag}-p{i}@example.com",
+                phone=f"p{tag}{i}",
+                role="PATIENT",
+                age=20 + i % 60,
+            )
+            for i in range(clients)
+        ])
+
+        return doctor, list(
+            User.objects.filter(username__startswith=f"bench-{tag}-p")
+        )
+
+    # =========================================
+    # ONE MODE
+    # =========================================
+    def _run_mode(self, mode, book, doctor, patients, rounds, no_hold):
+
+        latencies = []
+        wall_times = []
+        errors = 0
+        double_bookings = 0
+        queued = 0
+
+        for round_no in range(rounds):
+
+            slot = TimeSlot.objects.create(
+                doctor=doctor,
+                date=timezone.localdate() + timedelta(days=1 + round_no),
+                start_time=dt_time(10, 0),
+            )
+
+            barrier = threading.Barrier(len(patients))
+            outcomes = []
+            lock = threading.Lock()
+
+            def client(patient):
+                barrier.wait()
+                started = time.perf_counter()
+                outcome = "booked"
+
+                try:
+                    book(slot.id, patient)
+                except ValidationError:
+                    outcome = "rejected"
+                except DatabaseError:
+                    outcome = "error"
+                finally:
+                    connection.close()
+
+                with lock:
+                    latencies.append(time.perf_counter() - started)
+                    outcomes.append(outcome)
+
+            threads = [
+                threading.Thread(target=client, args=(patient,))
+                for patient in patients
+            ]
+
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            wall_times.append(time.perf_counter() - started)
+
+            booked = outcomes.count("booked")
+            errors += outcomes.count("error")
+            double_bookings += max(booked - 1, 0)
+            queued += AppointmentQueue.objects.filter(slot=slot).count()
+
+            slot.delete()
+
+        latencies.sort()
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+
+        self.stdout.write(
+            f"[{mode}{' no-hold' if no_hold else ''}] "
+            f"clients={len(patients)} rounds={rounds} "
+            f"wall avg={statistics.mean(wall_times) * 1000:.1f} ms "
+            f"latency p50={statistics.median(latencies) * 1000:.1f} ms "
+            f"p95={p95 * 1000:.1f} ms "
+            f"queued={queued} errors={errors} double_bookings={double_bookings}"
+        )
@@ -0,0 +1,153 @@
+import time
+import uuid
+from datetime import time as dt_time, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import AppointmentQueue, TimeSlot
+from appointments.priority import rescore_queue
+from doctors.models import Doctor
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark bulk queue rescoring: one UPDATE over every queue entry "
+        "versus re-saving entries one by one. Creates throwaway users and "
+        "removes them after."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--entries", type=int, default=100000)
+        parser.add_argument("--patients", type=int, default=1000)
+        parser.add_argument(
+            "--sample",
+            type=int,
+            default=1000,
+            help="Entries re-saved one by one for the per-row estimate.",
+        )
+
+    def handle(self, *args, **options):
+
+        patients = options["patients"]
+        entries = options["entries"]
+
+        if patients < 1 or entries < patients:
+            raise CommandError("Need at least one patient and --entries >= --patients.")
+
+        tag = uuid.uuid4().hex[:8]
+
+        try:
+            patient_ids = self._create_fixtures(tag, patients, entries)
+
+            # Reclassify half the patients so the scores really change
+            User.objects.filter(
+                pk__in=patient_ids[::2]
+            ).update(patient_type="EMERGENCY")
+
+            started = time.perf_counter()
+            with transaction.atomic():
+                updated = rescore_queue(patient_ids)
+            bulk = time.perf_counter() - started
+
+            sample = list(
+                AppointmentQueue.objects.filter(
+                    patient_id__in=patient_ids
+                ).select_related("patient")[:options["sample"]]
+            )
+
+            started = time.perf_counter()
+            with transaction.atomic():
+                for entry in sample:
+                    entry.save(update_fields=["priority_score"])
+            per_row = (time.perf_counter() - started) / max(len(sample), 1)
+
+            self.stdout.write(
+                f"bulk UPDATE: {updated} rows in {bulk * 1000:.0f} ms "
+                f"({updated / bulk:.0f} rows/sec)\n"
+                f"per-row save: {per_row * 1000:.2f} ms/row → "
+                f"~{per_row * updated:.1f} s for {updated} rows"
+            )
+        finally:
+            User.objects.filter(username__startswith=f"bench-{tag}-").delete()
+
+    # =========================================
+    # FIXTURES
+    # =========================================
+    def _create_fixtures(self, tag, patients, entries):
+
+        doctor_user = User.objects.create(
+            username=f"bench-{tag}-doctor",
+            email=f"bench-{tag}-doctor@example.com",
+            phone=f"d{tag}",
+            role="DOCTOR",
+        )
+
+        doctor = Doctor.objects.create(
+            user=doctor_user,
+            specialization="Benchmark",
+            available_from=dt_time(0, 0),
+            available_to=dt_time(23, 30),
+        )
+
+        User.objects.bulk_create(
+            [
+                User(
+                    username=f"bench-{tag}-p{i}",
+                    email=f"bench-{tag}-p{i}@example.com",
+                    phone=f"p{tag}{i}",
+                    role="PATIENT",
+                    age=20 + i % 60,
+                )
+                for i in range(patients)
+            ],
+            batch_size=1000,
+        )
+
+        patient_ids = list(
+            User.objects.filter(
+                username__startswith=f"bench-{tag}-p"
+            ).values_list("pk", flat=True)
+        )
+
+        # Every patient waits in every slot → entries / patients slots
+        slots_needed = -(-entries // patients)
+        today = timezone.localdate()
+
+        TimeSlot.objects.bulk_create(
+            [
+                TimeSlot(
+                    doctor=doctor,
+                    date=today + timedelta(days=1 + i // 48),
+                    start_time=dt_time((i % 48) // 2, (i % 2) * 30),
+                    is_booked=True,
+                )
+                for i in range(slots_needed)
+            ],
+            batch_size=1000,
+        )
+
+        slot_ids = list(
+            TimeSlot.objects.filter(doctor=doctor).values_list("pk", flat=True)
+        )
+
+        batch = []
+        created = 0
+
+        for slot_id in slot_ids:
+            for patient_id in patient_ids:
+                if created == entries:
+                    break
+
+                batch.append(AppointmentQueue(
+                    slot_id=slot_id, patient_id=patient_id, priority_score=0
+                ))
+                created += 1
+
+            if len(batch) >= 5000 or created == entries:
+                AppointmentQueue.objects.bulk_create(batch)
+                batch = []
+
+        return patient_ids
@@ -0,0 +1,50 @@
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from appointments.models import Appointment
+
+
+class Command(BaseCommand):
+    help = (
+        "End-of-day close-out: move every BOOKED appointment on a date to "
+        "COMPLETED (or NO_SHOW) in a single UPDATE."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--date",
+            default=None,
+            help="Slot date to close (YYYY-MM-DD, default: today).",
+        )
+        parser.add_argument(
+            "--no-show",
+            action="store_true",
+            help="Mark the appointments NO_SHOW instead of COMPLETED.",
+        )
+        parser.add_argument(
+            "--doctor",
+            type=int,
+            default=None,
+            help="Only close appointments for this doctor id.",
+        )
+
+    def handle(self, *args, **options):
+
+        try:
+            day = date.fromisoformat(options["date"]) if options["date"] else timezone.localdate()
+        except ValueError:
+            raise CommandError("--date must be YYYY-MM-DD.")
+
+        appointments = Appointment.objects.filter(slot__date=day)
+
+        if options["doctor"]:
+            appointments = appointments.filter(doctor_id=options["doctor"])
+
+        new_status = "NO_SHOW" if options["no_show"] else "COMPLETED"
+        count = appointments.transition("BOOKED", new_status)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {count} appointment(s) on {day} as {new_status}."
+        ))
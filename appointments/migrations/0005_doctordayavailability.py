@@ -0,0 +1,66 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:54
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def backfill_availability(apps, schema_editor):
+    TimeSlot = apps.get_model("appointments", "TimeSlot")
+    DoctorDayAvailability = apps.get_model("appointments", "DoctorDayAvailability")
+
+    masks = {}
+
+    for doctor_id, day, start_time, is_booked in TimeSlot.objects.values_list(
+        "doctor_id", "date", "start_time", "is_booked"
+    ).iterator():
+        key = (doctor_id, day)
+        bit = 0 if is_booked else 1 << ((start_time.hour * 60 + start_time.minute) // 30)
+        masks[key] = masks.get(key, 0) | bit
+
+    DoctorDayAvailability.objects.bulk_create(
+        [
+            DoctorDayAvailability(doctor_id=doctor_id, date=day, free_mask=mask)
+            for (doctor_id, day), mask in masks.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0004_appointmentqueue_admin_override"),
+        ("doctors", "0004_remove_doctor_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DoctorDayAvailability",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("free_mask", models.BigIntegerField(default=0)),
+                (
+                    "doctor",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="day_availability",
+                        to="doctors.doctor",
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["date"],
+                "unique_together": {("doctor", "date")},
+            },
+        ),
+        migrations.RunPython(backfill_availability, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 6.0.2 on 2026-10-18 02:59
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0005_doctordayavailability"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="appointment",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("BOOKED", "Booked"),
+                    ("CANCELLED", "Cancelled"),
+                    ("COMPLETED", "Completed"),
+                    ("NO_SHOW", "No Show"),
+                ],
+                default="BOOKED",
+                max_length=20,
+            ),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:00
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("appointments", "0006_appointment_no_show_status"),
+        ("doctors", "0005_specialization_catalog"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="appointment",
+            index=models.Index(
+                condition=models.Q(("status", "BOOKED")),
+                fields=["doctor", "slot"],
+                name="appt_doctor_booked_idx",
+            ),
+        ),
+    ]
@@ -1,9 +1,12 @@
-from django.db import models, transaction
+from django.db import models
+from django.db.models import Count, F, OuterRef, Q, Subquery, Window
+from django.db.models.functions import Coalesce, Rank
 from django.conf import settings
-from django.utils import timezone
-from django.core.mail import send_mail
-from django.conf import settings as django_settings
+from django.contrib.auth import get_user_model
+from accounts.auth_cache import invalidate_user
 from doctors.models import Doctor
+from .priority import get_priority_rules
+from .signals import send_status_changed
 
 
 # ==========================================================
@@ -38,22 +41,92 @@ class TimeSlot(models.Model):
             models.Index(fields=["doctor", "date"]),
         ]
 
+    # locked_until / locked_by are legacy columns; holds now live in
+    # appointments.reservations and never touch this row.
+    def held_by(self):
+        from .reservations import get_reservation_store
+
+        return get_reservation_store().holder(self.id)
+
     def is_locked(self):
-        return self.locked_until and self.locked_until > timezone.now()
+        return self.held_by() is not None
 
     def __str__(self):
         return f"{self.doctor} | {self.date} {self.start_time}"
 
 
+# ==========================================================
+# PER-DOCTOR-PER-DAY AVAILABILITY BITMAP
+# ==========================================================
+class DoctorDayAvailability(models.Model):
+
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name="day_availability"
+    )
+
+    date = models.DateField()
+
+    # Bit n set → a free slot starts in the half-hour at n * 30 minutes
+    free_mask = models.BigIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("doctor", "date")
+        ordering = ["date"]
+
+    def __str__(self):
+        return f"{self.doctor} | {self.date} ({self.free_mask:048b})"
+
+
 # ==========================================================
 # MAIN APPOINTMENT MODEL
 # ==========================================================
+class InvalidTransition(Exception):
+    pass
+
+
+# Allowed status moves. CANCELLED rows are deleted by the cancellation
+# service (frees the OneToOne slot), so it is never a stored end state.
+STATUS_TRANSITIONS = {
+    "BOOKED": {"CANCELLED", "COMPLETED", "NO_SHOW"},
+}
+
+
+def check_transition(old_status, new_status):
+    if new_status not in STATUS_TRANSITIONS.get(old_status, ()):
+        raise InvalidTransition(f"{old_status} → {new_status} is not allowed")
+
+
+class AppointmentQuerySet(models.QuerySet):
+
+    def transition(self, old_status, new_status):
+        """
+        Move every matching row from `old_status` to `new_status` in one
+        conditional UPDATE. Returns the number of rows changed.
+        """
+        check_transition(old_status, new_status)
+
+        if new_status == "CANCELLED":
+            raise InvalidTransition(
+                "Cancellation frees slots per row; use services.cancel_appointment"
+            )
+
+        count = self.filter(status=old_status).update(status=new_status)
+
+        if count:
+            send_status_changed(self.model, old_status, new_status, count=count)
+
+        return count
+
+
 class Appointment(models.Model):
 
     STATUS_CHOICES = (
         ("BOOKED", "Booked"),
         ("CANCELLED", "Cancelled"),
         ("COMPLETED", "Completed"),
+        ("NO_SHOW", "No Show"),
     )
 
     doctor = models.ForeignKey(Doctor, on_delete=models.CASCADE)
@@ -75,66 +148,74 @@ class Appointment(models.Model):
 
     created_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AppointmentQuerySet.as_manager()
+
     class Meta:
         ordering = ["-created_at"]
         indexes = [
             models.Index(fields=["doctor", "status"]),
+            # Doctor dashboard feed: only the BOOKED rows are ever paged
+            models.Index(
+                fields=["doctor", "slot"],
+                condition=Q(status="BOOKED"),
+                name="appt_doctor_booked_idx",
+            ),
         ]
 
     def __str__(self):
         return f"Appointment #{self.id} | {self.patient} -> {self.doctor}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+
+        # Remember the stored status so save() never has to re-read it
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
     # ======================================================
-    # PROMOTE NEXT PATIENT FROM QUEUE
+    # STATUS TRANSITIONS
     # ======================================================
-    @transaction.atomic
-    def promote_next_patient(self):
+    @classmethod
+    def book(cls, slot_id, patient):
+        from .services import book_appointment
 
-        next_entry = AppointmentQueue.objects.select_for_update().filter(
-            slot=self.slot
-        ).order_by("-priority_score", "requested_at").first()
+        return book_appointment(slot_id, patient)
 
-        if not next_entry:
-            # No queue → free slot
-            self.slot.is_booked = False
-            self.slot.save()
-            return
+    def cancel(self):
+        from .services import cancel_appointment
 
-        # Create new appointment for next patient
-        Appointment.objects.create(
-            doctor=self.doctor,
-            patient=next_entry.patient,
-            slot=self.slot,
-            status="BOOKED"
-        )
+        return cancel_appointment(self.pk)
 
-        # Update analytics
-        next_entry.patient.total_appointments += 1
-        next_entry.patient.save(update_fields=["total_appointments"])
+    def complete(self):
+        return self._transition("COMPLETED")
 
-        # Remove from queue
-        next_entry.delete()
+    def mark_no_show(self):
+        return self._transition("NO_SHOW")
 
-        # Notify patient
-        send_mail(
-            subject="MediCare+ Appointment Confirmed",
-            message=f"""
-Dear {next_entry.patient.username},
+    def _transition(self, new_status, old_status="BOOKED"):
+        """Conditional UPDATE ... WHERE status = old. False if it lost."""
 
-You have been auto-booked for:
+        check_transition(old_status, new_status)
 
-Doctor: {self.doctor.user.username}
-Date: {self.slot.date}
-Time: {self.slot.start_time}
+        changed = Appointment.objects.filter(
+            pk=self.pk,
+            status=old_status
+        ).update(status=new_status)
 
-Please login to view details.
+        if changed:
+            self.status = self._loaded_status = new_status
+            send_status_changed(Appointment, old_status, new_status, instance=self)
 
-Regards,
-MediCare+
-""",
-            from_email=django_settings.DEFAULT_FROM_EMAIL,
-            recipient_list=[next_entry.patient.email],
-        )
+        return bool(changed)
+
+    # ======================================================
+    # PROMOTE NEXT PATIENT FROM QUEUE
+    # ======================================================
+    def promote_next_patient(self):
+        from .services import promote_from_queue
+
+        return promote_from_queue(self.slot)
 
     # ======================================================
     # SAVE OVERRIDE (FIXED)
@@ -143,37 +224,99 @@ MediCare+
 
         is_new = self.pk is None
 
-        # 🔥 Handle cancellation safely
-        if not is_new:
-            old_status = Appointment.objects.get(pk=self.pk).status
+        old_status = getattr(self, "_loaded_status", None)
 
-            if old_status == "BOOKED" and self.status == "CANCELLED":
+        # 🔥 Cancellation (e.g. admin edit) → single-pass service (deletes this row)
+        if not is_new and old_status == "BOOKED" and self.status == "CANCELLED":
+            from .services import cancel_appointment
 
-                # Increase cancellation count
-                self.patient.total_cancellations += 1
-                self.patient.save(update_fields=["total_cancellations"])
+            # Re-selects the row locked and still BOOKED: a second stale
+            # copy saved as CANCELLED finds nothing and changes nothing
+            try:
+                cancel_appointment(self.pk)
+            except Appointment.DoesNotExist:
+                pass
+            return
 
-                # Promote next patient OR free slot
-                self.promote_next_patient()
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
 
-                # 🔥 DELETE this appointment (prevents OneToOne conflict)
-                super().delete()
-                return
+        if is_new:
+            send_status_changed(Appointment, None, self.status, instance=self)
 
-        super().save(*args, **kwargs)
+        elif old_status and old_status != self.status:
+            send_status_changed(Appointment, old_status, self.status, instance=self)
 
         # 🔥 Handle new booking
         if is_new:
-            self.slot.is_booked = True
-            self.slot.save()
+            if not self.slot.is_booked:
+                from .availability import mark_booked
 
-            self.patient.total_appointments += 1
-            self.patient.save(update_fields=["total_appointments"])
+                self.slot.is_booked = True
+                self.slot.save(update_fields=["is_booked"])
+                mark_booked(self.slot)
+
+            get_user_model().objects.filter(pk=self.patient_id).update(
+                total_appointments=F("total_appointments") + 1
+            )
+            invalidate_user(self.patient_id)
 
 
 # ==========================================================
 # PRIORITY QUEUE MODEL
 # ==========================================================
+class AppointmentQueueQuerySet(models.QuerySet):
+
+    def with_position(self):
+        """Annotate `position` = rank within the slot's queue (1 = next)."""
+        return self.annotate(
+            position=Window(
+                expression=Rank(),
+                partition_by=F("slot_id"),
+                order_by=[F("priority_score").desc(), F("requested_at").asc()],
+            )
+        )
+
+    def ahead_of(self, slot_id, priority_score, requested_at):
+        """
+        Entries of the slot's queue ranked strictly ahead: higher score,
+        or the same score requested earlier. Position = count + 1, the
+        same value RANK() gives (ties share a position).
+        """
+        return self.filter(slot_id=slot_id).filter(
+            Q(priority_score__gt=priority_score)
+            | Q(priority_score=priority_score, requested_at__lt=requested_at)
+        )
+
+    def with_slot_position(self):
+        """
+        with_position() as a correlated count over the whole slot queue.
+        A window only ranks the rows left after WHERE, so use this when
+        the queryset gets filtered further (admin search and filters).
+        """
+        ahead = AppointmentQueue.objects.ahead_of(
+            OuterRef("slot_id"), OuterRef("priority_score"), OuterRef("requested_at")
+        ).order_by().values("slot_id").annotate(count=Count("id")).values("count")
+
+        return self.annotate(position=Coalesce(Subquery(ahead), 0) + 1)
+
+    def positions_for_patient(self, patient):
+        """
+        The patient's queue entries with positions, in one query.
+
+        Ranks must be computed over every entry of the patient's slots,
+        so the window runs on those slots and the patient's own rows are
+        picked out afterwards.
+        """
+        entries = self.filter(
+            slot__waiting_queue__patient=patient
+        ).select_related(
+            "slot", "slot__doctor", "slot__doctor__user"
+        ).with_position()
+
+        return [entry for entry in entries if entry.patient_id == patient.id]
+
+
 class AppointmentQueue(models.Model):
 
     slot = models.ForeignKey(
@@ -191,6 +334,8 @@ class AppointmentQueue(models.Model):
     admin_override = models.BooleanField(default=False)
     requested_at = models.DateTimeField(auto_now_add=True)
 
+    objects = AppointmentQueueQuerySet.as_manager()
+
     class Meta:
         ordering = ["-priority_score", "requested_at"]
         unique_together = ("slot", "patient")
@@ -199,18 +344,7 @@ class AppointmentQueue(models.Model):
         return f"Queue | {self.patient} (Priority {self.priority_score})"
 
     def calculate_priority(self):
-        score = 0
-
-        if self.patient.age:
-            score += self.patient.age
-
-        if getattr(self.patient, "patient_type", None) == "EMERGENCY":
-            score += 100
-
-        if self.patient.age and self.patient.age >= 60:
-            score += 50
-
-        return score
+        return get_priority_rules().score(self.patient)
 
     def save(self, *args, **kwargs):
         if not self.admin_override:
@@ -219,9 +353,6 @@ class AppointmentQueue(models.Model):
         super().save(*args, **kwargs)
 
     def get_position(self):
-        higher = AppointmentQueue.objects.filter(
-            slot=self.slot,
-            priority_score__gt=self.priority_score
-        ).count()
+        from .queue_engine import get_queue_engine
 
-        return higher + 1
+        return get_queue_engine().position(self)
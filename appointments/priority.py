@@ -0,0 +1,186 @@
+import operator
+import threading
+from functools import reduce
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.exceptions import ImproperlyConfigured
+from django.core.signals import setting_changed
+from django.db.models import (
+    Case,
+    ExpressionWrapper,
+    IntegerField,
+    OuterRef,
+    Q,
+    Subquery,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.dispatch import receiver
+
+
+# Lookups a "when" rule may use, evaluated the same way SQL would
+# (a NULL field never matches a comparison)
+LOOKUPS = {
+    "exact": operator.eq,
+    "gt": operator.gt,
+    "gte": operator.ge,
+    "lt": operator.lt,
+    "lte": operator.le,
+    "in": lambda value, options: value in options,
+}
+
+
+# ==========================================================
+# RULE ENGINE
+# ==========================================================
+class PriorityRules:
+    """
+    Queue priority as a sum of rules over patient fields.
+
+    Every rule is evaluated in Python (score one patient) and compiled to
+    a SQL expression (rescore many queue rows in one UPDATE), so both
+    paths always agree.
+
+        {"add": "age"}                                   → + patient.age
+        {"when": {"patient_type": "EMERGENCY"}, "points": 100}
+        {"when": {"age__gte": 60}, "points": 50}
+    """
+
+    def __init__(self, rules):
+        self.rules = [self._parse(rule) for rule in rules]
+
+        # Patient fields the score depends on
+        self.fields = set()
+
+        for kind, target, _ in self.rules:
+            if kind == "add":
+                self.fields.add(target)
+            else:
+                self.fields.update(field for field, _, _ in target)
+
+    @staticmethod
+    def _parse(rule):
+        if "add" in rule:
+            return ("add", rule["add"], None)
+
+        if "when" in rule and "points" in rule:
+            conditions = []
+
+            for lookup, expected in rule["when"].items():
+                field, _, name = lookup.partition("__")
+                name = name or "exact"
+
+                if name not in LOOKUPS:
+                    raise ImproperlyConfigured(f"Unsupported priority lookup: {lookup}")
+
+                conditions.append((field, name, expected))
+
+            return ("when", conditions, int(rule["points"]))
+
+        raise ImproperlyConfigured(f"Invalid priority rule: {rule!r}")
+
+    # ---------- one patient ----------
+    def score(self, patient):
+        total = 0
+
+        for kind, target, points in self.rules:
+            if kind == "add":
+                total += getattr(patient, target) or 0
+
+            elif all(self._matches(getattr(patient, field), name, expected)
+                     for field, name, expected in target):
+                total += points
+
+        return total
+
+    @staticmethod
+    def _matches(value, name, expected):
+        if value is None and name != "exact":
+            return False
+
+        return LOOKUPS[name](value, expected)
+
+    # ---------- many rows ----------
+    def expression(self, prefix=""):
+        """The score as a SQL expression over `prefix`-relative fields."""
+
+        terms = []
+
+        for kind, target, points in self.rules:
+            if kind == "add":
+                terms.append(Coalesce(f"{prefix}{target}", Value(0), output_field=IntegerField()))
+            else:
+                condition = Q(**{
+                    f"{prefix}{field}__{name}": expected
+                    for field, name, expected in target
+                })
+                terms.append(Case(
+                    When(condition, then=Value(points)),
+                    default=Value(0),
+                    output_field=IntegerField(),
+                ))
+
+        if not terms:
+            return Value(0, output_field=IntegerField())
+
+        return ExpressionWrapper(reduce(operator.add, terms), output_field=IntegerField())
+
+
+# ==========================================================
+# CONFIGURED RULES
+# ==========================================================
+_rules = None
+_rules_lock = threading.Lock()
+
+
+def get_priority_rules():
+    global _rules
+
+    if _rules is None:
+        with _rules_lock:
+            if _rules is None:
+                _rules = PriorityRules(settings.PRIORITY_RULES)
+
+    return _rules
+
+
+@receiver(setting_changed)
+def _reset_rules(setting, **kwargs):
+    global _rules
+
+    if setting == "PRIORITY_RULES":
+        _rules = None
+
+
+# ==========================================================
+# BULK RESCORING
+# ==========================================================
+def rescore_queue(patient_ids=None):
+    """
+    Recompute priority_score for every non-overridden queue entry of
+    `patient_ids` (all patients when None) in a single UPDATE.
+    Returns the number of rows updated.
+    """
+
+    from .models import AppointmentQueue
+    from .queue_engine import scores_changed
+
+    score = get_user_model().objects.filter(
+        pk=OuterRef("patient_id")
+    ).annotate(
+        score=get_priority_rules().expression()
+    ).values("score")
+
+    entries = AppointmentQueue.objects.filter(admin_override=False)
+
+    if patient_ids is not None:
+        entries = entries.filter(patient_id__in=list(patient_ids))
+
+    updated = entries.update(priority_score=Subquery(score))
+
+    if updated:
+        scores_changed()
+
+    return updated
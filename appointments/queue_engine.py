@@ -0,0 +1,246 @@
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import AppointmentQueue
+
+
+# ==========================================================
+# DATABASE ENGINE (DEFAULT)
+# ==========================================================
+class DatabaseQueueEngine:
+    """Every operation goes straight to the AppointmentQueue table."""
+
+    def pop_next(self, slot):
+        """
+        Remove and return the highest-priority entry for `slot`.
+        Must run inside the caller's transaction.
+        """
+        entry = AppointmentQueue.objects.select_for_update(
+            of=("self",)
+        ).select_related("patient").filter(
+            slot=slot
+        ).order_by("-priority_score", "requested_at").first()
+
+        if entry:
+            AppointmentQueue.objects.filter(id=entry.id).delete()
+
+        return entry
+
+    def peek(self, slot):
+        return AppointmentQueue.objects.filter(
+            slot=slot
+        ).order_by("-priority_score", "requested_at").first()
+
+    def position(self, entry):
+        # Same ordering (and tie-break) as pop_next and with_position()
+        ahead = AppointmentQueue.objects.ahead_of(
+            entry.slot_id, entry.priority_score, entry.requested_at
+        ).count()
+
+        return ahead + 1
+
+
+# ==========================================================
+# IN-MEMORY ENGINE (WRITE-THROUGH)
+# ==========================================================
+class MemoryQueueEngine(DatabaseQueueEngine):
+    """
+    Keeps an ordered run of (-priority_score, requested_at, id) per
+    active slot so peek is O(1) and position is a bisect.
+
+    A sorted list rather than a heap: a heap pops in O(log n) but needs
+    an O(n) scan to answer position, which is read far more often than
+    entries come and go; insort is a memmove on a short per-slot list.
+
+    The table stays the source of truth: every insert/update/delete of an
+    AppointmentQueue row is mirrored here after commit, and pop_next only
+    hands out an entry once its row delete actually succeeded. Entries
+    written by other processes are only picked up by rebuild(), so this
+    engine suits a single application process.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queues = defaultdict(list)
+        self._keys = {}
+
+        post_save.connect(
+            _mirror_save, sender=AppointmentQueue,
+            dispatch_uid="memory_queue_engine_save",
+        )
+        post_delete.connect(
+            _mirror_delete, sender=AppointmentQueue,
+            dispatch_uid="memory_queue_engine_delete",
+        )
+
+        self.rebuild()
+
+    # ---------- keys ----------
+    @staticmethod
+    def _key(entry_id, priority_score, requested_at, patient_id):
+        return (-priority_score, requested_at, entry_id, patient_id)
+
+    # ---------- sync ----------
+    def rebuild(self):
+        """Reload every queue for today's and future slots from the table."""
+
+        rows = AppointmentQueue.objects.filter(
+            slot__date__gte=timezone.localdate()
+        ).values_list(
+            "id", "slot_id", "patient_id", "priority_score", "requested_at"
+        )
+
+        queues = defaultdict(list)
+        keys = {}
+
+        for entry_id, slot_id, patient_id, score, requested_at in rows:
+            key = self._key(entry_id, score, requested_at, patient_id)
+            queues[slot_id].append(key)
+            keys[entry_id] = (slot_id, key)
+
+        for queue in queues.values():
+            queue.sort()
+
+        with self._lock:
+            self._queues = queues
+            self._keys = keys
+
+    def _add(self, entry):
+        key = self._key(
+            entry.id, entry.priority_score, entry.requested_at, entry.patient_id
+        )
+
+        with self._lock:
+            self._discard_locked(entry.id)
+            insort(self._queues[entry.slot_id], key)
+            self._keys[entry.id] = (entry.slot_id, key)
+
+    def _discard(self, entry_id):
+        with self._lock:
+            self._discard_locked(entry_id)
+
+    def _discard_locked(self, entry_id):
+        found = self._keys.pop(entry_id, None)
+
+        if not found:
+            return
+
+        slot_id, key = found
+        queue = self._queues[slot_id]
+        index = bisect_left(queue, key)
+
+        if index < len(queue) and queue[index] == key:
+            del queue[index]
+
+        if not queue:
+            del self._queues[slot_id]
+
+    # ---------- queue operations ----------
+    def pop_next(self, slot):
+        with self._lock:
+            candidates = list(self._queues.get(slot.id, ()))
+
+        for priority, requested_at, entry_id, patient_id in candidates:
+
+            # Row delete is the real claim; 0 rows → someone else won
+            deleted, _ = AppointmentQueue.objects.filter(id=entry_id).delete()
+
+            if deleted:
+                return AppointmentQueue(
+                    id=entry_id,
+                    slot=slot,
+                    patient_id=patient_id,
+                    priority_score=-priority,
+                    requested_at=requested_at,
+                )
+
+        return None
+
+    def peek(self, slot):
+        with self._lock:
+            queue = self._queues.get(slot.id)
+
+            if not queue:
+                return None
+
+            priority, requested_at, entry_id, patient_id = queue[0]
+
+        return AppointmentQueue(
+            id=entry_id,
+            slot=slot,
+            patient_id=patient_id,
+            priority_score=-priority,
+            requested_at=requested_at,
+        )
+
+    def position(self, entry):
+        with self._lock:
+            found = self._keys.get(entry.id)
+
+            if found:
+                slot_id, key = found
+
+                # (-score, requested_at) prefix sorts before its own
+                # entries → exact ties share a position, like RANK()
+                return bisect_left(self._queues[slot_id], key[:2]) + 1
+
+        # Not an active slot (or not committed yet) → ask the table
+        return super().position(entry)
+
+
+# ==========================================================
+# CONFIGURED ENGINE
+# ==========================================================
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_queue_engine():
+    global _engine
+
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                _engine = import_string(settings.APPOINTMENT_QUEUE_ENGINE)()
+
+    return _engine
+
+
+def _mirror_save(sender, instance, **kwargs):
+    engine = _engine
+
+    if isinstance(engine, MemoryQueueEngine):
+        transaction.on_commit(lambda: engine._add(instance))
+
+
+def _mirror_delete(sender, instance, **kwargs):
+    engine = _engine
+    entry_id = instance.id
+
+    if isinstance(engine, MemoryQueueEngine):
+        transaction.on_commit(lambda: engine._discard(entry_id))
+
+
+def scores_changed():
+    """Bulk score UPDATEs bypass signals → resync an in-memory engine."""
+    engine = _engine
+
+    if isinstance(engine, MemoryQueueEngine):
+        transaction.on_commit(engine.rebuild)
+
+
+@receiver(setting_changed)
+def _reset_engine(setting, **kwargs):
+    global _engine
+
+    if setting == "APPOINTMENT_QUEUE_ENGINE":
+        _engine = None
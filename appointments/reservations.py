@@ -0,0 +1,197 @@
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.utils.module_loading import import_string
+
+
+# ==========================================================
+# BASE STORE
+# ==========================================================
+class BaseReservationStore:
+    """
+    Short-lived slot holds keyed by slot id.
+
+    A hold belongs to one user and disappears on its own once the TTL
+    runs out, so nothing has to be written to the TimeSlot row.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl or settings.SLOT_HOLD_SECONDS
+
+    def hold(self, slot_id, user_id, ttl=None):
+        """Take (or refresh) a hold. Returns False if someone else has it."""
+        raise NotImplementedError
+
+    def extend(self, slot_id, user_id, ttl=None):
+        """Push back expiry of an existing hold owned by `user_id`."""
+        raise NotImplementedError
+
+    def release(self, slot_id, user_id):
+        """Drop the hold if `user_id` owns it."""
+        raise NotImplementedError
+
+    def holder(self, slot_id):
+        """User id currently holding the slot, or None."""
+        raise NotImplementedError
+
+    def holders(self, slot_ids):
+        """{slot_id: user_id} for every held slot among `slot_ids`."""
+        return {
+            slot_id: user_id
+            for slot_id in slot_ids
+            if (user_id := self.holder(slot_id)) is not None
+        }
+
+
+# ==========================================================
+# DJANGO CACHE STORE (SHARED ACROSS WORKERS)
+# ==========================================================
+class CacheReservationStore(BaseReservationStore):
+
+    key_prefix = "slot-hold"
+
+    def __init__(self, ttl=None, alias=None):
+        super().__init__(ttl)
+        self.cache = caches[alias or settings.SLOT_RESERVATION_CACHE]
+
+    def _key(self, slot_id):
+        return f"{self.key_prefix}:{slot_id}"
+
+    def hold(self, slot_id, user_id, ttl=None):
+        ttl = ttl or self.ttl
+        key = self._key(slot_id)
+
+        # cache.add is atomic on every backend → first caller wins
+        if self.cache.add(key, user_id, ttl):
+            return True
+
+        current = self.cache.get(key)
+
+        if current is None:
+            # Expired between add() and get()
+            return self.cache.add(key, user_id, ttl)
+
+        if current == user_id:
+            self.cache.touch(key, ttl)
+            return True
+
+        return False
+
+    def extend(self, slot_id, user_id, ttl=None):
+        key = self._key(slot_id)
+
+        if self.cache.get(key) != user_id:
+            return False
+
+        return self.cache.touch(key, ttl or self.ttl)
+
+    def release(self, slot_id, user_id):
+        key = self._key(slot_id)
+
+        if self.cache.get(key) != user_id:
+            return False
+
+        self.cache.delete(key)
+        return True
+
+    def holder(self, slot_id):
+        return self.cache.get(self._key(slot_id))
+
+    def holders(self, slot_ids):
+        slot_ids = list(slot_ids)
+        found = self.cache.get_many([self._key(slot_id) for slot_id in slot_ids])
+
+        return {
+            slot_id: found[self._key(slot_id)]
+            for slot_id in slot_ids
+            if self._key(slot_id) in found
+        }
+
+
+# ==========================================================
+# LOCAL MEMORY STORE (SINGLE PROCESS / TESTS)
+# ==========================================================
+class LocalMemoryReservationStore(BaseReservationStore):
+
+    def __init__(self, ttl=None):
+        super().__init__(ttl)
+        self._holds = {}
+        self._lock = threading.Lock()
+
+    def _live_holder(self, slot_id, now):
+        entry = self._holds.get(slot_id)
+
+        if entry is None:
+            return None
+
+        user_id, expires_at = entry
+
+        if expires_at <= now:
+            del self._holds[slot_id]
+            return None
+
+        return user_id
+
+    def hold(self, slot_id, user_id, ttl=None):
+        now = time.monotonic()
+
+        with self._lock:
+            current = self._live_holder(slot_id, now)
+
+            if current is not None and current != user_id:
+                return False
+
+            self._holds[slot_id] = (user_id, now + (ttl or self.ttl))
+            return True
+
+    def extend(self, slot_id, user_id, ttl=None):
+        now = time.monotonic()
+
+        with self._lock:
+            if self._live_holder(slot_id, now) != user_id:
+                return False
+
+            self._holds[slot_id] = (user_id, now + (ttl or self.ttl))
+            return True
+
+    def release(self, slot_id, user_id):
+        with self._lock:
+            if self._live_holder(slot_id, time.monotonic()) != user_id:
+                return False
+
+            del self._holds[slot_id]
+            return True
+
+    def holder(self, slot_id):
+        with self._lock:
+            return self._live_holder(slot_id, time.monotonic())
+
+
+# ==========================================================
+# CONFIGURED STORE
+# ==========================================================
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_reservation_store():
+    global _store
+
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = import_string(settings.SLOT_RESERVATION_STORE)()
+
+    return _store
+
+
+@receiver(setting_changed)
+def _reset_store(setting, **kwargs):
+    global _store
+
+    if setting in ("SLOT_RESERVATION_STORE", "SLOT_RESERVATION_CACHE", "SLOT_HOLD_SECONDS"):
+        _store = None
@@ -1,30 +1,87 @@
+from dataclasses import dataclass
+
 from django.db import transaction
+from django.db.models import F
+from django.conf import settings
 from django.core.exceptions import ValidationError
-from django.utils import timezone
-from datetime import timedelta
 
+from accounts.auth_cache import invalidate_user
+from accounts.models import User
+from notifications.outbox import enqueue_email
 from .models import TimeSlot, Appointment, AppointmentQueue
+from .availability import mark_booked, mark_free
+from .queue_engine import get_queue_engine
+from .reservations import get_reservation_store
+from .signals import send_status_changed
+
+
+BOOKING_MODES = ("locking", "cas")
 
 
 # =========================================
-# MAIN BOOKING LOGIC (FINAL SAFE VERSION)
+# MAIN BOOKING ENTRY POINT
 # =========================================
+def book_appointment(slot_id, patient, mode=None):
+
+    mode = mode or settings.BOOKING_MODE
+
+    if mode not in BOOKING_MODES:
+        raise ValueError(f"Unknown booking mode: {mode}")
+
+    try:
+        slot_id = int(slot_id)
+    except (TypeError, ValueError):
+        raise ValidationError("Slot does not exist")
+
+    # ⏳ Hold for the whole booking (cache only) so the slot list shows
+    # it as taken. The DB claim below still decides: a patient who loses
+    # the hold goes through it too, so contention on a booked slot ends
+    # in the waiting queue rather than in "try again".
+    store = get_reservation_store()
+    held = store.hold(slot_id, patient.id)
+
+    try:
+        if mode == "cas":
+            appointment = _book_compare_and_set(slot_id, patient)
+        else:
+            appointment = _book_with_row_lock(slot_id, patient)
+    except BaseException:
+        if held:
+            store.release(slot_id, patient.id)
+        raise
+
+    # Kept until the booking is visible to everyone (immediately, unless
+    # the caller wraps this in its own transaction)
+    if held:
+        transaction.on_commit(lambda: store.release(slot_id, patient.id))
+
+    return appointment
+
+
+# =========================================
+# ROW-LOCK BOOKING (FINAL SAFE VERSION)
+# =========================================
+def _book_with_row_lock(slot_id, patient):
+
+    appointment = _lock_and_book(slot_id, patient)
+
+    # Raised after commit → the queue entry survives
+    if appointment is None:
+        raise ValidationError(
+            "Slot already booked. You have been added to waiting queue."
+        )
+
+    return appointment
+
+
 @transaction.atomic
-def book_appointment(slot_id, patient):
+def _lock_and_book(slot_id, patient):
 
     try:
         slot = TimeSlot.objects.select_for_update().get(id=slot_id)
     except TimeSlot.DoesNotExist:
         raise ValidationError("Slot does not exist")
 
-    # 🔒 Temporary lock check
-    if slot.is_locked() and slot.locked_by != patient:
-        raise ValidationError("Slot is temporarily locked. Try again.")
-
-    slot.locked_until = timezone.now() + timedelta(seconds=10)
-    slot.locked_by = patient
-    slot.save()
-
     # 🔎 Check if slot already booked
     existing_appointment = Appointment.objects.filter(
         slot=slot,
@@ -38,20 +95,70 @@ def book_appointment(slot_id, patient):
     # ❗ Slot already booked → add to queue (NO REPLACEMENT)
     _add_to_queue(slot, patient)
 
+    return None
+
+
+# =========================================
+# COMPARE-AND-SET BOOKING (LOW CONTENTION)
+# =========================================
+def _book_compare_and_set(slot_id, patient):
+
+    appointment = _claim_and_create(slot_id, patient)
+
+    if appointment:
+        return appointment
+
+    # Claim lost → queue outside the failed claim so the entry survives
+    slot = TimeSlot.objects.filter(id=slot_id).first()
+
+    if not slot:
+        raise ValidationError("Slot does not exist")
+
+    if not slot.is_booked:
+        raise ValidationError("Slot is temporarily locked. Try again.")
+
+    with transaction.atomic():
+        _add_to_queue(slot, patient)
+
     raise ValidationError(
         "Slot already booked. You have been added to waiting queue."
     )
 
 
+@transaction.atomic
+def _claim_and_create(slot_id, patient):
+
+    # 🔒 Single conditional UPDATE claims the slot; losers match 0 rows
+    claimed = TimeSlot.objects.filter(
+        id=slot_id,
+        is_booked=False,
+    ).update(is_booked=True)
+
+    if not claimed:
+        return None
+
+    slot = TimeSlot.objects.only(
+        "id", "doctor_id", "date", "start_time", "is_booked"
+    ).get(id=slot_id)
+
+    mark_booked(slot)
+
+    return Appointment.objects.create(
+        doctor_id=slot.doctor_id,
+        patient=patient,
+        slot=slot,
+        status="BOOKED",
+    )
+
+
 # =========================================
 # CREATE APPOINTMENT
 # =========================================
 def _create_appointment(slot, patient):
 
     slot.is_booked = True
-    slot.locked_until = None
-    slot.locked_by = None
-    slot.save()
+    slot.save(update_fields=["is_booked"])
+    mark_booked(slot)
 
     appointment = Appointment.objects.create(
         doctor=slot.doctor,
@@ -82,30 +189,119 @@ def _add_to_queue(slot, patient):
 
 
 # =========================================
-# PROMOTE FROM QUEUE (CALLED ON CANCEL)
+# CANCELLATION (SINGLE PASS)
+# =========================================
+@dataclass
+class CancellationResult:
+    appointment_id: int
+    slot_id: int
+    promoted: Appointment = None
+
+    @property
+    def slot_freed(self):
+        return self.promoted is None
+
+
+@transaction.atomic
+def cancel_appointment(appointment_id, patient=None):
+    """
+    Cancel a BOOKED appointment and hand its slot to the queue, once.
+
+    Raises Appointment.DoesNotExist if there is no such booked
+    appointment (for `patient`, when given).
+    """
+
+    filters = {"id": appointment_id, "status": "BOOKED"}
+
+    if patient is not None:
+        filters["patient"] = patient
+
+    appointment = Appointment.objects.select_for_update(
+        of=("self", "slot")
+    ).select_related("slot", "doctor__user").get(**filters)
+
+    return cancel_locked(appointment)
+
+
+def cancel_locked(appointment):
+    """
+    Cancellation core; `appointment` must already be locked. Returns
+    None when the row was no longer BOOKED (cancelled elsewhere).
+    """
+
+    slot = appointment.slot
+
+    # Delete frees the OneToOne slot for the promoted patient
+    deleted, _ = Appointment.objects.filter(
+        pk=appointment.pk, status="BOOKED"
+    ).delete()
+
+    # Nothing cancelled → no counter, no signal, no second promotion
+    if not deleted:
+        return None
+
+    User.objects.filter(pk=appointment.patient_id).update(
+        total_cancellations=F("total_cancellations") + 1
+    )
+    invalidate_user(appointment.patient_id)
+
+    appointment.status = "CANCELLED"
+    send_status_changed(Appointment, "BOOKED", "CANCELLED", instance=appointment)
+
+    return CancellationResult(
+        appointment_id=appointment.pk,
+        slot_id=slot.pk,
+        promoted=_promote(slot, appointment.doctor),
+    )
+
+
+# =========================================
+# PROMOTE FROM QUEUE
 # =========================================
 @transaction.atomic
 def promote_from_queue(slot):
+    return _promote(slot, slot.doctor)
+
 
-    next_patient = AppointmentQueue.objects.select_for_update().filter(
-        slot=slot
-    ).order_by("-priority_score", "requested_at").first()
+def _promote(slot, doctor):
 
-    if not next_patient:
+    # Pops (and deletes) the highest-priority queue entry
+    next_entry = get_queue_engine().pop_next(slot)
+
+    if not next_entry:
+        TimeSlot.objects.filter(pk=slot.pk).update(is_booked=False)
         slot.is_booked = False
-        slot.save()
-        return
+        mark_free(slot)
+        return None
 
-    AppointmentQueue.objects.filter(
-        id=next_patient.id
-    ).delete()
+    # Slot stays booked → no slot or bitmap write needed
+    slot.is_booked = True
 
-    Appointment.objects.create(
-        doctor=slot.doctor,
-        patient=next_patient.patient,
+    appointment = Appointment.objects.create(
+        doctor=doctor,
+        patient=next_entry.patient,
         slot=slot,
         status="BOOKED",
     )
 
-    slot.is_booked = True
-    slot.save()
+    # Notify patient (sent by the outbox worker after commit)
+    enqueue_email(
+        subject="MediCare+ Appointment Confirmed",
+        message=f"""
+Dear {next_entry.patient.username},
+
+You have been auto-booked for:
+
+Doctor: {doctor.user.username}
+Date: {slot.date}
+Time: {slot.start_time}
+
+Please login to view details.
+
+Regards,
+MediCare+
+""",
+        recipient_list=[next_entry.patient.email],
+    )
+
+    return appointment
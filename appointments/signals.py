@@ -0,0 +1,24 @@
+from django.db import transaction
+from django.dispatch import Signal
+
+
+# Sent once the transaction that applied an appointment status transition
+# commits (immediately in autocommit mode); never for a rolled-back one.
+#   old_status, new_status – the transition that was applied; old_status
+#                            is None for a new booking (→ BOOKED)
+#   count                  – rows that actually changed
+#   instance               – the Appointment, for single-row transitions
+#                            (already deleted for BOOKED → CANCELLED)
+appointment_status_changed = Signal()
+
+
+def send_status_changed(sender, old_status, new_status, count=1, instance=None):
+    transaction.on_commit(
+        lambda: appointment_status_changed.send(
+            sender=sender,
+            old_status=old_status,
+            new_status=new_status,
+            count=count,
+            instance=instance,
+        )
+    )
@@ -1,3 +1,595 @@
-from django.test import TestCase
+from datetime import datetime, time, timedelta
 
-# Create your tests here.
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from accounts.models import User
+from hospital_system.testing import DoctorPatientTestData
+from notifications.models import OutboxEmail
+from .availability import doctors_with_free_slots_today, free_dates, rebuild, slot_bit
+from .models import Appointment, AppointmentQueue, DoctorDayAvailability, TimeSlot
+from .priority import PriorityRules, get_priority_rules, rescore_queue
+from .queue_engine import get_queue_engine, scores_changed
+from .reservations import get_reservation_store
+from .services import book_appointment, cancel_appointment
+from .signals import appointment_status_changed
+
+
+class CancelAppointmentTests(DoctorPatientTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.senior = cls.create_patient("senior", "300", age=70)
+        cls.young = cls.create_patient("young", "400", age=20)
+
+    def setUp(self):
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=time(10, 0),
+        )
+        rebuild([self.doctor.id], self.slot.date, self.slot.date)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.appointment = book_appointment(self.slot.id, self.patient)
+
+    def _free_mask(self):
+        return DoctorDayAvailability.objects.get(
+            doctor=self.doctor, date=self.slot.date
+        ).free_mask
+
+    def test_cancel_without_queue_frees_slot_within_budget(self):
+        # savepoint, lock+load, delete, counter, queue pop,
+        # slot update, bitmap update, release
+        with self.assertNumQueries(8):
+            result = cancel_appointment(self.appointment.id, patient=self.patient)
+
+        self.assertTrue(result.slot_freed)
+        self.assertFalse(Appointment.objects.filter(slot=self.slot).exists())
+
+        self.slot.refresh_from_db()
+        self.assertFalse(self.slot.is_booked)
+        self.assertTrue(self._free_mask() & slot_bit(self.slot.start_time))
+
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.total_cancellations, 1)
+
+    def test_cancel_promotes_exactly_once_within_budget(self):
+        AppointmentQueue.objects.create(slot=self.slot, patient=self.young, priority_score=0)
+        AppointmentQueue.objects.create(slot=self.slot, patient=self.senior, priority_score=0)
+
+        # savepoint, lock+load, delete, counter, queue pop (select+delete),
+        # appointment insert, counter, outbox insert, release
+        with self.assertNumQueries(10):
+            result = cancel_appointment(self.appointment.id, patient=self.patient)
+
+        self.assertEqual(result.promoted.patient, self.senior)
+        self.assertEqual(
+            list(Appointment.objects.filter(slot=self.slot).values_list("patient", flat=True)),
+            [self.senior.id],
+        )
+        self.assertEqual(
+            list(AppointmentQueue.objects.filter(slot=self.slot).values_list("patient", flat=True)),
+            [self.young.id],
+        )
+
+        self.slot.refresh_from_db()
+        self.assertTrue(self.slot.is_booked)
+        self.assertFalse(self._free_mask() & slot_bit(self.slot.start_time))
+
+        self.senior.refresh_from_db()
+        self.assertEqual(self.senior.total_appointments, 1)
+        self.assertEqual(OutboxEmail.objects.filter(recipients=[self.senior.email]).count(), 1)
+
+    def test_cancel_rejects_other_patients_appointment(self):
+        with self.assertRaises(Appointment.DoesNotExist):
+            cancel_appointment(self.appointment.id, patient=self.young)
+
+    def test_cancel_view_promotes_once(self):
+        AppointmentQueue.objects.create(slot=self.slot, patient=self.senior, priority_score=0)
+        self.client.force_login(self.patient)
+
+        response = self.client.post(f"/api/appointments/cancel/{self.appointment.id}/")
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Appointment.objects.get(slot=self.slot).patient, self.senior)
+        self.assertFalse(AppointmentQueue.objects.filter(slot=self.slot).exists())
+
+    def test_stale_copies_saved_as_cancelled_promote_once(self):
+        AppointmentQueue.objects.create(slot=self.slot, patient=self.senior, priority_score=0)
+
+        # e.g. two admin change forms opened on the same booking
+        first = Appointment.objects.get(pk=self.appointment.pk)
+        second = Appointment.objects.get(pk=self.appointment.pk)
+
+        for stale in (first, second):
+            stale.status = "CANCELLED"
+            stale.save()
+
+        self.patient.refresh_from_db()
+        self.assertEqual(self.patient.total_cancellations, 1)
+        self.assertEqual(Appointment.objects.get(slot=self.slot).patient, self.senior)
+
+        self.slot.refresh_from_db()
+        self.assertTrue(self.slot.is_booked)
+        self.assertFalse(self._free_mask() & slot_bit(self.slot.start_time))
+
+
+class StatusSignalTests(DoctorPatientTestData, TestCase):
+
+    def setUp(self):
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=time(11, 0),
+        )
+        self.received = []
+        appointment_status_changed.connect(self._receive)
+        self.addCleanup(appointment_status_changed.disconnect, self._receive)
+
+    def _receive(self, sender, old_status, new_status, count, instance, **kwargs):
+        self.received.append((old_status, new_status, count))
+
+    def test_booking_and_cancellation_send_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = book_appointment(self.slot.id, self.patient)
+
+            # Nothing is sent while the transaction is still open
+            self.assertEqual(self.received, [])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cancel_appointment(appointment.id, patient=self.patient)
+
+        self.assertEqual(
+            self.received,
+            [(None, "BOOKED", 1), ("BOOKED", "CANCELLED", 1)],
+        )
+
+    def test_doctor_transition_sends_once(self):
+        appointment = book_appointment(self.slot.id, self.patient)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Appointment.objects.filter(pk=appointment.pk).transition("BOOKED", "COMPLETED")
+            Appointment.objects.filter(pk=appointment.pk).transition("BOOKED", "NO_SHOW")
+
+        self.assertEqual(self.received, [("BOOKED", "COMPLETED", 1)])
+
+
+class SharedHalfHourBitTests(DoctorPatientTestData, TestCase):
+
+    def setUp(self):
+        day = timezone.localdate() + timedelta(days=1)
+
+        # Two 15-minute consults share the 10:00 half-hour bit
+        self.first, self.second = [
+            TimeSlot.objects.create(doctor=self.doctor, date=day, start_time=start)
+            for start in (time(10, 0), time(10, 15))
+        ]
+        rebuild([self.doctor.id], day, day)
+
+    def _bit_set(self):
+        return bool(
+            DoctorDayAvailability.objects.get(doctor=self.doctor, date=self.first.date).free_mask
+            & slot_bit(time(10, 0))
+        )
+
+    def _book(self, slot):
+        # The bit is cleared once the booking commits
+        with self.captureOnCommitCallbacks(execute=True):
+            return book_appointment(slot.id, self.patient)
+
+    def test_bit_stays_while_a_sibling_is_free(self):
+        self._book(self.first)
+        self.assertTrue(self._bit_set())
+
+        self._book(self.second)
+        self.assertFalse(self._bit_set())
+
+    def test_booking_takes_no_lock_on_the_day_row(self):
+        with CaptureQueriesContext(connection) as queries:
+            self._book(self.first)
+
+        self.assertFalse([
+            query["sql"] for query in queries.captured_queries
+            if "availability" in query["sql"] and "FOR UPDATE" in query["sql"]
+        ])
+
+    def test_cancelling_either_sibling_sets_the_bit_again(self):
+        self._book(self.first)
+        appointment = self._book(self.second)
+
+        cancel_appointment(appointment.id)
+
+        self.assertTrue(self._bit_set())
+
+    def test_slot_later_in_the_current_half_hour_is_upcoming(self):
+        self._book(self.first)
+        day = self.first.date
+
+        # 10:05 → the free 10:15 consult is still ahead, 10:20 → it started
+        at_1005 = timezone.make_aware(datetime.combine(day, time(10, 5)))
+        at_1020 = timezone.make_aware(datetime.combine(day, time(10, 20)))
+
+        self.assertEqual(free_dates(self.doctor.id, at_1005), [day])
+        self.assertEqual(doctors_with_free_slots_today([self.doctor.id], at_1005), {self.doctor.id})
+
+        self.assertEqual(free_dates(self.doctor.id, at_1020), [])
+        self.assertEqual(doctors_with_free_slots_today([self.doctor.id], at_1020), set())
+
+
+class SlotHoldTests(DoctorPatientTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_patient("other", "300", age=40)
+
+    def setUp(self):
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=time(10, 0),
+        )
+
+        # A fresh in-memory store per test → no holds left over
+        self.enterContext(override_settings(
+            SLOT_RESERVATION_STORE="appointments.reservations.LocalMemoryReservationStore"
+        ))
+        self.store = get_reservation_store()
+
+    def test_losing_the_hold_still_ends_in_the_queue(self):
+        # The other patient's booking has not released its hold yet
+        with self.captureOnCommitCallbacks():
+            book_appointment(self.slot.id, self.other)
+
+        for mode in ("locking", "cas"):
+            with self.subTest(mode=mode):
+                with self.assertRaisesMessage(ValidationError, "waiting queue"):
+                    book_appointment(self.slot.id, self.patient, mode=mode)
+
+                self.assertTrue(
+                    AppointmentQueue.objects.filter(slot=self.slot, patient=self.patient).exists()
+                )
+                self.assertEqual(self.store.holder(self.slot.id), self.other.id)
+
+    def test_held_free_slot_is_still_decided_by_the_database(self):
+        self.store.hold(self.slot.id, self.other.id)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            appointment = book_appointment(self.slot.id, self.patient, mode="cas")
+
+        self.assertEqual(appointment.patient, self.patient)
+        self.assertEqual(self.store.holder(self.slot.id), self.other.id)
+
+    def test_hold_is_kept_until_the_booking_commits(self):
+        for mode in ("locking", "cas"):
+            with self.subTest(mode=mode):
+                slot = TimeSlot.objects.create(
+                    doctor=self.doctor, date=self.slot.date, start_time=time(11, 0),
+                ) if mode == "cas" else self.slot
+
+                with self.captureOnCommitCallbacks() as callbacks:
+                    book_appointment(str(slot.id), self.patient, mode=mode)
+
+                self.assertEqual(self.store.holder(slot.id), self.patient.id)
+
+                for callback in callbacks:
+                    callback()
+
+                self.assertIsNone(self.store.holder(slot.id))
+
+    def test_failed_booking_releases_the_hold(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            book_appointment(self.slot.id, self.other)
+
+        for mode in ("locking", "cas"):
+            with self.assertRaisesMessage(ValidationError, "waiting queue"):
+                book_appointment(self.slot.id, self.patient, mode=mode)
+
+            self.assertIsNone(self.store.holder(self.slot.id))
+
+
+class QueuePositionTests(DoctorPatientTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.slot = TimeSlot.objects.create(
+            doctor=cls.doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=time(10, 0),
+            is_booked=True,
+        )
+
+        now = timezone.now()
+
+        # (score, minutes ago): one ahead on score, then two on arrival
+        cls.entries = []
+        for index, (score, minutes) in enumerate([(90, 0), (50, 10), (50, 5)]):
+            patient = cls.create_patient(f"p{index}", f"30{index}")
+            entry = AppointmentQueue.objects.create(
+                slot=cls.slot, patient=patient, priority_score=score, admin_override=True,
+            )
+            AppointmentQueue.objects.filter(pk=entry.pk).update(
+                requested_at=now - timedelta(minutes=minutes)
+            )
+            entry.refresh_from_db()
+            cls.entries.append(entry)
+
+    def test_slot_position_ignores_later_filters(self):
+        last = self.entries[2]
+
+        window = AppointmentQueue.objects.with_position().filter(pk=last.pk).get()
+        counted = AppointmentQueue.objects.with_slot_position().filter(pk=last.pk).get()
+
+        self.assertEqual(window.position, 1)  # ranked alone after WHERE
+        self.assertEqual(counted.position, 3)
+
+    def test_engines_agree_with_rank(self):
+        ranks = {
+            entry.pk: entry.position
+            for entry in AppointmentQueue.objects.with_position()
+        }
+
+        for engine in ("DatabaseQueueEngine", "MemoryQueueEngine"):
+            with self.settings(APPOINTMENT_QUEUE_ENGINE=f"appointments.queue_engine.{engine}"):
+                for entry in self.entries:
+                    self.assertEqual(entry.get_position(), ranks[entry.pk], engine)
+
+        self.assertEqual(sorted(ranks.values()), [1, 2, 3])
+
+
+class MemoryQueueEngineTests(DoctorPatientTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.slot, cls.past_slot = [
+            TimeSlot.objects.create(
+                doctor=cls.doctor, date=timezone.localdate() + timedelta(days=offset),
+                start_time=time(10, 0), is_booked=True,
+            )
+            for offset in (1, -1)
+        ]
+        cls.patients = [cls.create_patient(f"p{index}", f"30{index}") for index in range(4)]
+
+    def _enqueue(self, patient, score, minutes_ago, slot=None):
+        entry = AppointmentQueue.objects.create(
+            slot=slot or self.slot, patient=patient,
+            priority_score=score, admin_override=True,
+        )
+        AppointmentQueue.objects.filter(pk=entry.pk).update(
+            requested_at=self.now - timedelta(minutes=minutes_ago)
+        )
+        entry.refresh_from_db()
+        return entry
+
+    def setUp(self):
+        self.now = timezone.now()
+
+        # (score, minutes ago): p1 leads on score, p0/p2 tie on both
+        self.first, self.tied, self.tied_too = [
+            self._enqueue(self.patients[index], score, minutes)
+            for index, score, minutes in [(1, 90, 0), (0, 50, 10), (2, 50, 10)]
+        ]
+        self._enqueue(self.patients[3], 99, 0, slot=self.past_slot)
+
+        # A fresh engine per test, rebuilt from this test's rows
+        self.enterContext(override_settings(
+            APPOINTMENT_QUEUE_ENGINE="appointments.queue_engine.MemoryQueueEngine"
+        ))
+        self.engine = get_queue_engine()
+
+    def _order(self):
+        return [key[2] for key in self.engine._queues[self.slot.id]]
+
+    def test_rebuild_orders_todays_and_future_queues(self):
+        self.assertEqual(self._order(), [self.first.pk, self.tied.pk, self.tied_too.pk])
+        self.assertNotIn(self.past_slot.id, self.engine._queues)
+
+        self.assertEqual(self.engine.peek(self.slot).id, self.first.pk)
+
+    def test_exact_ties_share_a_position_like_rank(self):
+        with self.assertNumQueries(0):
+            positions = [
+                self.engine.position(entry)
+                for entry in (self.first, self.tied, self.tied_too)
+            ]
+
+        self.assertEqual(positions, [1, 2, 2])
+
+    def test_saves_and_deletes_are_mirrored_after_commit(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            late = self._enqueue(self.patients[3], 95, 0)
+
+        self.assertEqual(self.engine.position(late), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            late.delete()
+
+        self.assertEqual(self._order(), [self.first.pk, self.tied.pk, self.tied_too.pk])
+
+    def test_pop_next_skips_rows_claimed_elsewhere(self):
+        # Deleted by another process: no signal reaches this engine
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"DELETE FROM {AppointmentQueue._meta.db_table} WHERE id = %s",
+                [self.first.pk],
+            )
+
+        popped = self.engine.pop_next(self.slot)
+
+        self.assertEqual(popped.id, self.tied.pk)
+        self.assertEqual(popped.patient_id, self.tied.patient_id)
+        self.assertEqual(
+            list(AppointmentQueue.objects.filter(slot=self.slot).values_list("pk", flat=True)),
+            [self.tied_too.pk],
+        )
+
+    def test_bulk_rescore_resyncs_the_engine(self):
+        AppointmentQueue.objects.filter(pk=self.tied_too.pk).update(priority_score=100)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            scores_changed()
+
+        self.assertEqual(self._order(), [self.tied_too.pk, self.first.pk, self.tied.pk])
+
+
+class BookingPathTests(DoctorPatientTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.other = cls.create_patient("other", "300", age=40)
+
+    def setUp(self):
+        self.slot = TimeSlot.objects.create(
+            doctor=self.doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=time(10, 0),
+        )
+        rebuild([self.doctor.id], self.slot.date, self.slot.date)
+
+        self.enterContext(override_settings(
+            SLOT_RESERVATION_STORE="appointments.reservations.LocalMemoryReservationStore"
+        ))
+
+    def _book(self, patient, mode):
+        # Run the hold release like a committed request would
+        with self.captureOnCommitCallbacks(execute=True):
+            return book_appointment(self.slot.id, patient, mode=mode)
+
+    def test_free_slot_is_booked_and_leaves_the_bitmap(self):
+        for mode in ("locking", "cas"):
+            with self.subTest(mode=mode):
+                appointment = self._book(self.patient, mode)
+
+                self.slot.refresh_from_db()
+                self.assertTrue(self.slot.is_booked)
+                self.assertEqual(appointment.slot_id, self.slot.id)
+                self.assertEqual(appointment.status, "BOOKED")
+                self.assertFalse(
+                    DoctorDayAvailability.objects.get(
+                        doctor=self.doctor, date=self.slot.date
+                    ).free_mask & slot_bit(self.slot.start_time)
+                )
+
+                cancel_appointment(appointment.id)
+
+    def test_booked_slot_queues_the_second_patient(self):
+        for mode in ("locking", "cas"):
+            with self.subTest(mode=mode):
+                first = self._book(self.patient, mode)
+
+                with self.assertRaisesMessage(ValidationError, "waiting queue"):
+                    self._book(self.other, mode)
+
+                # The queue entry outlives the rejected booking
+                self.assertTrue(
+                    AppointmentQueue.objects.filter(slot=self.slot, patient=self.other).exists()
+                )
+                self.assertEqual(Appointment.objects.get(slot=self.slot).pk, first.pk)
+
+                AppointmentQueue.objects.all().delete()
+                cancel_appointment(first.id)
+
+    def test_missing_slot_is_rejected(self):
+        for mode in ("locking", "cas"):
+            with self.assertRaisesMessage(ValidationError, "does not exist"):
+                book_appointment(0, self.patient, mode=mode)
+
+
+class PriorityRescoreTests(DoctorPatientTestData, TestCase):
+
+    RULE_SETS = [
+        [{"add": "age"}],
+        [{"when": {"patient_type": "EMERGENCY"}, "points": 100}],
+        [{"when": {"age__gte": 60}, "points": 50}],
+        [{"when": {"age__gt": 60}, "points": 7}],
+        [{"when": {"age__lt": 18}, "points": 30}],
+        [{"when": {"age__lte": 18}, "points": 31}],
+        [{"when": {"patient_type__in": ["SENIOR", "EMERGENCY"]}, "points": 20}],
+        [{"when": {"patient_type": "EMERGENCY", "age__gte": 60}, "points": 200}],
+        settings.PRIORITY_RULES,
+    ]
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        slot = TimeSlot.objects.create(
+            doctor=cls.doctor,
+            date=timezone.localdate() + timedelta(days=1),
+            start_time=time(10, 0),
+            is_booked=True,
+        )
+
+        # Ages on both sides of every threshold, a missing age, every type
+        cls.patients = [
+            cls.create_patient(f"p{index}", f"30{index}", age=age, patient_type=patient_type)
+            for index, (age, patient_type) in enumerate([
+                (None, "NORMAL"),
+                (17, "NORMAL"),
+                (18, "EMERGENCY"),
+                (59, "NORMAL"),
+                (60, "NORMAL"),
+                (61, "EMERGENCY"),
+            ])
+        ]
+
+        cls.entries = [
+            AppointmentQueue.objects.create(slot=slot, patient=patient, priority_score=0)
+            for patient in cls.patients
+        ]
+
+    def _scores(self):
+        return dict(AppointmentQueue.objects.values_list("patient_id", "priority_score"))
+
+    def test_sql_rescore_matches_python_score_for_every_rule(self):
+        for rules in self.RULE_SETS:
+            with self.subTest(rules=rules), self.settings(PRIORITY_RULES=rules):
+                AppointmentQueue.objects.update(priority_score=-1)
+
+                self.assertEqual(rescore_queue(), len(self.entries))
+
+                python = PriorityRules(rules)
+                self.assertEqual(
+                    self._scores(),
+                    {patient.pk: python.score(patient) for patient in self.patients},
+                )
+
+    def test_admin_overrides_are_left_alone(self):
+        pinned = self.entries[0]
+        AppointmentQueue.objects.filter(pk=pinned.pk).update(
+            priority_score=999, admin_override=True
+        )
+
+        self.assertEqual(rescore_queue(), len(self.entries) - 1)
+        self.assertEqual(self._scores()[pinned.patient_id], 999)
+
+    def test_rescore_is_limited_to_the_given_patients(self):
+        AppointmentQueue.objects.update(priority_score=-1)
+        patient = self.patients[-1]
+
+        self.assertEqual(rescore_queue([patient.pk]), 1)
+
+        scores = self._scores()
+        self.assertEqual(scores.pop(patient.pk), get_priority_rules().score(patient))
+        self.assertEqual(set(scores.values()), {-1})
+
+    def test_age_change_rescores_the_patients_queue_entries(self):
+        patient = User.objects.get(pk=self.patients[1].pk)
+        patient.age = 70
+        patient.save()
+
+        self.assertEqual(self._scores()[patient.pk], get_priority_rules().score(patient))
+
+    def test_unknown_lookup_is_rejected(self):
+        with self.assertRaises(ImproperlyConfigured):
+            PriorityRules([{"when": {"age__range": (1, 2)}, "points": 1}])
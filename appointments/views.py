@@ -2,10 +2,9 @@ from rest_framework.views import APIView
 from django.shortcuts import redirect
 from django.contrib import messages
 from django.core.exceptions import ValidationError
-from django.db import transaction
 
 from .models import Appointment
-from .services import book_appointment, promote_from_queue
+from .services import book_appointment, cancel_appointment
 from accounts.permissions import IsPatient
 
 
@@ -37,27 +36,15 @@ class BookAppointmentView(APIView):
 class CancelAppointmentView(APIView):
     permission_classes = [IsPatient]
 
-    @transaction.atomic
     def post(self, request, appointment_id):
 
         try:
-            appointment = Appointment.objects.select_for_update().get(
-                id=appointment_id,
-                patient=request.user
-            )
+            # Cancels, promotes the next queued patient once, or frees the slot
+            cancel_appointment(appointment_id, patient=request.user)
         except Appointment.DoesNotExist:
             messages.error(request, "Appointment not found.")
             return redirect("/patient/dashboard/")
 
-        slot = appointment.slot
-
-        # Cancel current appointment
-        appointment.status = "CANCELLED"
-        appointment.save()
-
-        # Promote next patient from queue (if any)
-        promote_from_queue(slot)
-
         messages.success(request, "Appointment cancelled.")
 
         return redirect("/patient/dashboard/")
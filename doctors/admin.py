@@ -1,7 +1,8 @@
 from django.contrib import admin
 from django import forms
 from django.contrib.auth import get_user_model
-from .models import Doctor
+from .models import Doctor, ScheduleBlock, SlotGenerationRun, Specialization
+from .services import generate_slots
 
 User = get_user_model()
 
@@ -20,7 +21,13 @@ class DoctorCreationForm(forms.ModelForm):
 
     class Meta:
         model = Doctor
-        fields = ["specialization", "available_from", "available_to", "is_available"]
+        fields = [
+            "specialization",
+            "specializations",
+            "available_from",
+            "available_to",
+            "is_available",
+        ]
 
     def clean_email(self):
         email = self.cleaned_data["email"]
@@ -35,6 +42,34 @@ class DoctorCreationForm(forms.ModelForm):
         return phone
 
 
+# =====================================================
+# WEEKLY SCHEDULE INLINE
+# =====================================================
+class ScheduleBlockFormSet(forms.BaseInlineFormSet):
+
+    def clean(self):
+        super().clean()
+
+        blocks = [
+            form.instance
+            for form in self.forms
+            if form.cleaned_data
+            and not form.errors
+            and not form.cleaned_data.get("DELETE")
+        ]
+
+        for index, block in enumerate(blocks):
+            for other in blocks[index + 1:]:
+                if block.overlaps(other):
+                    raise forms.ValidationError(f"{block} overlaps {other}.")
+
+
+class ScheduleBlockInline(admin.TabularInline):
+    model = ScheduleBlock
+    formset = ScheduleBlockFormSet
+    extra = 0
+
+
 # =====================================================
 # DOCTOR ADMIN
 # =====================================================
@@ -42,6 +77,7 @@ class DoctorCreationForm(forms.ModelForm):
 class DoctorAdmin(admin.ModelAdmin):
 
     form = DoctorCreationForm
+    inlines = [ScheduleBlockInline]
 
     list_display = (
         "user",
@@ -51,6 +87,8 @@ class DoctorAdmin(admin.ModelAdmin):
         "is_available",
     )
 
+    filter_horizontal = ("specializations",)
+
     def save_model(self, request, obj, form, change):
 
         if not change:
@@ -65,5 +103,52 @@ class DoctorAdmin(admin.ModelAdmin):
 
         super().save_model(request, obj, form, change)
 
-        # 🔥 Auto-generate slots (no past slots)
-        obj.generate_slots_for_today()
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
+
+        # The M2M widget replaces the links → keep the primary one
+        form.instance.link_specialization()
+
+        # New doctor, hours or weekly template → regenerate now instead of
+        # waiting for the nightly run (free slots no longer scheduled go)
+        if (
+            not change
+            or {"available_from", "available_to"} & set(form.changed_data)
+            or any(formset.has_changed() for formset in formsets)
+        ):
+            generate_slots([form.instance], prune=True)
+
+
+# =====================================================
+# SPECIALIZATION CATALOG ADMIN
+# =====================================================
+@admin.register(Specialization)
+class SpecializationAdmin(admin.ModelAdmin):
+    list_display = ("name", "key", "aliases")
+    search_fields = ("key",)
+    readonly_fields = ("key",)
+
+
+# =====================================================
+# SLOT PREGENERATION RUNS
+# =====================================================
+@admin.register(SlotGenerationRun)
+class SlotGenerationRunAdmin(admin.ModelAdmin):
+    list_display = (
+        "run_date",
+        "trigger",
+        "status",
+        "doctors",
+        "slots_created",
+        "batches",
+        "elapsed_ms",
+        "slowest_batch_ms",
+        "started_at",
+    )
+    list_filter = ("status", "trigger")
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -3,3 +3,7 @@ from django.apps import AppConfig
 
 class DoctorsConfig(AppConfig):
     name = "doctors"
+
+    def ready(self):
+        # Registers the available-doctors cache invalidation receivers
+        from . import listing  # noqa: F401
@@ -0,0 +1,112 @@
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import Doctor, Specialization, normalize_specialization
+
+
+# ==========================================================
+# IN-MEMORY SPECIALIZATION CATALOG
+# ==========================================================
+class SpecializationCatalog:
+    """
+    Sorted (key, specialization id) pairs for every catalog name and
+    alias. A search term becomes a bisect over the keys ("cardio" →
+    Cardiology), so matching never touches the database. Terms that
+    start no key fall back to a substring scan ("logy" → Cardiology,
+    Neurology …), as the old icontains search matched.
+    """
+
+    def __init__(self, specializations):
+        entries = []
+
+        for specialization in specializations:
+            for key in {specialization.key} | specialization.alias_keys():
+                entries.append((key, specialization.id))
+
+        entries.sort()
+
+        self._keys = [key for key, _ in entries]
+        self._ids = [specialization_id for _, specialization_id in entries]
+        self.loaded_at = time.monotonic()
+
+    def match(self, query):
+        """
+        Ids of specializations whose name or alias starts with `query`,
+        or else contains it.
+        """
+
+        prefix = normalize_specialization(query)
+
+        if not prefix:
+            return set()
+
+        found = set()
+        index = bisect_left(self._keys, prefix)
+
+        while index < len(self._keys) and self._keys[index].startswith(prefix):
+            found.add(self._ids[index])
+            index += 1
+
+        if not found:
+            # Catalog keys number in the hundreds at most → a scan is cheap
+            found = {
+                specialization_id
+                for key, specialization_id in zip(self._keys, self._ids)
+                if prefix in key
+            }
+
+        return found
+
+    def doctor_filter(self, query):
+        """Doctor ids linked to a matching specialization, as a subquery."""
+
+        return Doctor.specializations.through.objects.filter(
+            specialization_id__in=self.match(query)
+        ).values("doctor_id")
+
+
+# ==========================================================
+# PROCESS-WIDE CATALOG
+# ==========================================================
+_catalog = None
+_catalog_lock = threading.Lock()
+
+
+def get_specialization_catalog():
+    """
+    The cached catalog. It is reloaded after SPECIALIZATION_CATALOG_TTL
+    seconds, or straight away in the process that changed the catalog.
+    """
+
+    global _catalog
+
+    catalog = _catalog
+
+    if catalog is None or time.monotonic() - catalog.loaded_at > settings.SPECIALIZATION_CATALOG_TTL:
+        with _catalog_lock:
+            if _catalog is catalog:
+                _catalog = SpecializationCatalog(
+                    Specialization.objects.only("id", "key", "aliases")
+                )
+            catalog = _catalog
+
+    return catalog
+
+
+@receiver(post_save, sender=Specialization)
+@receiver(post_delete, sender=Specialization)
+def invalidate_catalog(**kwargs):
+    global _catalog
+    _catalog = None
+
+
+@receiver(setting_changed)
+def _reset_catalog(setting, **kwargs):
+    if setting == "SPECIALIZATION_CATALOG_TTL":
+        invalidate_catalog()
@@ -0,0 +1,170 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.availability import doctors_with_free_slots_today
+from hospital_system.caching import is_shared_cache
+from .catalog import get_specialization_catalog
+from .models import Doctor
+
+
+VERSION_KEY = "available-doctors:version"
+
+
+# ==========================================================
+# PRE-SERIALIZED "AVAILABLE TODAY" LIST
+# ==========================================================
+# One cache entry per day holding plain dicts for every available doctor
+# (name, hours, specialization ids). It is stored with the version it was
+# built under; every doctor change bumps the version, so a rebuild racing
+# an invalidation is discarded. Free-slot bitmaps change with every
+# booking and are read per request instead, so bookings never invalidate
+# the list.
+def _cache():
+    return caches[settings.AVAILABLE_DOCTORS_CACHE]
+
+
+def _entry_key(day):
+    return f"available-doctors:{day.isoformat()}"
+
+
+def _current_version(cache, found):
+    version = found.get(VERSION_KEY)
+
+    if version is None:
+        # Never reuses a value an evicted counter once had
+        version = time.time_ns()
+        if not cache.add(VERSION_KEY, version, None):
+            version = cache.get(VERSION_KEY, version)
+
+    return version
+
+
+def _build(day):
+    doctors = list(
+        Doctor.objects.filter(
+            is_available=True,
+            last_active_date=day,
+        ).order_by("id").values(
+            "id", "user__username", "specialization", "available_from", "available_to"
+        )
+    )
+
+    ids = [doctor["id"] for doctor in doctors]
+    specializations = {doctor_id: [] for doctor_id in ids}
+
+    for doctor_id, specialization_id in Doctor.specializations.through.objects.filter(
+        doctor_id__in=ids
+    ).values_list("doctor_id", "specialization_id"):
+        specializations[doctor_id].append(specialization_id)
+
+    return [
+        {
+            "id": doctor["id"],
+            "username": doctor["user__username"],
+            "specialization": doctor["specialization"],
+            "available_from": doctor["available_from"],
+            "available_to": doctor["available_to"],
+            "specialization_ids": specializations[doctor["id"]],
+        }
+        for doctor in doctors
+    ]
+
+
+def available_doctors(day):
+    """Serialized doctors available on `day`: one cache read on a hit."""
+
+    # Invalidations made by other processes never reach a per-process
+    # cache → only cache when every process shares it
+    if not is_shared_cache(settings.AVAILABLE_DOCTORS_CACHE):
+        return _build(day)
+
+    cache = _cache()
+    key = _entry_key(day)
+
+    found = cache.get_many([key, VERSION_KEY])
+    version = _current_version(cache, found)
+
+    entry = found.get(key)
+    if entry and entry[0] == version:
+        return entry[1]
+
+    doctors = _build(day)
+    cache.set(key, (version, doctors), settings.AVAILABLE_DOCTORS_CACHE_TIMEOUT)
+
+    return doctors
+
+
+def doctors_for_dashboard(search_query=None, now=None):
+    """
+    Today's available doctors for the patient dashboard, narrowed by a
+    specialization search and flagged with `has_free_slots_today`.
+    """
+
+    now = now or timezone.localtime()
+    doctors = available_doctors(now.date())
+
+    if search_query:
+        matches = get_specialization_catalog().match(search_query)
+        doctors = [
+            doctor for doctor in doctors
+            if matches.intersection(doctor["specialization_ids"])
+        ]
+
+    # Live bitmaps: one query on the (doctor, date) unique index
+    free = doctors_with_free_slots_today(
+        [doctor["id"] for doctor in doctors], now
+    ) if doctors else set()
+
+    return [
+        dict(doctor, has_free_slots_today=doctor["id"] in free)
+        for doctor in doctors
+    ]
+
+
+# ==========================================================
+# INVALIDATION
+# ==========================================================
+def _bump():
+    cache = _cache()
+
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        cache.set(VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_available_doctors():
+    """Drop the cached lists once the current transaction commits."""
+    transaction.on_commit(_bump)
+
+
+@receiver(post_save, sender=Doctor)
+@receiver(post_delete, sender=Doctor)
+def _doctor_changed(sender, instance, **kwargs):
+    # Login, toggle, logout and mark_* all go through Doctor.save()
+    invalidate_available_doctors()
+
+
+@receiver(m2m_changed, sender=Doctor.specializations.through)
+def _specializations_changed(sender, action, **kwargs):
+    if action in ("post_add", "post_remove", "post_clear"):
+        invalidate_available_doctors()
+
+
+@receiver(post_save, sender=User)
+def _doctor_user_changed(sender, instance, update_fields=None, **kwargs):
+    # Username is shown in the list; logins only touch last_login
+    if instance.role != "DOCTOR":
+        return
+
+    if update_fields is not None and "username" not in update_fields:
+        return
+
+    invalidate_available_doctors()
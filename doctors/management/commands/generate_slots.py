@@ -0,0 +1,48 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from doctors.models import Doctor
+from doctors.services import generate_slots
+
+
+class Command(BaseCommand):
+    help = "Pre-generate time slots from the weekly schedules of one or all doctors."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Number of days to generate, starting today "
+                 "(default: SLOT_GENERATION_DAYS).",
+        )
+        parser.add_argument(
+            "--doctor",
+            type=int,
+            default=None,
+            help="Only generate slots for this doctor id.",
+        )
+        parser.add_argument(
+            "--prune",
+            action="store_true",
+            help="Also delete upcoming free slots the schedule no longer has.",
+        )
+
+    def handle(self, *args, **options):
+
+        days = options["days"]
+        if days is not None and days < 1:
+            raise CommandError("--days must be at least 1.")
+
+        doctors = None
+
+        if options["doctor"]:
+            doctors = Doctor.objects.filter(id=options["doctor"])
+            if not doctors.exists():
+                raise CommandError(f"Doctor {options['doctor']} does not exist.")
+
+        result = generate_slots(doctors=doctors, days=days, prune=options["prune"])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {result.created} and deleted {result.deleted} slots for "
+            f"{result.doctors} doctor(s) in {result.elapsed_ms} ms."
+        ))
@@ -0,0 +1,60 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+
+from doctors.scheduler import get_slot_scheduler, run_pregeneration
+
+
+class Command(BaseCommand):
+    help = (
+        "Pregenerate slots for all doctors once (for cron), or keep a "
+        "daily in-process scheduler running with --loop."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Run every day at SLOT_PREGENERATION_TIME instead of once.",
+        )
+        parser.add_argument(
+            "--days",
+            type=int,
+            default=None,
+            help="Days to generate, starting today (default: SLOT_GENERATION_DAYS).",
+        )
+        parser.add_argument(
+            "--force",
+            action="store_true",
+            help="Run even if today's pregeneration already succeeded.",
+        )
+
+    def handle(self, *args, **options):
+
+        days = options["days"]
+        if days is not None and days < 1:
+            raise CommandError("--days must be at least 1.")
+
+        if options["loop"]:
+            scheduler = get_slot_scheduler()
+            scheduler.start()
+
+            self.stdout.write(f"Pregenerating slots daily at {scheduler.at:%H:%M}.")
+
+            try:
+                threading.Event().wait()
+            except KeyboardInterrupt:
+                scheduler.stop()
+            return
+
+        run = run_pregeneration("CRON", days=days, force=options["force"])
+
+        if run is None:
+            self.stdout.write("Today's slots are already pregenerated (or in progress).")
+            return
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {run.slots_created} slots for {run.doctors} doctor(s) "
+            f"in {run.elapsed_ms} ms ({run.batches} batches, "
+            f"slowest {run.slowest_batch_ms} ms)."
+        ))
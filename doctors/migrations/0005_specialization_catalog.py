@@ -0,0 +1,89 @@
+# Generated by Django 6.0.2 on 2026-10-18 03:21
+
+import re
+import unicodedata
+
+from django.db import migrations, models
+
+
+def _normalize(text):
+    # Mirrors doctors.models.normalize_specialization
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+def backfill_catalog(apps, schema_editor):
+    Doctor = apps.get_model("doctors", "Doctor")
+    Specialization = apps.get_model("doctors", "Specialization")
+    Link = Doctor.specializations.through
+
+    # First spelling seen names the entry ("Cardiology", "cardiology " → one)
+    names = {}
+    doctor_keys = []
+
+    for doctor_id, text in Doctor.objects.values_list("id", "specialization"):
+        key = _normalize(text)
+        if key:
+            names.setdefault(key, text.strip())
+            doctor_keys.append((doctor_id, key))
+
+    Specialization.objects.bulk_create(
+        [Specialization(name=name, key=key) for key, name in names.items()],
+        batch_size=1000,
+    )
+
+    ids = dict(Specialization.objects.values_list("key", "id"))
+
+    Link.objects.bulk_create(
+        [
+            Link(doctor_id=doctor_id, specialization_id=ids[key])
+            for doctor_id, key in doctor_keys
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0004_remove_doctor_email"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Specialization",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("name", models.CharField(max_length=100)),
+                ("key", models.CharField(editable=False, max_length=100, unique=True)),
+                (
+                    "aliases",
+                    models.CharField(
+                        blank=True,
+                        help_text='Comma-separated synonyms, e.g. "heart, cardiac"',
+                        max_length=255,
+                    ),
+                ),
+            ],
+            options={
+                "ordering": ["name"],
+            },
+        ),
+        migrations.AddField(
+            model_name="doctor",
+            name="specializations",
+            field=models.ManyToManyField(
+                blank=True, related_name="doctors", to="doctors.specialization"
+            ),
+        ),
+        migrations.RunPython(backfill_catalog, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 6.0.2 on 2026-10-18 12:30
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("doctors", "0005_specialization_catalog"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SlotGenerationRun",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("run_date", models.DateField(db_index=True)),
+                (
+                    "trigger",
+                    models.CharField(
+                        choices=[
+                            ("CRON", "Cron"),
+                            ("SCHEDULER", "Scheduler"),
+                            ("FORCED", "Forced"),
+                        ],
+                        max_length=10,
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("RUNNING", "Running"),
+                            ("SUCCESS", "Success"),
+                            ("FAILED", "Failed"),
+                        ],
+                        default="RUNNING",
+                        max_length=10,
+                    ),
+                ),
+                ("days", models.PositiveSmallIntegerField()),
+                ("doctors", models.PositiveIntegerField(default=0)),
+                ("slots_created", models.PositiveIntegerField(default=0)),
+                ("batches", models.PositiveIntegerField(default=0)),
+                ("elapsed_ms", models.FloatField(blank=True, null=True)),
+                ("slowest_batch_ms", models.FloatField(blank=True, null=True)),
+                ("error", models.TextField(blank=True)),
+                ("started_at", models.DateTimeField(auto_now_add=True)),
+                ("finished_at", models.DateTimeField(blank=True, null=True)),
+            ],
+            options={
+                "ordering": ["-started_at"],
+                "constraints": [
+                    models.UniqueConstraint(
+                        condition=models.Q(
+                            ("status__in", ["RUNNING", "SUCCESS"]),
+                            models.Q(("trigger", "FORCED"), _negated=True),
+                        ),
+                        fields=("run_date",),
+                        name="one_slot_run_per_day",
+                    ),
+                ],
+            },
+        ),
+    ]
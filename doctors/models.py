@@ -1,13 +1,68 @@
+import re
+import unicodedata
+
+from django.core.exceptions import ValidationError
+from django.core.validators import MaxValueValidator, MinValueValidator
 from django.db import models
 from django.utils import timezone
-from datetime import datetime, timedelta
 from accounts.models import User
 
 
+def normalize_specialization(text):
+    """
+    Catalog key for a specialization name, e.g. "Cardio-logy " → "cardiology":
+    accents, case, spaces and punctuation are dropped.
+    """
+    text = unicodedata.normalize("NFKD", text or "")
+    text = text.encode("ascii", "ignore").decode()
+    return re.sub(r"[^a-z0-9]", "", text.lower())
+
+
+# =====================================================
+# SPECIALIZATION CATALOG
+# =====================================================
+class Specialization(models.Model):
+    name = models.CharField(max_length=100)
+
+    # Normalized name; unique B-tree index → prefix range lookups
+    key = models.CharField(max_length=100, unique=True, editable=False)
+
+    aliases = models.CharField(
+        max_length=255,
+        blank=True,
+        help_text="Comma-separated synonyms, e.g. \"heart, cardiac\"",
+    )
+
+    class Meta:
+        ordering = ["name"]
+
+    def alias_keys(self):
+        return {
+            normalize_specialization(alias)
+            for alias in self.aliases.split(",")
+            if normalize_specialization(alias)
+        }
+
+    def save(self, *args, **kwargs):
+        self.key = normalize_specialization(self.name)
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return self.name
+
+
 class Doctor(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     specialization = models.CharField(max_length=100)
 
+    # Catalog entries used for search; the primary `specialization` text
+    # is always linked (see save())
+    specializations = models.ManyToManyField(
+        Specialization,
+        related_name="doctors",
+        blank=True,
+    )
+
     available_from = models.TimeField()
     available_to = models.TimeField()
 
@@ -15,41 +70,50 @@ class Doctor(models.Model):
     is_available = models.BooleanField(default=False)
     last_active_date = models.DateField(null=True, blank=True)
 
-    # =====================================================
-    # AUTO SLOT GENERATOR (NO PAST SLOTS)
-    # =====================================================
-    def generate_slots_for_today(self):
-        from appointments.models import TimeSlot  # avoid circular import
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
 
-        now = timezone.localtime()
-        today = now.date()
+        # Remember the stored text so save() only re-links on change
+        instance._loaded_specialization = instance.__dict__.get("specialization")
+        return instance
 
-        start_dt = datetime.combine(today, self.available_from)
-        end_dt = datetime.combine(today, self.available_to)
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
 
-        start_dt = timezone.make_aware(start_dt)
-        end_dt = timezone.make_aware(end_dt)
+        loaded = getattr(self, "_loaded_specialization", None)
 
-        # If current time passed available_from → start from current rounded time
-        if now > start_dt:
-            minute_block = (now.minute // 30 + 1) * 30
-            rounded = now.replace(minute=0, second=0, microsecond=0)
+        if self.specialization != loaded:
+            self.link_specialization(previous=loaded)
+            self._loaded_specialization = self.specialization
 
-            if minute_block == 60:
-                rounded += timedelta(hours=1)
-            else:
-                rounded += timedelta(minutes=minute_block)
+    def link_specialization(self, previous=None):
+        """Link the catalog entry for `specialization`, replacing `previous`'s."""
 
-            start_dt = rounded
+        key = normalize_specialization(self.specialization)
 
-        # Generate 30-minute slots
-        while start_dt < end_dt:
-            TimeSlot.objects.get_or_create(
-                doctor=self,
-                date=today,
-                start_time=start_dt.time()
+        if not key:
+            return
+
+        entry, _ = Specialization.objects.get_or_create(
+            key=key,
+            defaults={"name": self.specialization.strip()},
+        )
+
+        if previous is not None and normalize_specialization(previous) != key:
+            self.specializations.remove(
+                *Specialization.objects.filter(key=normalize_specialization(previous))
             )
-            start_dt += timedelta(minutes=30)
+
+        self.specializations.add(entry)
+
+    # =====================================================
+    # AUTO SLOT GENERATOR (NO PAST SLOTS)
+    # =====================================================
+    def generate_slots_for_today(self):
+        from .services import generate_slots  # avoid circular import
+
+        return generate_slots([self], days=1)
 
     # =====================================================
     # AVAILABILITY HELPERS
@@ -72,3 +136,126 @@ class Doctor(models.Model):
 
     def __str__(self):
         return f"{self.user.username} ({self.specialization})"
+
+
+# =====================================================
+# WEEKLY SCHEDULE TEMPLATE
+# =====================================================
+class ScheduleBlock(models.Model):
+    """
+    One working block of a doctor's week, e.g. Monday 09:00-13:00 in
+    15-minute slots. Gaps between blocks are breaks; `break_minutes`
+    adds a pause after every slot inside the block.
+
+    A doctor without blocks works available_from → available_to every
+    day in 30-minute slots.
+    """
+
+    WEEKDAY_CHOICES = (
+        (0, "Monday"),
+        (1, "Tuesday"),
+        (2, "Wednesday"),
+        (3, "Thursday"),
+        (4, "Friday"),
+        (5, "Saturday"),
+        (6, "Sunday"),
+    )
+
+    doctor = models.ForeignKey(
+        Doctor,
+        on_delete=models.CASCADE,
+        related_name="schedule_blocks",
+    )
+
+    weekday = models.PositiveSmallIntegerField(choices=WEEKDAY_CHOICES)
+    start_time = models.TimeField()
+    end_time = models.TimeField()
+
+    slot_minutes = models.PositiveSmallIntegerField(
+        default=30,
+        validators=[MinValueValidator(5), MaxValueValidator(240)],
+    )
+    break_minutes = models.PositiveSmallIntegerField(
+        default=0,
+        validators=[MaxValueValidator(240)],
+        help_text="Pause after every slot",
+    )
+
+    class Meta:
+        ordering = ["weekday", "start_time"]
+
+    def clean(self):
+        if self.start_time is None or self.end_time is None or not self.slot_minutes:
+            return
+
+        start = self.start_time.hour * 60 + self.start_time.minute
+        end = self.end_time.hour * 60 + self.end_time.minute
+
+        if end - start < self.slot_minutes:
+            raise ValidationError("The block must end after its start and fit at least one slot.")
+
+    def overlaps(self, other):
+        return (
+            self.weekday == other.weekday
+            and self.start_time < other.end_time
+            and other.start_time < self.end_time
+        )
+
+    def __str__(self):
+        return (
+            f"{self.get_weekday_display()} {self.start_time:%H:%M}-{self.end_time:%H:%M} "
+            f"({self.slot_minutes} min)"
+        )
+
+
+# =====================================================
+# SLOT PREGENERATION RUNS (METRICS)
+# =====================================================
+class SlotGenerationRun(models.Model):
+
+    TRIGGER_CHOICES = (
+        ("CRON", "Cron"),
+        ("SCHEDULER", "Scheduler"),
+        ("FORCED", "Forced"),
+    )
+
+    STATUS_CHOICES = (
+        ("RUNNING", "Running"),
+        ("SUCCESS", "Success"),
+        ("FAILED", "Failed"),
+    )
+
+    # Day the run pregenerated from (one running or successful run per
+    # day, enforced by the database across processes)
+    run_date = models.DateField(db_index=True)
+    trigger = models.CharField(max_length=10, choices=TRIGGER_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="RUNNING")
+
+    days = models.PositiveSmallIntegerField()
+    doctors = models.PositiveIntegerField(default=0)
+    slots_created = models.PositiveIntegerField(default=0)
+    batches = models.PositiveIntegerField(default=0)
+
+    elapsed_ms = models.FloatField(null=True, blank=True)
+    slowest_batch_ms = models.FloatField(null=True, blank=True)
+
+    error = models.TextField(blank=True)
+
+    started_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["-started_at"]
+        constraints = [
+            # The insert of the RUNNING row is the cross-process lock;
+            # forced re-runs are exempt
+            models.UniqueConstraint(
+                fields=["run_date"],
+                condition=models.Q(status__in=["RUNNING", "SUCCESS"])
+                & ~models.Q(trigger="FORCED"),
+                name="one_slot_run_per_day",
+            ),
+        ]
+
+    def __str__(self):
+        return f"Slot run {self.run_date} ({self.trigger}, {self.status})"
@@ -0,0 +1,58 @@
+import base64
+import binascii
+from datetime import date, time
+
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+# =========================================
+# KEYSET CURSOR OVER (date, start_time)
+# =========================================
+def encode_cursor(day, start_time):
+    raw = f"{day.isoformat()}|{start_time.isoformat()}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        day, start_time = raw.split("|")
+        return date.fromisoformat(day), time.fromisoformat(start_time)
+    except (binascii.Error, UnicodeError, ValueError):
+        raise ValidationError({"cursor": "Invalid cursor."})
+
+
+def after(day, start_time, prefix=""):
+    """Rows strictly after (day, start_time) in (date, start_time) order."""
+    return Q(**{f"{prefix}date__gt": day}) | Q(
+        **{f"{prefix}date": day, f"{prefix}start_time__gt": start_time}
+    )
+
+
+def day_from(request, name, default=None):
+    """ISO date query parameter `name`, or `default` when absent."""
+
+    value = request.query_params.get(name)
+
+    if not value:
+        return default
+
+    try:
+        return date.fromisoformat(value)
+    except ValueError:
+        raise ValidationError({name: "Use YYYY-MM-DD."})
+
+
+def page_size_from(request):
+    try:
+        size = int(request.query_params.get("page_size", DEFAULT_PAGE_SIZE))
+    except ValueError:
+        raise ValidationError({"page_size": "Must be an integer."})
+
+    return max(1, min(size, MAX_PAGE_SIZE))
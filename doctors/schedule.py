@@ -0,0 +1,127 @@
+from bisect import bisect_right
+from datetime import time
+
+from .models import ScheduleBlock
+
+
+DAY_MINUTES = 24 * 60
+
+# Doctors without a weekly template: available_from → available_to daily
+DEFAULT_SLOT_MINUTES = 30
+
+# time objects for every minute of the day, built once
+TIMES = tuple(time(minute // 60, minute % 60) for minute in range(DAY_MINUTES))
+
+
+# ==========================================================
+# OFFSETS (MINUTES FROM MIDNIGHT)
+# ==========================================================
+def _minutes(value):
+    return value.hour * 60 + value.minute
+
+
+def block_offsets(start, end, slot_minutes, break_minutes=0):
+    """Start minute of every slot that fits entirely in [start, end)."""
+    return range(_minutes(start), _minutes(end) - slot_minutes + 1, slot_minutes + break_minutes)
+
+
+def default_offsets(doctor):
+    # Same grid the 30-minute generator always produced
+    return range(
+        _minutes(doctor.available_from),
+        _minutes(doctor.available_to),
+        DEFAULT_SLOT_MINUTES,
+    )
+
+
+# ==========================================================
+# WEEKLY TEMPLATES
+# ==========================================================
+class WeeklyTemplate:
+    """
+    Sorted slot start minutes for each weekday (Monday = 0), computed
+    once per doctor; expanding a date is then a lookup by weekday.
+    """
+
+    def __init__(self, week):
+        self.week = tuple(tuple(sorted(set(offsets))) for offsets in week)
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        week = [[] for _ in range(7)]
+
+        for block in blocks:
+            week[block.weekday].extend(block_offsets(
+                block.start_time, block.end_time, block.slot_minutes, block.break_minutes
+            ))
+
+        return cls(week)
+
+    @classmethod
+    def default(cls, doctor):
+        return cls([default_offsets(doctor)] * 7)
+
+    def offsets(self, day, after=None):
+        """Start minutes on `day`; only those later than minute `after`."""
+
+        offsets = self.week[day.weekday()]
+
+        if after is not None:
+            offsets = offsets[bisect_right(offsets, after):]
+
+        return offsets
+
+
+def load_templates(doctors):
+    """{doctor_id: WeeklyTemplate} for `doctors` in one query."""
+
+    blocks = {}
+
+    for block in ScheduleBlock.objects.filter(
+        doctor_id__in=[doctor.id for doctor in doctors]
+    ).only("doctor_id", "weekday", "start_time", "end_time", "slot_minutes", "break_minutes"):
+        blocks.setdefault(block.doctor_id, []).append(block)
+
+    return {
+        doctor.id: (
+            WeeklyTemplate.from_blocks(blocks[doctor.id])
+            if doctor.id in blocks
+            else WeeklyTemplate.default(doctor)
+        )
+        for doctor in doctors
+    }
+
+
+# ==========================================================
+# EXPANSION
+# ==========================================================
+def expand(templates, dates, now):
+    """
+    Every (doctor_id, date, start_time) the templates schedule on `dates`.
+    Past dates, and slots on `now`'s date that already started, are left
+    out.
+    """
+
+    today = now.date()
+    cutoff = _minutes(now)
+
+    # Offset → time conversion happens once per distinct weekday pattern
+    converted = {}
+    slots = set()
+
+    for doctor_id, template in templates.items():
+        for day in dates:
+            if day < today:
+                continue
+
+            if day == today:
+                offsets = template.offsets(day, after=cutoff)
+            else:
+                offsets = template.offsets(day)
+
+            if offsets not in converted:
+                converted[offsets] = [TIMES[offset] for offset in offsets]
+
+            slots.update((doctor_id, day, start_time) for start_time in converted[offsets])
+
+    return slots
@@ -0,0 +1,174 @@
+import logging
+import threading
+from datetime import time, timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from hospital_system.periodic import PeriodicRunner
+from .models import SlotGenerationRun
+from .services import generate_slots
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+# ONE PREGENERATION RUN
+# ==========================================================
+def has_run(day):
+    return SlotGenerationRun.objects.filter(run_date=day, status="SUCCESS").exists()
+
+
+def _claim(day, trigger, days):
+    """
+    Insert the day's RUNNING row. The partial unique constraint makes
+    this the lock: a second process (cron or scheduler) gets an
+    IntegrityError while a run is in progress or after one succeeded.
+    """
+
+    # A run whose process died never finishes → stop it blocking the day
+    SlotGenerationRun.objects.filter(
+        run_date=day,
+        status="RUNNING",
+        started_at__lt=timezone.now() - timedelta(seconds=settings.SLOT_PREGENERATION_LOCK_SECONDS),
+    ).update(status="FAILED", error="Abandoned", finished_at=timezone.now())
+
+    try:
+        with transaction.atomic():
+            return SlotGenerationRun.objects.create(run_date=day, trigger=trigger, days=days)
+    except IntegrityError:
+        return None
+
+
+def run_pregeneration(trigger, days=None, force=False):
+    """
+    Pregenerate SLOT_GENERATION_DAYS of slots for every doctor and record
+    the run. Returns the SlotGenerationRun, or None when today's run is
+    in progress elsewhere or already succeeded (unless `force`).
+
+    Generation itself only inserts missing slots, so even a forced or
+    repeated run never duplicates anything.
+    """
+
+    today = timezone.localdate()
+    days = days or settings.SLOT_GENERATION_DAYS
+
+    if force:
+        run = SlotGenerationRun.objects.create(run_date=today, trigger="FORCED", days=days)
+    else:
+        run = _claim(today, trigger, days)
+
+    if run is None:
+        return None
+
+    try:
+        result = generate_slots(days=run.days, start_date=today)
+    except Exception as exc:
+        run.status = "FAILED"
+        run.error = repr(exc)
+        run.finished_at = timezone.now()
+        run.save(update_fields=["status", "error", "finished_at"])
+        raise
+
+    run.status = "SUCCESS"
+    run.doctors = result.doctors
+    run.slots_created = result.created
+    run.batches = result.batches
+    run.elapsed_ms = result.elapsed_ms
+    run.slowest_batch_ms = result.slowest_batch_ms
+    run.finished_at = timezone.now()
+    run.save()
+
+    logger.info(
+        "Pregenerated %s slots for %s doctor(s) in %s ms",
+        result.created, result.doctors, result.elapsed_ms,
+    )
+
+    return run
+
+
+def retry_due(day, now=None):
+    """
+    False while the backoff after the day's last failure runs:
+    SLOT_PREGENERATION_RETRY_SECONDS, doubled per failure that day.
+    """
+
+    now = now or timezone.now()
+    failures = SlotGenerationRun.objects.filter(run_date=day, status="FAILED")
+
+    last = failures.order_by("-finished_at").values_list("finished_at", flat=True).first()
+
+    if last is None:
+        return True
+
+    delay = min(
+        settings.SLOT_PREGENERATION_RETRY_SECONDS * 2 ** (failures.count() - 1),
+        settings.SLOT_PREGENERATION_RETRY_MAX_SECONDS,
+    )
+
+    return now - last >= timedelta(seconds=delay)
+
+
+# ==========================================================
+# IN-PROCESS DAILY SCHEDULER
+# ==========================================================
+def scheduled_time():
+    try:
+        return time.fromisoformat(settings.SLOT_PREGENERATION_TIME)
+    except ValueError:
+        raise ImproperlyConfigured(
+            f"SLOT_PREGENERATION_TIME must be HH:MM, got {settings.SLOT_PREGENERATION_TIME!r}"
+        )
+
+
+class SlotPregenerationScheduler:
+    """
+    Checks every SLOT_PREGENERATION_CHECK_INTERVAL seconds whether today's
+    run is due (local time past SLOT_PREGENERATION_TIME) and still
+    missing. A process started after the scheduled time catches up on
+    its first check.
+    """
+
+    def __init__(self, interval=None):
+        self.at = scheduled_time()
+        self._runner = PeriodicRunner(
+            interval or settings.SLOT_PREGENERATION_CHECK_INTERVAL,
+            self.tick,
+            name="slot-pregeneration",
+        )
+
+    def tick(self, now=None):
+        now = now or timezone.localtime()
+
+        if now.time() < self.at:
+            return None
+
+        # Done today, or backing off after a failure → no query storm
+        if has_run(now.date()) or not retry_due(now.date(), now):
+            return None
+
+        return run_pregeneration("SCHEDULER")
+
+    def start(self):
+        self._runner.start()
+
+    def stop(self, timeout=None):
+        self._runner.stop(timeout)
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_slot_scheduler():
+    global _scheduler
+
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = SlotPregenerationScheduler()
+
+    return _scheduler
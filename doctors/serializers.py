@@ -10,7 +10,9 @@ class DoctorSlotSerializer(serializers.ModelSerializer):
 
 class DoctorAppointmentSerializer(serializers.ModelSerializer):
     patient_name = serializers.CharField(source="patient.username", read_only=True)
+    date = serializers.DateField(source="slot.date", read_only=True)
+    start_time = serializers.TimeField(source="slot.start_time", read_only=True)
 
     class Meta:
         model = Appointment
-        fields = ["id", "patient_name", "slot", "status"]
+        fields = ["id", "patient_name", "slot", "date", "start_time", "status"]
@@ -0,0 +1,175 @@
+import time
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from appointments.availability import rebuild as rebuild_availability
+from appointments.models import TimeSlot
+from .models import Doctor
+from .schedule import expand, load_templates
+
+
+DOCTOR_BATCH_SIZE = 100
+DELETE_CHUNK_SIZE = 1000
+
+
+# =========================================
+# RESULT OBJECT
+# =========================================
+@dataclass
+class SlotGenerationResult:
+    doctors: int = 0
+    created: int = 0
+    deleted: int = 0
+    batches: int = 0
+    elapsed: float = 0.0
+    slowest_batch: float = 0.0
+
+    @property
+    def elapsed_ms(self):
+        return round(self.elapsed * 1000, 2)
+
+    @property
+    def slowest_batch_ms(self):
+        return round(self.slowest_batch * 1000, 2)
+
+    def add_batch(self, doctors, created, deleted, elapsed):
+        self.doctors += doctors
+        self.created += created
+        self.deleted += deleted
+        self.batches += 1
+        self.slowest_batch = max(self.slowest_batch, elapsed)
+
+
+# =========================================
+# SLOT TIMES FOR ONE DOCTOR / ONE DAY
+# =========================================
+def slot_start_times(doctor, day, now=None):
+
+    now = now or timezone.localtime()
+
+    return sorted(
+        start_time
+        for _, _, start_time in expand(load_templates([doctor]), [day], now)
+    )
+
+
+# =========================================
+# BULK MULTI-DAY SLOT GENERATION
+# =========================================
+def generate_slots(doctors=None, days=None, start_date=None, prune=False):
+    """
+    Expand each doctor's weekly template for `days` days starting at
+    `start_date` (default today) for the given doctors (default: all
+    doctors).
+
+    Templates are loaded and expanded once per doctor batch, diffed
+    against the batch's existing slots in memory and only the missing
+    ones are inserted; `ignore_conflicts` covers concurrent generators
+    racing on the (doctor, date, start_time) unique constraint.
+
+    With `prune`, upcoming free slots the template no longer schedules
+    are deleted (slots that are booked, queued for or referenced by an
+    appointment are always kept).
+    """
+
+    started = time.perf_counter()
+
+    if doctors is None:
+        doctors = Doctor.objects.only("id", "available_from", "available_to")
+
+    days = days or settings.SLOT_GENERATION_DAYS
+    now = timezone.localtime()
+    start_date = start_date or now.date()
+    end_date = start_date + timedelta(days=days - 1)
+    dates = [start_date + timedelta(days=offset) for offset in range(days)]
+
+    result = SlotGenerationResult()
+    batch = []
+
+    for doctor in doctors:
+        batch.append(doctor)
+
+        if len(batch) >= DOCTOR_BATCH_SIZE:
+            _run_batch(result, batch, dates, end_date, now, prune)
+            batch = []
+
+    if batch:
+        _run_batch(result, batch, dates, end_date, now, prune)
+
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+def _run_batch(result, doctors, dates, end_date, now, prune):
+    started = time.perf_counter()
+    created, deleted = _generate_for_batch(doctors, dates, end_date, now, prune)
+    result.add_batch(len(doctors), created, deleted, time.perf_counter() - started)
+
+
+def _generate_for_batch(doctors, dates, end_date, now, prune):
+
+    expected = expand(load_templates(doctors), dates, now)
+
+    existing = {
+        (doctor_id, day, start_time): (slot_id, is_booked)
+        for slot_id, doctor_id, day, start_time, is_booked in TimeSlot.objects.filter(
+            doctor_id__in=[doctor.id for doctor in doctors],
+            date__range=(dates[0], end_date),
+        ).values_list("id", "doctor_id", "date", "start_time", "is_booked")
+    }
+
+    missing = [
+        TimeSlot(doctor_id=doctor_id, date=day, start_time=start_time)
+        for doctor_id, day, start_time in expected
+        if (doctor_id, day, start_time) not in existing
+    ]
+
+    TimeSlot.objects.bulk_create(
+        missing,
+        batch_size=1000,
+        ignore_conflicts=True,
+    )
+
+    deleted = 0
+
+    if prune:
+        deleted = _prune(existing, expected, now)
+
+    if missing or deleted:
+        rebuild_availability(
+            [doctor.id for doctor in doctors], dates[0], end_date
+        )
+
+    return len(missing), deleted
+
+
+def _prune(existing, expected, now):
+
+    today = now.date()
+    current = now.time()
+
+    stale = [
+        slot_id
+        for key, (slot_id, is_booked) in existing.items()
+        if not is_booked
+        and key not in expected
+        # Slots that already started stay as history
+        and (key[1] > today or (key[1] == today and key[2] > current))
+    ]
+
+    deleted = 0
+
+    for start in range(0, len(stale), DELETE_CHUNK_SIZE):
+        # Re-checked in SQL: a slot booked since the read is never lost
+        _, per_model = TimeSlot.objects.filter(
+            id__in=stale[start:start + DELETE_CHUNK_SIZE],
+            is_booked=False,
+            appointment__isnull=True,
+            waiting_queue__isnull=True,
+        ).delete()
+        deleted += per_model.get(TimeSlot._meta.label, 0)
+
+    return deleted
@@ -1,3 +1,432 @@
+from datetime import datetime, time, timedelta
+from unittest import mock
+
+from django.core.cache import caches
 from django.test import TestCase
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.availability import rebuild
+from appointments.models import Appointment, AppointmentQueue, DoctorDayAvailability, TimeSlot
+from hospital_system.testing import DoctorPatientTestData
+from .catalog import SpecializationCatalog
+from .listing import available_doctors, doctors_for_dashboard
+from .models import Doctor, ScheduleBlock, SlotGenerationRun, Specialization, normalize_specialization
+from .schedule import WeeklyTemplate, block_offsets, expand, load_templates
+from .scheduler import run_pregeneration
+from .services import generate_slots
+
+
+def next_weekday(weekday, after):
+    return after + timedelta(days=(weekday - after.weekday()) % 7 or 7)
+
+
+class DoctorTestData(DoctorPatientTestData):
+    # Slot counts below assume a 09:00–11:00 working day
+    doctor_specialization = "Dermatology"
+    doctor_hours = (time(9, 0), time(11, 0))
+
+
+class ScheduleExpansionTests(DoctorTestData, TestCase):
+
+    def setUp(self):
+        self.now = timezone.make_aware(datetime(2030, 1, 7, 10, 20))  # Monday
+        self.monday = self.now.date()
+
+    def test_block_offsets_fit_slots_and_breaks(self):
+        # 20-minute slots with a 10-minute pause; the last must end by 12:30
+        self.assertEqual(
+            list(block_offsets(time(11, 0), time(12, 30), 20, 10)),
+            [11 * 60, 11 * 60 + 30, 12 * 60],
+        )
+        self.assertEqual(list(block_offsets(time(9, 0), time(9, 10), 15)), [])
+
+    def test_doctor_without_blocks_keeps_daily_half_hours(self):
+        template = load_templates([self.doctor])[self.doctor.id]
+        tuesday = self.monday + timedelta(days=1)
+
+        slots = expand({self.doctor.id: template}, [tuesday], self.now)
+
+        self.assertEqual(
+            sorted(start for _, _, start in slots),
+            [time(9, 0), time(9, 30), time(10, 0), time(10, 30)],
+        )
+
+    def test_blocks_expand_per_weekday_and_skip_started_or_past_slots(self):
+        ScheduleBlock.objects.create(
+            doctor=self.doctor, weekday=0,
+            start_time=time(10, 0), end_time=time(11, 0), slot_minutes=15,
+        )
+        template = load_templates([self.doctor])[self.doctor.id]
+
+        slots = expand(
+            {self.doctor.id: template},
+            [self.monday - timedelta(days=7), self.monday, self.monday + timedelta(days=1)],
+            self.now,
+        )
+
+        # Past Monday skipped, Tuesday has no block, 10:00/10:15 started
+        self.assertEqual(
+            sorted(slots),
+            [
+                (self.doctor.id, self.monday, time(10, 30)),
+                (self.doctor.id, self.monday, time(10, 45)),
+            ],
+        )
+
+    def test_overlapping_offsets_are_deduplicated(self):
+        template = WeeklyTemplate([range(0, 60, 15), range(0, 60, 30)] + [()] * 5)
+
+        self.assertEqual(template.week[1], (0, 30))
+
+
+class GenerateSlotsTests(DoctorTestData, TestCase):
+
+    def setUp(self):
+        self.day = next_weekday(2, timezone.localdate())  # a future Wednesday
+        generate_slots([self.doctor], days=1, start_date=self.day)
+
+    def _times(self):
+        return sorted(
+            TimeSlot.objects.filter(doctor=self.doctor, date=self.day).values_list(
+                "start_time", flat=True
+            )
+        )
+
+    def test_generation_is_idempotent(self):
+        result = generate_slots([self.doctor], days=1, start_date=self.day)
+
+        self.assertEqual(result.created, 0)
+        self.assertEqual(len(self._times()), 4)
+
+    def test_prune_keeps_booked_queued_and_referenced_slots(self):
+        slots = {
+            slot.start_time: slot
+            for slot in TimeSlot.objects.filter(doctor=self.doctor, date=self.day)
+        }
+
+        # 09:00 booked, 09:30 has a waiting queue, 10:00 is referenced by
+        # a finished appointment whose slot flag was reset, 10:30 is free
+        Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, slot=slots[time(9, 0)]
+        )
+        AppointmentQueue.objects.create(
+            slot=slots[time(9, 30)], patient=self.patient, priority_score=0
+        )
+        Appointment.objects.create(
+            doctor=self.doctor, patient=self.patient, slot=slots[time(10, 0)],
+            status="COMPLETED",
+        )
+        TimeSlot.objects.filter(pk=slots[time(10, 0)].pk).update(is_booked=False)
+
+        # The template no longer schedules anything on Wednesdays
+        ScheduleBlock.objects.create(
+            doctor=self.doctor, weekday=0, start_time=time(9, 0), end_time=time(10, 0),
+        )
+
+        result = generate_slots([self.doctor], days=1, start_date=self.day, prune=True)
+
+        self.assertEqual(result.deleted, 1)
+        self.assertEqual(self._times(), [time(9, 0), time(9, 30), time(10, 0)])
+
+    def test_prune_clears_the_bitmap_of_emptied_days(self):
+        ScheduleBlock.objects.create(
+            doctor=self.doctor, weekday=0, start_time=time(9, 0), end_time=time(10, 0),
+        )
+
+        generate_slots([self.doctor], days=1, start_date=self.day, prune=True)
+
+        self.assertEqual(self._times(), [])
+        self.assertEqual(
+            DoctorDayAvailability.objects.get(doctor=self.doctor, date=self.day).free_mask,
+            0,
+        )
+
+
+class SpecializationCatalogTests(TestCase):
+
+    def setUp(self):
+        self.cardiology = Specialization(id=1, name="Cardiology", aliases="heart")
+        self.neurology = Specialization(id=2, name="Neurology")
+        self.cardiac_surgery = Specialization(id=3, name="Cardiac Surgery")
+
+        for specialization in (self.cardiology, self.neurology, self.cardiac_surgery):
+            specialization.key = normalize_specialization(specialization.name)
+
+        self.catalog = SpecializationCatalog(
+            [self.cardiology, self.neurology, self.cardiac_surgery]
+        )
+
+    def test_prefix_matches_names_and_aliases(self):
+        self.assertEqual(self.catalog.match("Cardi"), {1, 3})
+        self.assertEqual(self.catalog.match("hea"), {1})
+
+    def test_terms_starting_no_key_fall_back_to_substring(self):
+        self.assertEqual(self.catalog.match("logy"), {1, 2})
+        self.assertEqual(self.catalog.match("surg"), {3})
+
+    def test_blank_or_unknown_terms_match_nothing(self):
+        self.assertEqual(self.catalog.match(" - "), set())
+        self.assertEqual(self.catalog.match("ortho"), set())
+
+
+class AvailableDoctorsCacheTests(DoctorTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        cls.doctor.is_available = True
+        cls.doctor.last_active_date = timezone.localdate()
+        cls.doctor.save()
+
+    def setUp(self):
+        caches["default"].clear()
+        self.enterContext(mock.patch("doctors.listing.is_shared_cache", return_value=True))
+        self.today = timezone.localdate()
+
+    def _cached_list(self):
+        with self.assertNumQueries(0):
+            return available_doctors(self.today)
+
+    def _change(self, func):
+        # Invalidation runs once the change commits
+        with self.captureOnCommitCallbacks(execute=True):
+            func()
+
+    def test_second_read_is_served_from_the_cache(self):
+        built = available_doctors(self.today)
+
+        self.assertEqual(self._cached_list(), built)
+        self.assertEqual([doctor["username"] for doctor in built], ["doc"])
+
+    def test_doctor_changes_invalidate_the_list(self):
+        available_doctors(self.today)
+
+        self.doctor.available_to = time(12, 0)
+        self._change(self.doctor.save)
+
+        self.assertEqual(available_doctors(self.today)[0]["available_to"], time(12, 0))
+        self._cached_list()
+
+        self._change(lambda: Doctor.objects.get(pk=self.doctor.pk).delete())
+        self.assertEqual(available_doctors(self.today), [])
+
+    def test_specialization_and_username_changes_invalidate_the_list(self):
+        available_doctors(self.today)
+        oncology = Specialization.objects.create(name="Oncology", key="oncology")
+
+        self._change(lambda: self.doctor.specializations.add(oncology))
+        self.assertIn(oncology.id, available_doctors(self.today)[0]["specialization_ids"])
+
+        user = User.objects.get(pk=self.doctor.user_id)
+        user.username = "dr-doc"
+        self._change(user.save)
+        self.assertEqual(available_doctors(self.today)[0]["username"], "dr-doc")
+
+    def test_rolled_back_change_keeps_the_cached_list(self):
+        available_doctors(self.today)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.doctor.save()
+
+        self.assertTrue(callbacks)
+        self._cached_list()
+
+    def test_slot_changes_show_without_invalidating_the_list(self):
+        now = timezone.localtime().replace(hour=8, minute=0)
+        slot = TimeSlot.objects.create(doctor=self.doctor, date=self.today, start_time=time(9, 0))
+        rebuild([self.doctor.id], self.today, self.today)
+
+        self.assertTrue(doctors_for_dashboard(now=now)[0]["has_free_slots_today"])
+
+        TimeSlot.objects.filter(pk=slot.pk).update(is_booked=True)
+        rebuild([self.doctor.id], self.today, self.today)
+
+        # The list is still the cached one; the free flag is read live
+        self._cached_list()
+        self.assertFalse(doctors_for_dashboard(now=now)[0]["has_free_slots_today"])
+
+    def test_per_process_cache_is_bypassed(self):
+        with mock.patch("doctors.listing.is_shared_cache", return_value=False):
+            available_doctors(self.today)
+
+            with self.assertNumQueries(2):
+                available_doctors(self.today)
+
+
+class DoctorSlotListTests(DoctorTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        today = timezone.localdate()
+
+        # Yesterday is past; one booked slot among five upcoming ones
+        cls.slots = {
+            (offset, start): TimeSlot.objects.create(
+                doctor=cls.doctor, date=today + timedelta(days=offset),
+                start_time=start, is_booked=booked,
+            )
+            for offset, start, booked in [
+                (-1, time(9, 0), False),
+                (1, time(9, 0), False),
+                (1, time(9, 30), True),
+                (1, time(10, 0), False),
+                (2, time(9, 0), False),
+                (2, time(9, 30), False),
+            ]
+        }
+
+    def setUp(self):
+        self.client.force_login(self.patient)
+        self.url = reverse("doctor_slot_list", args=[self.doctor.id])
+
+    def _ids(self, *keys):
+        return [self.slots[key].id for key in keys]
+
+    def _page(self, **params):
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+
+        body = response.json()
+        return [row["id"] for row in body["results"]], body["next_cursor"]
+
+    def test_cursor_walks_upcoming_free_slots_once_in_order(self):
+        ids, cursor = [], None
+
+        while True:
+            page, cursor = self._page(page_size=2, **({"cursor": cursor} if cursor else {}))
+            ids += page
+
+            if not cursor:
+                break
+
+        self.assertEqual(
+            ids,
+            self._ids((1, time(9, 0)), (1, time(10, 0)), (2, time(9, 0)), (2, time(9, 30))),
+        )
+
+    def test_next_page_is_unaffected_by_bookings_on_earlier_pages(self):
+        first, cursor = self._page(page_size=2)
+
+        # An offset page would shift by one once a listed slot is booked
+        TimeSlot.objects.filter(pk=first[0]).update(is_booked=True)
+
+        second, _ = self._page(page_size=2, cursor=cursor)
+        self.assertEqual(second, self._ids((2, time(9, 0)), (2, time(9, 30))))
+
+    def test_include_booked_lists_booked_slots_too(self):
+        ids, _ = self._page(include_booked="true", page_size=3)
+
+        self.assertEqual(ids, self._ids((1, time(9, 0)), (1, time(9, 30)), (1, time(10, 0))))
+
+    def test_bad_page_size_is_a_400_and_out_of_range_is_clamped(self):
+        response = self.client.get(self.url, {"page_size": "ten"})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("page_size", response.json())
+
+        ids, cursor = self._page(page_size=0)
+        self.assertEqual(len(ids), 1)
+        self.assertIsNotNone(cursor)
+
+    def test_bad_cursor_is_a_400(self):
+        response = self.client.get(self.url, {"cursor": "bm90LWEtY3Vyc29y"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class DoctorAppointmentListTests(DoctorTestData, TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        today = timezone.localdate()
+
+        # One overdue booking, four upcoming ones, one completed
+        cls.expected = []
+        for offset, start, status in [
+            (-1, time(9, 0), "BOOKED"),
+            (0, time(9, 0), "BOOKED"),
+            (0, time(9, 30), "BOOKED"),
+            (0, time(10, 0), "COMPLETED"),
+            (1, time(9, 0), "BOOKED"),
+            (2, time(10, 30), "BOOKED"),
+        ]:
+            slot = TimeSlot.objects.create(
+                doctor=cls.doctor, date=today + timedelta(days=offset),
+                start_time=start, is_booked=True,
+            )
+            appointment = Appointment.objects.create(
+                doctor=cls.doctor, patient=cls.patient, slot=slot, status=status,
+            )
+
+            if status == "BOOKED":
+                cls.expected.append(appointment.id)
+
+    def setUp(self):
+        self.client.force_login(self.doctor.user)
+        self.url = reverse("doctor_appointment_list")
+
+    def _walk(self, **params):
+        ids, cursor = [], None
+
+        while True:
+            query = dict(params, page_size=2)
+            if cursor:
+                query["cursor"] = cursor
+
+            response = self.client.get(self.url, query)
+            self.assertEqual(response.status_code, 200)
+
+            ids += [row["id"] for row in response.json()["results"]]
+            cursor = response.json()["next_cursor"]
+
+            if not cursor:
+                return ids
+
+    def test_cursor_walks_every_booked_appointment_once_in_order(self):
+        self.assertEqual(self._walk(), self.expected)
+
+    def test_from_skips_overdue_bookings(self):
+        self.assertEqual(
+            self._walk(**{"from": timezone.localdate().isoformat()}),
+            self.expected[1:],
+        )
+
+    def test_bad_cursor_is_a_400(self):
+        response = self.client.get(self.url, {"cursor": "not-a-cursor"})
+
+        self.assertEqual(response.status_code, 400)
+
+
+class RunPregenerationTests(DoctorTestData, TestCase):
+
+    def test_second_run_of_the_day_is_skipped(self):
+        first = run_pregeneration("CRON", days=3)
+
+        self.assertEqual(first.status, "SUCCESS")
+        self.assertEqual(first.slots_created, TimeSlot.objects.count())
+        self.assertGreater(first.slots_created, 0)
+
+        self.assertIsNone(run_pregeneration("SCHEDULER", days=3))
+        self.assertEqual(SlotGenerationRun.objects.count(), 1)
+
+    def test_forced_run_creates_no_duplicates(self):
+        run_pregeneration("CRON", days=3)
+        slots = TimeSlot.objects.count()
+
+        forced = run_pregeneration("CRON", days=3, force=True)
+
+        self.assertEqual(forced.trigger, "FORCED")
+        self.assertEqual(forced.slots_created, 0)
+        self.assertEqual(TimeSlot.objects.count(), slots)
+
+    def test_failed_run_does_not_block_the_retry(self):
+        SlotGenerationRun.objects.create(
+            run_date=timezone.localdate(), trigger="CRON", status="FAILED", days=3,
+        )
 
-# Create your tests here.
+        self.assertEqual(run_pregeneration("CRON", days=3).status, "SUCCESS")
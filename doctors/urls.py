@@ -4,7 +4,10 @@ from .views import (
     doctor_dashboard,
     doctor_logout_view,
     complete_appointment,
+    mark_no_show,
     toggle_availability,
+    DoctorSlotListView,
+    DoctorAppointmentListView,
 )
 
 urlpatterns = [
@@ -12,5 +15,8 @@ urlpatterns = [
     path("dashboard/", doctor_dashboard, name="doctor_dashboard"),
     path("logout/", doctor_logout_view, name="doctor_logout"),
     path("complete/<int:appointment_id>/", complete_appointment, name="complete_appointment"),
+    path("no-show/<int:appointment_id>/", mark_no_show, name="mark_no_show"),
     path("toggle-availability/", toggle_availability, name="toggle_availability"),
+    path("appointments/", DoctorAppointmentListView.as_view(), name="doctor_appointment_list"),
+    path("<int:doctor_id>/slots/", DoctorSlotListView.as_view(), name="doctor_slot_list"),
 ]
@@ -1,11 +1,63 @@
+from datetime import time, timedelta
+
+from django.conf import settings
 from django.contrib.auth import authenticate, login, logout
 from django.shortcuts import render, redirect
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
 from django.utils import timezone
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
 from .models import Doctor
-from appointments.models import Appointment
+from .pagination import after, day_from, decode_cursor, encode_cursor, page_size_from
+from .scheduler import has_run
+from .serializers import DoctorAppointmentSerializer, DoctorSlotSerializer
+from .services import generate_slots
+from accounts.permissions import IsDoctor
+from appointments.models import Appointment, TimeSlot
+
+
+# ======================
+# BOOKED APPOINTMENTS (KEYSET)
+# ======================
+def booked_page(doctor, start=None, end=None, cursor=None, page_size=50):
+    """
+    One page of the doctor's BOOKED appointments from `start` through
+    `end` (either may be None = unbounded) in (date, start_time) order,
+    continuing after `cursor`. Returns (appointments, next_cursor or None).
+    """
+
+    # slot__doctor lets the planner walk TimeSlot's (doctor, date,
+    # start_time) unique index in page order and stop at the LIMIT;
+    # appt_doctor_booked_idx serves the plan that starts from the few
+    # BOOKED rows instead.
+    appointments = Appointment.objects.filter(
+        doctor=doctor,
+        slot__doctor=doctor,
+        status="BOOKED",
+    ).select_related("patient", "slot")
+
+    if start is not None:
+        appointments = appointments.filter(slot__date__gte=start)
+
+    if end is not None:
+        appointments = appointments.filter(slot__date__lte=end)
+
+    if cursor:
+        appointments = appointments.filter(after(*cursor, prefix="slot__"))
+
+    page = list(
+        appointments.order_by("slot__date", "slot__start_time")[:page_size + 1]
+    )
+
+    next_cursor = None
+    if len(page) > page_size:
+        page = page[:page_size]
+        next_cursor = encode_cursor(page[-1].slot.date, page[-1].slot.start_time)
+
+    return page, next_cursor
 
 
 # ======================
@@ -27,8 +79,10 @@ def doctor_login_view(request):
             doctor.last_active_date = timezone.now().date()
             doctor.save()
 
-            # ✅ AUTO GENERATE SLOTS (MODEL METHOD)
-            doctor.generate_slots_for_today()
+            # Normally the nightly pregeneration already ran; without a
+            # scheduler or cron job, the login keeps the horizon filled
+            if not has_run(timezone.localdate()):
+                generate_slots([doctor])
 
             return redirect("/doctor/dashboard/")
         else:
@@ -42,19 +96,40 @@ def doctor_login_view(request):
 # ======================
 @login_required
 def doctor_dashboard(request):
-    doctor = Doctor.objects.get(user=request.user)
+    # Lazy profile from the cached user → no extra query
+    doctor = request.doctor
 
-    appointments = Appointment.objects.filter(
-        doctor=doctor,
-        status="BOOKED"
-    ).select_related("patient", "slot")
+    today = timezone.localdate()
+    window_end = today + timedelta(days=settings.DOCTOR_DASHBOARD_DAYS - 1)
+
+    appointments, next_cursor = booked_page(
+        doctor,
+        today,
+        window_end,
+        page_size=settings.DOCTOR_DASHBOARD_PAGE_SIZE,
+    )
+
+    # Window fully shown → later days continue right after it
+    if next_cursor is None:
+        next_cursor = encode_cursor(window_end, time.max)
+
+    # Leftovers from earlier days still need completing / no-show
+    overdue, more_overdue = booked_page(
+        doctor,
+        end=today - timedelta(days=1),
+        page_size=settings.DOCTOR_DASHBOARD_PAGE_SIZE,
+    )
 
     return render(
         request,
         "doctor/dashboard.html",
         {
             "appointments": appointments,
-            "doctor": doctor
+            "overdue": overdue,
+            "more_overdue": more_overdue is not None,
+            "doctor": doctor,
+            "next_cursor": next_cursor,
+            "page_size": settings.DOCTOR_DASHBOARD_PAGE_SIZE,
         }
     )
 
@@ -65,7 +140,7 @@ def doctor_dashboard(request):
 @login_required
 def toggle_availability(request):
     if request.method == "POST":
-        doctor = Doctor.objects.get(user=request.user)
+        doctor = request.doctor
 
         doctor.is_available = not doctor.is_available
 
@@ -82,12 +157,24 @@ def toggle_availability(request):
 # ======================
 @login_required
 def complete_appointment(request, appointment_id):
-    appointment = Appointment.objects.get(
+    # One conditional UPDATE, no read-then-save
+    Appointment.objects.filter(
         id=appointment_id,
         doctor__user=request.user
-    )
-    appointment.status = "COMPLETED"
-    appointment.save()
+    ).transition("BOOKED", "COMPLETED")
+
+    return redirect("/doctor/dashboard/")
+
+
+# ======================
+# MARK NO-SHOW
+# ======================
+@login_required
+def mark_no_show(request, appointment_id):
+    Appointment.objects.filter(
+        id=appointment_id,
+        doctor__user=request.user
+    ).transition("BOOKED", "NO_SHOW")
 
     return redirect("/doctor/dashboard/")
 
@@ -97,9 +184,74 @@ def complete_appointment(request, appointment_id):
 # ======================
 @login_required
 def doctor_logout_view(request):
-    doctor = Doctor.objects.get(user=request.user)
+    doctor = request.doctor
     doctor.is_available = False
     doctor.save()
 
     logout(request)
     return redirect("/doctor/login/")
+
+
+# ======================
+# SLOT LIST API (KEYSET)
+# ======================
+class DoctorSlotListView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, doctor_id):
+        now = timezone.localtime()
+        page_size = page_size_from(request)
+
+        # Upcoming only → (date, start_time) > now evaluated in SQL
+        slots = TimeSlot.objects.filter(
+            doctor_id=doctor_id,
+            date__gte=now.date(),
+        ).filter(
+            after(now.date(), now.time())
+        ).only("id", "date", "start_time", "is_booked")
+
+        if request.query_params.get("include_booked") != "true":
+            slots = slots.filter(is_booked=False)
+
+        cursor = request.query_params.get("cursor")
+        if cursor:
+            slots = slots.filter(after(*decode_cursor(cursor)))
+
+        page = list(slots.order_by("date", "start_time")[:page_size + 1])
+
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            next_cursor = encode_cursor(page[-1].date, page[-1].start_time)
+
+        return Response({
+            "results": DoctorSlotSerializer(page, many=True).data,
+            "next_cursor": next_cursor,
+        })
+
+
+# ======================
+# BOOKED APPOINTMENTS API (KEYSET)
+# ======================
+class DoctorAppointmentListView(APIView):
+    permission_classes = [IsDoctor]
+
+    def get(self, request):
+        # No `from` → starts at the oldest open (possibly overdue) booking
+        start = day_from(request, "from")
+        end = day_from(request, "to")
+
+        cursor = request.query_params.get("cursor")
+
+        page, next_cursor = booked_page(
+            request.doctor,
+            start,
+            end,
+            cursor=decode_cursor(cursor) if cursor else None,
+            page_size=page_size_from(request),
+        )
+
+        return Response({
+            "results": DoctorAppointmentSerializer(page, many=True).data,
+            "next_cursor": next_cursor,
+        })
@@ -0,0 +1,15 @@
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+
+
+# Backends whose entries live in (or never leave) one process
+PROCESS_LOCAL_BACKENDS = (LocMemCache, DummyCache)
+
+
+def is_shared_cache(alias):
+    """
+    True when every process (gunicorn workers, management commands,
+    the outbox worker) reads and invalidates the same entries.
+    """
+    return not isinstance(caches[alias], PROCESS_LOCAL_BACKENDS)
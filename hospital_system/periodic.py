@@ -0,0 +1,68 @@
+import logging
+import threading
+
+from django.db import connections
+
+
+logger = logging.getLogger(__name__)
+
+
+# ==========================================================
+# IN-PROCESS PERIODIC RUNNER
+# ==========================================================
+class PeriodicRunner:
+    """
+    Call `func` every `interval` seconds on a daemon thread, or sooner
+    when trigger() is called.
+
+    Errors are logged and the loop keeps going; DB connections opened by
+    `func` are closed after every run so the thread never holds one idle.
+    """
+
+    def __init__(self, interval, func, name=None):
+        self.interval = interval
+        self.func = func
+        self.name = name or getattr(func, "__name__", "periodic")
+        self._stop = threading.Event()
+        self._wake = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            if self._thread and self._thread.is_alive():
+                return
+
+            self._stop.clear()
+            self._thread = threading.Thread(
+                target=self._run, name=self.name, daemon=True
+            )
+            self._thread.start()
+
+    def trigger(self):
+        """Run `func` as soon as the thread is free (starting it if needed)."""
+        self.start()
+        self._wake.set()
+
+    def stop(self, timeout=None):
+        self._stop.set()
+        self._wake.set()
+
+        if self._thread and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            self._wake.wait(self.interval)
+
+            if self._stop.is_set():
+                return
+
+            self._wake.clear()
+
+            try:
+                self.func()
+            except Exception:
+                logger.exception("Periodic task %s failed", self.name)
+            finally:
+                connections.close_all()
@@ -0,0 +1,205 @@
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse
+
+
+SCOPES = ("ip", "user")
+
+
+# ==========================================================
+# TOKEN BUCKETS IN THE DJANGO CACHE
+# ==========================================================
+def _cache():
+    return caches[settings.RATE_LIMIT_CACHE]
+
+
+def _bucket_key(name, scope, identity):
+    digest = hashlib.sha256(str(identity).encode()).hexdigest()[:32]
+    return f"ratelimit:{name}:{scope}:{digest}"
+
+
+def _rejected_key(name, scope):
+    return f"ratelimit:rejected:{name}:{scope}"
+
+
+def take_token(key, capacity, period):
+    """
+    Spend one token from the bucket at `key`.
+
+    The bucket holds `capacity` tokens and refills completely over
+    `period` seconds. Returns 0 when the request may proceed, otherwise
+    the seconds until a token is available. The read-modify-write is not
+    atomic, so a burst of truly simultaneous requests can slip a few past
+    the limit.
+    """
+
+    cache = _cache()
+    rate = capacity / period
+    now = time.time()
+
+    tokens, updated_at = cache.get(key) or (capacity, now)
+    tokens = min(capacity, tokens + (now - updated_at) * rate)
+
+    if tokens < 1:
+        return max(math.ceil((1 - tokens) / rate), 1)
+
+    # A full bucket is the same as no entry → expire after one period
+    cache.set(key, (tokens - 1, now), math.ceil(period))
+    return 0
+
+
+# ==========================================================
+# WHO IS ASKING
+# ==========================================================
+def client_ip(request):
+    """
+    REMOTE_ADDR, or the address the last RATE_LIMIT_PROXY_COUNT proxies
+    saw when the app runs behind trusted proxies (e.g. Render).
+    """
+
+    proxies = settings.RATE_LIMIT_PROXY_COUNT
+    forwarded = request.META.get("HTTP_X_FORWARDED_FOR")
+
+    if proxies and forwarded:
+        chain = [part.strip() for part in forwarded.split(",") if part.strip()]
+
+        if len(chain) >= proxies:
+            return chain[-proxies]
+
+    return request.META.get("REMOTE_ADDR", "")
+
+
+def user_identity(request, rule):
+    """
+    Authenticated user id, else the submitted identifier (login, OTP
+    request) or the pending-reset user id kept in the session.
+    """
+
+    user = getattr(request, "user", None)
+
+    if user is not None and user.is_authenticated:
+        return f"id:{user.pk}"
+
+    param = rule.get("user_param")
+    if param and request.POST.get(param):
+        return f"param:{request.POST[param].strip().lower()}"
+
+    session_key = rule.get("user_session")
+    if session_key and hasattr(request, "session") and request.session.get(session_key):
+        return f"id:{request.session[session_key]}"
+
+    return None
+
+
+# ==========================================================
+# CHECK ONE REQUEST AGAINST A RULE
+# ==========================================================
+def check(request, name):
+    """
+    Apply RATE_LIMITS[name] to `request`.
+    Returns a 429 response when any bucket is empty, else None.
+    """
+
+    rule = settings.RATE_LIMITS.get(name)
+
+    if not rule or request.method not in rule.get("methods", ("POST",)):
+        return None
+
+    identities = {
+        "ip": client_ip(request),
+        "user": user_identity(request, rule),
+    }
+
+    for scope in SCOPES:
+        limit = rule.get(scope)
+
+        if not limit or not identities[scope]:
+            continue
+
+        capacity, period = limit
+        retry_after = take_token(_bucket_key(name, scope, identities[scope]), capacity, period)
+
+        if retry_after:
+            _count_rejection(name, scope)
+            return too_many_requests(retry_after)
+
+    return None
+
+
+def too_many_requests(retry_after):
+    response = HttpResponse(
+        f"Too many requests. Please try again in {retry_after} seconds.",
+        status=429,
+        content_type="text/plain; charset=utf-8",
+    )
+    response["Retry-After"] = str(retry_after)
+    return response
+
+
+# ==========================================================
+# REJECTION COUNTERS
+# ==========================================================
+def _count_rejection(name, scope):
+    cache = _cache()
+    key = _rejected_key(name, scope)
+
+    # incr is atomic on shared backends; add() seeds a missing counter
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def rejection_counts():
+    """{(url_name, scope): rejected requests} since the cache was cleared."""
+
+    keys = {
+        _rejected_key(name, scope): (name, scope)
+        for name in settings.RATE_LIMITS
+        for scope in SCOPES
+    }
+    found = _cache().get_many(list(keys))
+
+    return {keys[key]: count for key, count in found.items() if count}
+
+
+# ==========================================================
+# MIDDLEWARE + DECORATOR
+# ==========================================================
+class RateLimitMiddleware:
+    """Throttles every view whose URL name appears in RATE_LIMITS."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        return self.get_response(request)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if getattr(view_func, "rate_limited", False):
+            return None
+
+        match = request.resolver_match
+        return check(request, match.url_name) if match and match.url_name else None
+
+
+def rate_limit(name):
+    """Apply RATE_LIMITS[name] to a view regardless of its URL name."""
+
+    def decorator(view_func):
+
+        @wraps(view_func)
+        def wrapped(request, *args, **kwargs):
+            return check(request, name) or view_func(request, *args, **kwargs)
+
+        # Middleware skips views that throttle themselves
+        wrapped.rate_limited = True
+        return wrapped
+
+    return decorator
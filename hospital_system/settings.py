@@ -1,6 +1,7 @@
 from pathlib import Path
 import os
 import dj_database_url
+from django.core.exceptions import ImproperlyConfigured
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -36,6 +37,7 @@ INSTALLED_APPS = [
     "doctors",
     "appointments",
     "analytics",
+    "notifications",
 ]
 
 # ======================================================
@@ -48,8 +50,9 @@ MIDDLEWARE = [
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
-    "django.contrib.auth.middleware.AuthenticationMiddleware",
+    "accounts.auth_cache.CachedAuthenticationMiddleware",
     "django.contrib.messages.middleware.MessageMiddleware",
+    "hospital_system.ratelimit.RateLimitMiddleware",
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
 ]
 
@@ -88,6 +91,60 @@ DATABASES = {
     )
 }
 
+# ======================================================
+# CACHE
+# ======================================================
+
+# Point CACHE_BACKEND/CACHE_LOCATION at a shared cache (e.g. Redis) when
+# running more than one worker; local memory is per process.
+CACHES = {
+    "default": {
+        "BACKEND": os.environ.get(
+            "CACHE_BACKEND",
+            "django.core.cache.backends.locmem.LocMemCache",
+        ),
+        "LOCATION": os.environ.get("CACHE_LOCATION", "hospital-system"),
+    }
+}
+
+# ======================================================
+# SESSIONS & MESSAGES
+# ======================================================
+
+# SESSION_PROFILE picks where sessions and flash messages live:
+#   "database"       → Django defaults: session row loaded (and saved when
+#                      modified) on every request
+#   "cached_db"      → sessions read from the cache, written through to
+#                      the DB; flash messages ride in a cookie
+#   "signed_cookies" → no server-side session storage at all. Session data
+#                      is signed, not encrypted, and cannot be revoked
+#                      server-side before SESSION_COOKIE_AGE runs out.
+# `python manage.py bench_sessions` compares per-request query counts.
+SESSION_PROFILES = {
+    "database": (
+        "django.contrib.sessions.backends.db",
+        "django.contrib.messages.storage.fallback.FallbackStorage",
+    ),
+    "cached_db": (
+        "django.contrib.sessions.backends.cached_db",
+        "django.contrib.messages.storage.cookie.CookieStorage",
+    ),
+    "signed_cookies": (
+        "django.contrib.sessions.backends.signed_cookies",
+        "django.contrib.messages.storage.cookie.CookieStorage",
+    ),
+}
+
+SESSION_PROFILE = os.environ.get("SESSION_PROFILE", "database")
+
+if SESSION_PROFILE not in SESSION_PROFILES:
+    raise ImproperlyConfigured(
+        f"SESSION_PROFILE must be one of: {', '.join(SESSION_PROFILES)}"
+    )
+
+SESSION_ENGINE, MESSAGE_STORAGE = SESSION_PROFILES[SESSION_PROFILE]
+SESSION_CACHE_ALIAS = "default"
+
 # ======================================================
 # INTERNATIONALIZATION
 # ======================================================
@@ -117,6 +174,120 @@ STATICFILES_STORAGE = "whitenoise.storage.CompressedManifestStaticFilesStorage"
 AUTH_USER_MODEL = "accounts.User"
 LOGIN_URL = "/login/"
 
+# Seconds between bulk writes of User.last_activity (0 = write every hit)
+ACTIVITY_FLUSH_INTERVAL = int(os.environ.get("ACTIVITY_FLUSH_INTERVAL", "30"))
+
+# A signed-in user counts as online until this long after their last
+# activity (checked in the query → shared by every worker)
+PRESENCE_TTL_SECONDS = 300
+
+# request.user is served from the cache (invalidated on User/Doctor saves).
+# Only with a shared backend (CACHE_BACKEND=redis/memcached/database):
+# with the per-process LocMemCache default it is loaded from the DB.
+AUTH_USER_CACHE = "default"
+AUTH_USER_CACHE_TIMEOUT = 300
+
+# Password reset OTPs (hashed, in the cache; expire via cache TTL). With
+# a per-process OTP_CACHE they are kept in PasswordResetOTP rows instead,
+# so a code issued by one worker verifies on every other.
+OTP_CACHE = "default"
+OTP_TTL_SECONDS = 300
+OTP_MAX_ATTEMPTS = 5
+OTP_RESEND_SECONDS = 60
+
+# ======================================================
+# RATE LIMITING
+# ======================================================
+
+# Token buckets per URL name: scope → (burst capacity, seconds to refill
+# completely). "user" is the logged-in user, else the submitted
+# `user_param` or the session's `user_session` value. Only `methods`
+# (default POST) are throttled.
+RATE_LIMITS = {
+    "login": {"ip": (20, 60), "user": (5, 60), "user_param": "username"},
+    "doctor_login": {"ip": (20, 60), "user": (5, 60), "user_param": "username"},
+    "forgot_password": {"ip": (10, 600), "user": (3, 600), "user_param": "identifier"},
+    "resend_otp": {"ip": (10, 600), "user": (3, 600), "user_session": "reset_user_id"},
+    "book_appointment": {"ip": (60, 60), "user": (10, 60)},
+}
+RATE_LIMIT_CACHE = "default"
+
+# Number of reverse proxies in front of the app that append to
+# X-Forwarded-For (Render: 1). 0 → trust REMOTE_ADDR only.
+RATE_LIMIT_PROXY_COUNT = int(os.environ.get("RATE_LIMIT_PROXY_COUNT", "0"))
+
+# ======================================================
+# DOCTOR SEARCH
+# ======================================================
+
+# Seconds each process keeps its in-memory specialization catalog
+# (changes made in the same process apply immediately)
+SPECIALIZATION_CATALOG_TTL = 300
+
+# Pre-serialized "doctors available today" list (invalidated on doctor
+# changes, not bookings; the timeout is only a safety net). Only cached
+# with a shared backend; LocMemCache rebuilds it per request.
+AVAILABLE_DOCTORS_CACHE = "default"
+AVAILABLE_DOCTORS_CACHE_TIMEOUT = 300
+
+# Doctor dashboard: days rendered up front (today first) and rows per
+# page; later days are lazy-loaded from the JSON feed. Overdue BOOKED
+# appointments from earlier days are listed above them.
+DOCTOR_DASHBOARD_DAYS = 1
+DOCTOR_DASHBOARD_PAGE_SIZE = 25
+
+# ======================================================
+# SLOT GENERATION
+# ======================================================
+
+# How many days ahead `generate_slots` expands doctor availability
+SLOT_GENERATION_DAYS = int(os.environ.get("SLOT_GENERATION_DAYS", "14"))
+
+# Nightly pregeneration for every doctor, run by `pregenerate_slots` from
+# cron or by its --loop scheduler (local time, HH:MM)
+SLOT_PREGENERATION_TIME = os.environ.get("SLOT_PREGENERATION_TIME", "02:00")
+SLOT_PREGENERATION_CHECK_INTERVAL = 60
+
+# A RUNNING run older than this is treated as crashed and no longer
+# blocks the day
+SLOT_PREGENERATION_LOCK_SECONDS = 3600
+
+# The scheduler retries a failed day after this many seconds, doubling
+# per failure up to SLOT_PREGENERATION_RETRY_MAX_SECONDS
+SLOT_PREGENERATION_RETRY_SECONDS = 300
+SLOT_PREGENERATION_RETRY_MAX_SECONDS = 3600
+
+# ======================================================
+# BOOKING
+# ======================================================
+
+# "locking" → select_for_update path, "cas" → single conditional UPDATE
+BOOKING_MODE = os.environ.get("BOOKING_MODE", "locking")
+
+# Short-lived slot holds taken while a booking is in progress
+SLOT_HOLD_SECONDS = 10
+SLOT_RESERVATION_STORE = os.environ.get(
+    "SLOT_RESERVATION_STORE",
+    "appointments.reservations.CacheReservationStore",
+)
+SLOT_RESERVATION_CACHE = "default"
+
+# Waiting-queue engine. MemoryQueueEngine keeps per-slot queues in process
+# memory (write-through to AppointmentQueue); use it with a single worker.
+APPOINTMENT_QUEUE_ENGINE = os.environ.get(
+    "APPOINTMENT_QUEUE_ENGINE",
+    "appointments.queue_engine.DatabaseQueueEngine",
+)
+
+# Waiting-queue priority: rules are summed. {"add": field} adds a numeric
+# patient field, {"when": {lookup: value}, "points": n} adds n when every
+# lookup matches. Changing a patient's age/type rescores their queue rows.
+PRIORITY_RULES = [
+    {"add": "age"},
+    {"when": {"patient_type": "EMERGENCY"}, "points": 100},
+    {"when": {"age__gte": 60}, "points": 50},
+]
+
 # ======================================================
 # EMAIL
 # ======================================================
@@ -130,3 +301,24 @@ EMAIL_HOST_USER = os.environ.get("EMAIL_HOST_USER")
 EMAIL_HOST_PASSWORD = os.environ.get("EMAIL_HOST_PASSWORD")
 
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
+
+# ======================================================
+# OUTBOX (BACKGROUND MAIL DISPATCH)
+# ======================================================
+
+# Backend the outbox worker sends with; use
+# "django.core.mail.backends.locmem.EmailBackend" or
+# "django.core.mail.backends.filebased.EmailBackend" for tests.
+OUTBOX_EMAIL_BACKEND = os.environ.get("OUTBOX_EMAIL_BACKEND", EMAIL_BACKEND)
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_SECONDS = 30
+
+# Set OUTBOX_WORKER=True wherever `send_outbox --loop` runs (Procfile
+# worker). Without one (the Render build.sh deploy) a background thread
+# in each web process drains the outbox after every commit that queued
+# mail, so mail never piles up unsent and requests never wait on SMTP.
+OUTBOX_WORKER = os.environ.get("OUTBOX_WORKER", "False") == "True"
+
+# SENT rows are deleted by send_outbox after this many days
+OUTBOX_RETENTION_DAYS = int(os.environ.get("OUTBOX_RETENTION_DAYS", "30"))
@@ -0,0 +1,39 @@
+from datetime import time
+
+from accounts.models import User
+from doctors.models import Doctor
+
+
+# ==========================================================
+# SHARED TEST FIXTURES
+# ==========================================================
+class DoctorPatientTestData:
+    """
+    setUpTestData mixin for TestCase: `cls.doctor` (a Doctor profile
+    working `doctor_hours` in `doctor_specialization`) and `cls.patient`.
+    Override setUpTestData and call super() first to add more rows.
+    """
+
+    doctor_specialization = "Cardiology"
+    doctor_hours = (time(9, 0), time(17, 0))
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+
+        cls.doctor = Doctor.objects.create(
+            user=User.objects.create_user(
+                username="doc", email="doc@example.com", phone="100", role="DOCTOR"
+            ),
+            specialization=cls.doctor_specialization,
+            available_from=cls.doctor_hours[0],
+            available_to=cls.doctor_hours[1],
+        )
+        cls.patient = cls.create_patient("pat", "200")
+
+    @staticmethod
+    def create_patient(username, phone, age=30, **fields):
+        return User.objects.create_user(
+            username=username, email=f"{username}@example.com",
+            phone=phone, age=age, **fields,
+        )
@@ -17,6 +17,9 @@ urlpatterns = [
     # Doctor pages
     path("doctor/", include("doctors.urls")),
 
+    # Admin analytics
+    path("analytics/", include("analytics.urls")),
+
     # APIs
     path("api/appointments/", include("appointments.urls")),
     path("api/doctor/", include("doctors.urls")),
@@ -0,0 +1,17 @@
+from django.contrib import admin
+
+from .models import OutboxEmail
+
+
+@admin.register(OutboxEmail)
+class OutboxEmailAdmin(admin.ModelAdmin):
+    list_display = ("subject", "status", "sensitive", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status", "sensitive")
+    readonly_fields = ("created_at", "sent_at", "last_error", "sensitive")
+
+    def get_exclude(self, request, obj=None):
+        # OTP bodies are never shown to staff
+        if obj is not None and obj.sensitive:
+            return ("body",)
+
+        return super().get_exclude(request, obj)
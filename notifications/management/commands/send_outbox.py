@@ -0,0 +1,52 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from notifications.outbox import dispatch_pending, purge_sensitive, purge_sent
+
+
+class Command(BaseCommand):
+    help = "Send pending outbox emails once, or keep draining with --loop."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--loop",
+            action="store_true",
+            help="Keep polling instead of exiting after one pass.",
+        )
+        parser.add_argument(
+            "--interval",
+            type=float,
+            default=1.0,
+            help="Seconds to sleep when the outbox is empty (with --loop).",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=None,
+            help="Emails per batch (default: OUTBOX_BATCH_SIZE).",
+        )
+
+    def handle(self, *args, **options):
+
+        while True:
+            result = dispatch_pending(options["batch_size"])
+
+            # Delivered or expired OTP mails leave the table right away,
+            # other sent mail after OUTBOX_RETENTION_DAYS
+            purged = purge_sensitive() + purge_sent()
+
+            if result.total or purged:
+                self.stdout.write(
+                    f"sent={result.sent} retried={result.retried} "
+                    f"failed={result.failed} purged={purged}"
+                )
+
+            if not options["loop"]:
+                break
+
+            # Only back off once the outbox is drained
+            if not result.total:
+                close_old_connections()
+                time.sleep(options["interval"])
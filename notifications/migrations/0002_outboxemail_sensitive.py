@@ -0,0 +1,34 @@
+# Generated by Django 6.0.2 on 2026-10-18 14:00
+
+from django.db import migrations, models
+
+
+OTP_SUBJECTS = ["MediCare+ Password Reset OTP", "Resent OTP"]
+
+
+def redact_existing_otps(apps, schema_editor):
+    OutboxEmail = apps.get_model("notifications", "OutboxEmail")
+
+    # Codes queued before the flag existed; send_outbox purges them
+    OutboxEmail.objects.filter(subject__in=OTP_SUBJECTS).exclude(
+        status="PENDING"
+    ).update(sensitive=True, body="")
+    OutboxEmail.objects.filter(subject__in=OTP_SUBJECTS, status="PENDING").update(
+        sensitive=True
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("notifications", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="outboxemail",
+            name="sensitive",
+            field=models.BooleanField(default=False),
+        ),
+        migrations.RunPython(redact_existing_otps, migrations.RunPython.noop),
+    ]
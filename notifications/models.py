@@ -0,0 +1,45 @@
+from django.db import models
+from django.utils import timezone
+
+
+# ==========================================================
+# TRANSACTIONAL EMAIL OUTBOX
+# ==========================================================
+class OutboxEmail(models.Model):
+
+    STATUS_CHOICES = (
+        ("PENDING", "Pending"),
+        ("SENT", "Sent"),
+        ("FAILED", "Failed"),
+    )
+
+    subject = models.CharField(max_length=255)
+    body = models.TextField()
+    from_email = models.CharField(max_length=254, blank=True)
+    recipients = models.JSONField(default=list)
+
+    # Body carries a secret (password reset OTP): blanked once the mail
+    # is sent or given up on, and the row purged by send_outbox
+    sensitive = models.BooleanField(default=False)
+
+    status = models.CharField(
+        max_length=10,
+        choices=STATUS_CHOICES,
+        default="PENDING"
+    )
+
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True)
+
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ["next_attempt_at"]
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"]),
+        ]
+
+    def __str__(self):
+        return f"{self.status} | {self.subject} -> {', '.join(self.recipients)}"
@@ -0,0 +1,230 @@
+import threading
+from dataclasses import dataclass
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import Q
+from django.dispatch import receiver
+from django.utils import timezone
+
+from hospital_system.periodic import PeriodicRunner
+from .models import OutboxEmail
+
+
+# =========================================
+# ENQUEUE (INSIDE THE CALLER'S TRANSACTION)
+# =========================================
+def enqueue_email(subject, message, recipient_list, from_email=None, sensitive=False):
+    """
+    Record an email to be sent by the outbox worker.
+
+    The row commits or rolls back together with the caller's transaction,
+    so no SMTP round trip happens while business locks are held.
+    `sensitive` bodies (OTPs) never outlive delivery.
+
+    Without an OUTBOX_WORKER a background thread of this process drains
+    the outbox right after commit instead (this mail plus any retries
+    that came due), so the request never waits on SMTP either.
+    """
+    entry = OutboxEmail.objects.create(
+        subject=subject,
+        body=message,
+        from_email=from_email or settings.DEFAULT_FROM_EMAIL or "",
+        recipients=list(recipient_list),
+        sensitive=sensitive,
+    )
+
+    if not settings.OUTBOX_WORKER:
+        transaction.on_commit(get_outbox_dispatcher().trigger, robust=True)
+
+    return entry
+
+
+# =========================================
+# DISPATCH
+# =========================================
+@dataclass
+class DispatchResult:
+    sent: int = 0
+    retried: int = 0
+    failed: int = 0
+
+    @property
+    def total(self):
+        return self.sent + self.retried + self.failed
+
+
+def retry_delay(attempts):
+    """Exponential backoff: base, 2×base, 4×base … capped at one hour."""
+    return timedelta(
+        seconds=min(settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1), 3600)
+    )
+
+
+@transaction.atomic
+def dispatch_pending(batch_size=None):
+    """
+    Send one batch of due emails over a single backend connection.
+
+    Rows are claimed with SKIP LOCKED so several workers can drain the
+    outbox side by side without sending anything twice.
+    """
+
+    now = timezone.now()
+    result = DispatchResult()
+
+    batch = list(
+        OutboxEmail.objects.select_for_update(skip_locked=True).filter(
+            status="PENDING",
+            next_attempt_at__lte=now,
+        ).order_by("next_attempt_at")[:batch_size or settings.OUTBOX_BATCH_SIZE]
+    )
+
+    if not batch:
+        return result
+
+    connection = get_connection(settings.OUTBOX_EMAIL_BACKEND)
+
+    try:
+        connection.open()
+    except Exception as exc:
+        # Could not even connect → retry the whole batch later
+        for entry in batch:
+            _mark_failure(entry, exc, now, result)
+        _save(batch)
+        return result
+
+    try:
+        for entry in batch:
+            message = EmailMessage(
+                entry.subject,
+                entry.body,
+                entry.from_email or None,
+                entry.recipients,
+                connection=connection,
+            )
+
+            try:
+                message.send()
+            except Exception as exc:
+                _mark_failure(entry, exc, now, result)
+            else:
+                entry.status = "SENT"
+                entry.sent_at = timezone.now()
+                entry.attempts += 1
+                entry.last_error = ""
+                _redact(entry)
+                result.sent += 1
+    finally:
+        connection.close()
+
+    _save(batch)
+    return result
+
+
+def _mark_failure(entry, exc, now, result):
+    entry.attempts += 1
+    entry.last_error = f"{type(exc).__name__}: {exc}"
+
+    if entry.attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        entry.status = "FAILED"
+        _redact(entry)
+        result.failed += 1
+    else:
+        entry.next_attempt_at = now + retry_delay(entry.attempts)
+        result.retried += 1
+
+
+def _redact(entry):
+    if entry.sensitive:
+        entry.body = ""
+
+
+def _save(batch):
+    OutboxEmail.objects.bulk_update(
+        batch,
+        ["status", "attempts", "next_attempt_at", "last_error", "sent_at", "body"],
+    )
+
+
+# =========================================
+# IN-PROCESS DISPATCHER (NO OUTBOX_WORKER)
+# =========================================
+def drain_outbox():
+    """Dispatch batches until one comes back short (nothing more due)."""
+
+    while dispatch_pending().total >= settings.OUTBOX_BATCH_SIZE:
+        pass
+
+
+_dispatcher = None
+_dispatcher_lock = threading.Lock()
+
+
+def get_outbox_dispatcher():
+    """
+    Per-process thread that drains the outbox when triggered after a
+    commit, and every OUTBOX_RETRY_BASE_SECONDS for retries that come due.
+    """
+    global _dispatcher
+
+    if _dispatcher is None:
+        with _dispatcher_lock:
+            if _dispatcher is None:
+                _dispatcher = PeriodicRunner(
+                    settings.OUTBOX_RETRY_BASE_SECONDS, drain_outbox,
+                    name="outbox-dispatch",
+                )
+
+    return _dispatcher
+
+
+@receiver(setting_changed)
+def _reset_dispatcher(setting, **kwargs):
+    global _dispatcher
+
+    if setting.startswith("OUTBOX_") and _dispatcher is not None:
+        _dispatcher.stop()
+        _dispatcher = None
+
+
+# =========================================
+# PURGE
+# =========================================
+def purge_sensitive(now=None):
+    """
+    Delete OTP mails that were sent or given up on, and pending ones
+    whose code has expired anyway. Returns the number of rows deleted.
+    """
+
+    now = now or timezone.now()
+    expired = now - timedelta(seconds=settings.OTP_TTL_SECONDS)
+
+    deleted, _ = OutboxEmail.objects.filter(sensitive=True).filter(
+        Q(status__in=["SENT", "FAILED"]) | Q(created_at__lt=expired)
+    ).delete()
+
+    return deleted
+
+
+def purge_sent(now=None):
+    """
+    Delete SENT rows older than OUTBOX_RETENTION_DAYS. Returns the
+    number of rows deleted.
+    """
+
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=settings.OUTBOX_RETENTION_DAYS)
+
+    # next_attempt_at <= sent_at → the (status, next_attempt_at) index
+    # narrows the scan, sent_at decides
+    deleted, _ = OutboxEmail.objects.filter(
+        status="SENT",
+        next_attempt_at__lt=cutoff,
+        sent_at__lt=cutoff,
+    ).delete()
+
+    return deleted
@@ -0,0 +1,82 @@
+import threading
+from datetime import timedelta
+from unittest import mock
+
+from django.core import mail
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from hospital_system.periodic import PeriodicRunner
+from .models import OutboxEmail
+from .outbox import drain_outbox, enqueue_email, purge_sent
+
+
+@override_settings(OUTBOX_EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend")
+class OutboxTests(TestCase):
+
+    @override_settings(OUTBOX_WORKER=False)
+    def test_without_a_worker_the_dispatcher_is_woken_after_commit(self):
+        with mock.patch("notifications.outbox.get_outbox_dispatcher") as dispatcher:
+            with self.captureOnCommitCallbacks(execute=True):
+                entry = enqueue_email("Hello", "Body", ["pat@example.com"])
+
+                dispatcher.return_value.trigger.assert_not_called()
+
+        dispatcher.return_value.trigger.assert_called_once_with()
+
+        # Nothing was sent from the request thread
+        entry.refresh_from_db()
+        self.assertEqual(entry.status, "PENDING")
+        self.assertEqual(len(mail.outbox), 0)
+
+    @override_settings(OUTBOX_BATCH_SIZE=2)
+    def test_drain_sends_every_due_mail_in_batches(self):
+        for n in range(3):
+            enqueue_email(f"Hello {n}", "Body", [f"p{n}@example.com"])
+
+        drain_outbox()
+
+        self.assertEqual(OutboxEmail.objects.filter(status="SENT").count(), 3)
+        self.assertEqual(len(mail.outbox), 3)
+
+    def test_trigger_runs_the_task_on_the_runner_thread(self):
+        ran = threading.Event()
+        threads = []
+
+        def task():
+            threads.append(threading.current_thread().name)
+            ran.set()
+
+        runner = PeriodicRunner(3600, task, name="outbox-dispatch-test")
+        self.addCleanup(runner.stop, 5)
+
+        runner.trigger()
+
+        self.assertTrue(ran.wait(5))
+        self.assertEqual(threads, ["outbox-dispatch-test"])
+
+    @override_settings(OUTBOX_WORKER=True)
+    def test_with_a_worker_mail_waits_in_the_outbox(self):
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            entry = enqueue_email("Hello", "Body", ["pat@example.com"])
+
+        self.assertEqual(callbacks, [])
+        self.assertEqual(entry.status, "PENDING")
+        self.assertEqual(len(mail.outbox), 0)
+
+    def test_purge_sent_keeps_recent_and_unsent_rows(self):
+        now = timezone.now()
+        old = now - timedelta(days=31)
+
+        OutboxEmail.objects.bulk_create([
+            OutboxEmail(subject="old", status="SENT", next_attempt_at=old, sent_at=old),
+            OutboxEmail(subject="recent", status="SENT", next_attempt_at=now, sent_at=now),
+            OutboxEmail(subject="failed", status="FAILED", next_attempt_at=old),
+            OutboxEmail(subject="pending", next_attempt_at=old),
+        ])
+
+        self.assertEqual(purge_sent(now), 1)
+        self.assertEqual(
+            sorted(OutboxEmail.objects.values_list("subject", flat=True)),
+            ["failed", "pending", "recent"],
+        )